@@ -0,0 +1,76 @@
+"""
+Candlestick rendering: the old per-bar renderer (one ax.plot line + one
+Rectangle patch per bar, kept here as `legacy_plot_candles`) against
+viz.candlestick.plot_candles (one LineCollection + one PolyCollection).
+Both save a PNG through Agg; the new one is also timed without decimation.
+
+    python -m benchmarks.bench_candles --bars 250,1000,5000
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import matplotlib.dates as mdates
+from matplotlib.patches import Rectangle
+from benchmarks.synthetic import synthetic_series
+from viz.candlestick import plot_candles
+
+
+def legacy_plot_candles(records, title="", save_path=None):
+    """The pre-vectorization renderer, verbatim apart from show=False."""
+    records = sorted(records, key=lambda r: r.date)
+    xs = [mdates.date2num(r.date) for r in records]
+    fig, ax = plt.subplots(figsize=(10, 4))
+    for x, r in zip(xs, records):
+        up = r.close >= r.open
+        color = "tab:green" if up else "tab:red"
+        ax.plot([x, x], [r.low, r.high], linewidth=1)
+        width = 0.6
+        lower = min(r.open, r.close)
+        height = abs(r.close - r.open)
+        if height == 0:
+            height = 0.2
+        ax.add_patch(Rectangle((x - width / 2, lower), width, height, color=color, alpha=0.85, linewidth=0))
+    ax.set_title(title or "Candlestick")
+    ax.set_xlabel("Date"); ax.set_ylabel("Price")
+    ax.grid(True, linestyle="--", alpha=0.3)
+    ax.xaxis_date()
+    ax.xaxis.set_major_formatter(mdates.DateFormatter("%Y-%m-%d"))
+    fig.autofmt_xdate()
+    fig.tight_layout()
+    fig.savefig(save_path, dpi=150)
+    plt.close(fig)
+
+
+def measure(fn):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--bars", default="250,1000,5000")
+    args = ap.parse_args()
+
+    out = tempfile.mkdtemp(prefix="bench_candles_")
+    print(f"{'bars':>7} {'legacy s':>9} {'legacy MB':>10} {'new s':>7} {'new MB':>7} {'no-decim s':>11} {'speedup':>8}")
+    for bars in (int(b) for b in args.bars.split(",")):
+        records = synthetic_series(bars, ticker="BENCH").to_records()
+        path = os.path.join(out, f"c{bars}.png")
+        t_old, m_old = measure(lambda: legacy_plot_candles(records, save_path=path))
+        t_new, m_new = measure(lambda: plot_candles(records, save_path=path, show=False))
+        t_full, _ = measure(lambda: plot_candles(records, save_path=path, show=False, decimate=False))
+        print(f"{bars:>7} {t_old:9.2f} {m_old / 2**20:10.1f} {t_new:7.2f} {m_new / 2**20:7.1f} {t_full:11.2f} {t_old / t_new:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+/api/featured latency against a local stub upstream.
+
+Starts an Alpha-Vantage-shaped HTTP stub on localhost where each symbol answers
+after its own delay, routes the upstream fetch through it, and times the
+endpoint. With concurrent fan-out the latency should track max(delays), not sum.
+
+    python -m benchmarks.bench_featured --delays 0.2,0.4,0.6,0.8,1.0
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+def start_stub(delays: dict) -> ThreadingHTTPServer:
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            sym = parse_qs(urlparse(self.path).query).get("symbol", [""])[0]
+            time.sleep(delays.get(sym, 0.0))
+            body = json.dumps({"Time Series (Daily)": {
+                "2025-01-02": {"1. open": "10", "2. high": "11", "3. low": "9", "4. close": "10.5", "5. volume": "100"},
+                "2025-01-03": {"1. open": "10.5", "2. high": "12", "3. low": "10", "4. close": "11.5", "5. volume": "120"},
+            }}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    return srv
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--delays", default="0.2,0.4,0.6,0.8,1.0")
+    ap.add_argument("--runs", type=int, default=3)
+    args = ap.parse_args()
+
+    os.environ.setdefault("WARMUP", "0")
+    os.environ.setdefault("PREFETCH", "0")
+    os.environ.setdefault("HISTORY_STORE_DIR", "")   # don't persist stub bars into out/store
+    from fastapi.testclient import TestClient
+    from core.frame import OHLCVFrame
+    import web.sources as sources
+    from web.cache import CACHE
+    from web.server import PREFETCHER, app
+
+    curated = ["RELIANCE.NS", "TCS.NS", "INFY.NS", "HDFCBANK.NS", "ICICIBANK.NS"]
+    delays = dict(zip(curated, (float(x) for x in args.delays.split(","))))
+    srv = start_stub(delays)
+
+    # route the Yahoo path through the stub: BAR_STORE's upstream call goes to the
+    # Alpha fetcher (same pooled session), pointed at the local server
+    sources.ALPHA_KEY = "stub"
+    sources.ALPHA_URL = f"http://127.0.0.1:{srv.server_port}/query"
+    sources.BAR_STORE._fetch = lambda ticker, period="6mo", interval="1d", start=None: \
+        OHLCVFrame.from_dicts(sources.fetch_alpha(ticker), ticker)
+
+    client = TestClient(app)
+    best = float("inf")
+    for _ in range(args.runs):
+        # every run starts cold: no cached series, bars or featured snapshot
+        CACHE.clear()
+        sources.BAR_STORE._series.clear()
+        PREFETCHER.snapshots.clear()
+        t0 = time.perf_counter()
+        r = client.get("/api/featured")
+        best = min(best, time.perf_counter() - t0)
+        assert r.status_code == 200 and all(f["last"] is not None for f in r.json()["featured"]), r.text
+    srv.shutdown()
+
+    slowest, total = max(delays.values()), sum(delays.values())
+    print(f"featured: {best:.3f}s  slowest_fetch={slowest:.3f}s  sum_of_fetches={total:.3f}s  "
+          f"ratio_to_slowest={best / slowest:.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Response formats: bytes on the wire and encode latency per format for a long
+single-ticker history with MA/EMA (+ optional registry indicators).
+
+  legacy   : list of per-bar dicts through FastAPI's jsonable_encoder + json.dumps
+  rows     : same shape through web.serialize (orjson when installed)
+  columns  : parallel arrays, numpy columns written directly
+  arrow    : Arrow IPC stream (needs pyarrow)
+
+Sizes are reported raw, gzip and (if the brotli module is installed) br.
+
+    python -m benchmarks.bench_formats --bars 50000 --indicators rsi,bb
+"""
+import argparse
+import gzip
+import json
+import time
+import numpy as np
+from fastapi.encoders import jsonable_encoder
+from benchmarks.synthetic import synthetic_series
+from core.technical import parse_specs
+from web.server import _live_payload
+from web import serialize
+
+
+def best_of(fn, repeat: int):
+    best, out = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return out, best
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--bars", type=int, default=20_000)
+    ap.add_argument("--indicators", default="")
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    frame = synthetic_series(args.bars, step=np.timedelta64(60, "s"))   # 1-minute bars
+    payload = {"company": "BENCH.NS", **_live_payload(frame, parse_specs(args.indicators))}
+
+    def legacy():
+        return json.dumps(jsonable_encoder(serialize.shape(payload, "rows"))).encode()
+
+    encoders = {
+        "legacy": legacy,
+        "rows": lambda: serialize.dumps(serialize.shape(payload, "rows")),
+        "columns": lambda: serialize.dumps(serialize.shape(payload, "columns")),
+        "arrow": lambda: serialize.arrow_bytes(payload),
+    }
+    print(f"bars={args.bars} indicators={args.indicators or '-'} orjson={serialize.orjson is not None}")
+    print(f"{'format':<8} {'encode ms':>10} {'raw KB':>10} {'gzip KB':>10} {'gzip ms':>9} {'br KB':>8}")
+    for name, fn in encoders.items():
+        try:
+            body, t_enc = best_of(fn, args.repeat)
+        except serialize.FormatUnavailable as e:
+            print(f"{name:<8} skipped: {e}")
+            continue
+        gz, t_gz = best_of(lambda: gzip.compress(body, compresslevel=serialize.GZIP_LEVEL), args.repeat)
+        br = (f"{len(serialize.brotli.compress(body, quality=serialize.BROTLI_QUALITY)) / 1024:8.1f}"
+              if serialize.brotli is not None else f"{'-':>8}")
+        print(f"{name:<8} {t_enc * 1000:10.2f} {len(body) / 1024:10.1f} {len(gz) / 1024:10.1f} {t_gz * 1000:9.2f} {br}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Cold-start cost: imports each entry module in a fresh interpreter with
+`python -X importtime` and reports the wall time plus the most expensive
+modules (cumulative microseconds, as printed by importtime). Also lists
+which heavy dependencies got imported at module load.
+
+    python -m benchmarks.bench_import --modules web.server,cli.main --top 10
+"""
+import argparse
+import subprocess
+import sys
+import time
+
+HEAVY = ("pandas", "yfinance", "requests", "matplotlib", "pyarrow")
+
+
+def importtime(module: str):
+    """(wall seconds, [(cumulative_us, self_us, name)], heavy modules loaded)."""
+    probe = f"import sys, {module}; print(','.join(m for m in {HEAVY!r} if m in sys.modules))"
+    t0 = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", probe],
+                          capture_output=True, text=True, check=True)
+    wall = time.perf_counter() - t0
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cum_us, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        rows.append((int(cum_us), int(self_us), name))
+    loaded = [m for m in proc.stdout.strip().split(",") if m]
+    return wall, rows, loaded
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--modules", default="web.server,cli.main,core.loader,viz.candlestick")
+    ap.add_argument("--top", type=int, default=8)
+    ap.add_argument("--repeat", type=int, default=3, help="best-of wall time")
+    args = ap.parse_args()
+
+    for module in args.modules.split(","):
+        runs = [importtime(module) for _ in range(args.repeat)]
+        wall, rows, loaded = min(runs, key=lambda r: r[0])
+        top_level = {name.strip(): cum for cum, _, name in rows if not name.startswith(" ")}
+        print(f"\n{module}: wall {wall * 1000:.0f} ms, import {top_level.get(module, 0) / 1000:.0f} ms, "
+              f"heavy deps loaded: {', '.join(loaded) or 'none'}")
+        print(f"  {'cumulative ms':>13} {'self ms':>8}  module")
+        for cum, self_us, name in sorted(rows, reverse=True)[:args.top]:
+            print(f"  {cum / 1000:13.1f} {self_us / 1000:8.1f}  {name.strip()}")
+
+
+if __name__ == "__main__":
+    main()
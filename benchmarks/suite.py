@@ -0,0 +1,315 @@
+"""
+Benchmark suite over deterministic synthetic data (benchmarks.synthetic).
+
+Scenarios: CSV load, sort, search, summary, indicators, chart rendering and
+in-process API requests (FastAPI TestClient against a synthetic CSV).
+Each scenario is timed `--repeat` times after one warm-up run; results are
+written as JSON and optionally compared with a stored baseline:
+
+    python -m benchmarks.suite --size medium --out benchmarks/baseline.json     # record
+    python -m benchmarks.suite --size medium --baseline benchmarks/baseline.json  # compare
+
+A scenario whose median is more than --threshold slower than the baseline is a
+regression; the exit status is 1 when there is any. Baselines are only
+comparable on the same machine and size.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import Callable, Dict, List, Optional
+import numpy as np
+from benchmarks.synthetic import synthetic_frame, write_csv
+from core.frame import OHLCVFrame
+
+SIZES = {                      # tickers x business days
+    "small": (20, 250),
+    "medium": (200, 1000),
+    "large": (1000, 2500),
+}
+INDICATORS = "rsi,macd,bb,atr,vwap"
+
+Setup = Callable[["Workload"], Callable[[], object]]
+SCENARIOS: Dict[str, Setup] = {}
+
+
+class Skip(Exception):
+    """Raised by a scenario setup when it cannot run here (missing optional dependency)."""
+
+
+def scenario(name: str):
+    """Register `setup(workload) -> fn`; fn() is what gets timed."""
+    def deco(setup: Setup) -> Setup:
+        SCENARIOS[name] = setup
+        return setup
+    return deco
+
+
+@dataclass
+class Workload:
+    tickers: int
+    days: int
+    seed: int = 7
+    workdir: str = field(default_factory=lambda: tempfile.mkdtemp(prefix="bench_"))
+
+    @cached_property
+    def frame(self) -> OHLCVFrame:
+        return synthetic_frame(self.tickers, self.days, seed=self.seed)
+
+    @cached_property
+    def shuffled(self) -> OHLCVFrame:
+        return synthetic_frame(self.tickers, self.days, seed=self.seed, shuffle=True)
+
+    @cached_property
+    def csv_path(self) -> str:
+        return write_csv(self.shuffled, os.path.join(self.workdir, "bars.csv"))
+
+    @cached_property
+    def index(self):
+        from core.index import CompanyIndex
+        return CompanyIndex.build(self.shuffled)
+
+    @property
+    def names(self) -> List[str]:
+        return list(self.frame.companies)
+
+
+# ---------- scenarios ----------
+
+@scenario("load")
+def _load(w: Workload):
+    from core.loader import load_frame
+    path = w.csv_path
+    return lambda: load_frame(path)
+
+
+@scenario("sort_by_date")
+def _sort_date(w: Workload):
+    from core.sort_algos import argsort_by_date
+    frame = w.shuffled
+    return lambda: argsort_by_date(frame)
+
+
+@scenario("sort_by_company")
+def _sort_company(w: Workload):
+    from core.sort_algos import argsort_by_company
+    frame = w.shuffled
+    return lambda: argsort_by_company(frame)
+
+
+@scenario("search")
+def _search(w: Workload):
+    from core.search import find_company_block
+    index, frame, names = w.index, w.frame, w.names
+
+    def run():
+        for name in names:
+            index.range(name, "2016-01-01", "2016-12-31")
+            find_company_block(frame, name)
+    return run
+
+
+@scenario("summary")
+def _summary(w: Workload):
+    from core.analytics import average_volume, price_summary
+    blocks = [w.index.block(n) for n in w.names]
+
+    def run():
+        for b in blocks:
+            price_summary(b)
+            average_volume(b)
+    return run
+
+
+@scenario("indicators")
+def _indicators(w: Workload):
+    from core.technical import compute_frame, parse_specs
+    from web.data_live import add_ma_ema
+    blocks = [w.index.block(n) for n in w.names]
+    specs = parse_specs(INDICATORS)
+
+    def run():
+        for b in blocks:
+            add_ma_ema(b)
+            compute_frame(b, specs)
+    return run
+
+
+@scenario("render")
+def _render(w: Workload):
+    try:
+        from viz.candlestick import render_png
+    except ImportError as e:
+        raise Skip(str(e))
+    block = w.index.block(w.names[0])
+    return lambda: render_png(block, "bench", 640, 320)
+
+
+def _client(w: Workload):
+    os.environ.setdefault("WARMUP", "0")
+    os.environ.setdefault("PREFETCH", "0")
+    try:
+        from fastapi.testclient import TestClient
+    except ImportError as e:
+        raise Skip(str(e))
+    import web.server as server
+    server.SAMPLE_CSV = w.csv_path
+    server._csv_cache.update(mtime=None, index=None)
+    return TestClient(server.app)
+
+
+@scenario("api_compare")
+def _api_compare(w: Workload):
+    client = _client(w)
+    t1, t2 = w.names[0], w.names[-1]
+    url = f"/api/compare?t1={t1}&t2={t2}&source=csv&indicators={INDICATORS}"
+
+    def run():
+        r = client.get(url)
+        assert r.status_code == 200, r.text
+    return run
+
+
+@scenario("api_batch")
+def _api_batch(w: Workload):
+    client = _client(w)
+    body = {"tickers": w.names, "source": "csv", "indicators": "rsi"}
+
+    def run():
+        r = client.post("/api/batch", json=body)
+        assert r.status_code == 200 and r.text.count("\n") == len(w.names), r.text[:200]
+    return run
+
+
+@scenario("api_upload")
+def _api_upload(w: Workload):
+    client = _client(w)
+    with open(w.csv_path, "rb") as f:
+        data = f.read()
+
+    def run():
+        r = client.post("/api/upload", files={"file": ("bars.csv", data, "text/csv")})
+        assert r.status_code == 200, r.text
+    return run
+
+
+# ---------- runner ----------
+
+def time_scenario(fn: Callable[[], object], repeat: int) -> dict:
+    fn()   # warm-up: imports, caches, pools
+    runs = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        runs.append(time.perf_counter() - t0)
+    ms = [r * 1000 for r in runs]
+    return {"median_ms": round(statistics.median(ms), 3), "min_ms": round(min(ms), 3),
+            "mean_ms": round(statistics.fmean(ms), 3), "runs": len(ms)}
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(names: List[str], size: str, repeat: int, seed: int = 7) -> dict:
+    tickers, days = SIZES[size]
+    w = Workload(tickers, days, seed)
+    results = {}
+    try:
+        for name in names:
+            try:
+                results[name] = time_scenario(SCENARIOS[name](w), repeat)
+            except Skip as e:
+                results[name] = {"skipped": str(e)}
+            print(f"  {name:<16} {_fmt(results[name])}", file=sys.stderr)
+    finally:
+        from core.batch import shutdown_pool as shutdown_batch_pool
+        from viz.charts import shutdown_pool as shutdown_chart_pool
+        shutdown_batch_pool()
+        shutdown_chart_pool()
+    return {
+        "meta": {
+            "size": size, "tickers": tickers, "days": days, "rows": tickers * days, "seed": seed,
+            "repeat": repeat, "commit": _git_commit(), "python": platform.python_version(),
+            "numpy": np.__version__, "machine": platform.machine(), "cpus": os.cpu_count(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        },
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> List[dict]:
+    """Per scenario: median ratio current / baseline and a verdict."""
+    rows = []
+    for name, cur in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if not base or "median_ms" not in base or "median_ms" not in cur:
+            rows.append({"scenario": name, "status": "new" if not base else "skipped"})
+            continue
+        ratio = cur["median_ms"] / max(base["median_ms"], 1e-9)
+        status = ("regression" if ratio > 1 + threshold
+                  else "improvement" if ratio < 1 / (1 + threshold) else "ok")
+        rows.append({"scenario": name, "baseline_ms": base["median_ms"], "current_ms": cur["median_ms"],
+                     "ratio": round(ratio, 3), "status": status})
+    return rows
+
+
+def _fmt(res: dict) -> str:
+    if "skipped" in res:
+        return f"skipped ({res['skipped']})"
+    return f"median {res['median_ms']:10.2f} ms   min {res['min_ms']:10.2f} ms"
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Synthetic-data benchmark suite")
+    ap.add_argument("--size", choices=sorted(SIZES), default="small")
+    ap.add_argument("--only", default="", help=f"comma-separated subset of: {','.join(SCENARIOS)}")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--out", default="", help="write results JSON here (default: stdout)")
+    ap.add_argument("--baseline", default="", help="results JSON to compare against")
+    ap.add_argument("--threshold", type=float, default=0.15, help="allowed slowdown before flagging (0.15 = 15%%)")
+    args = ap.parse_args(argv)
+
+    names = [n.strip() for n in args.only.split(",") if n.strip()] or list(SCENARIOS)
+    unknown = [n for n in names if n not in SCENARIOS]
+    if unknown:
+        ap.error(f"unknown scenario(s): {', '.join(unknown)}")
+
+    print(f"size={args.size} {SIZES[args.size][0]} tickers x {SIZES[args.size][1]} days", file=sys.stderr)
+    report = run_suite(names, args.size, args.repeat, args.seed)
+    status = 0
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("meta", {}).get("size") != args.size:
+            print(f"warning: baseline size is {baseline.get('meta', {}).get('size')}, not {args.size}", file=sys.stderr)
+        report["comparison"] = rows = compare(report, baseline, args.threshold)
+        for r in rows:
+            if "ratio" in r:
+                print(f"  {r['scenario']:<16} {r['baseline_ms']:10.2f} -> {r['current_ms']:10.2f} ms  "
+                      f"x{r['ratio']:<6} {r['status']}", file=sys.stderr)
+        status = 1 if any(r["status"] == "regression" for r in rows) else 0
+
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+"""
+Deterministic synthetic OHLCV data for the benchmarks.
+
+Prices follow a geometric random walk per ticker; every bar is valid for
+core.loader (positive prices, low <= open/close <= high, integer volume) after
+rounding to 2 decimals. Same arguments + seed -> byte-identical data.
+
+    from benchmarks.synthetic import synthetic_frame, write_csv
+    frame = synthetic_frame(tickers=50, days=500)          # (company, date) order
+    write_csv(frame, "/tmp/bench.csv")
+"""
+import csv
+import os
+from typing import Optional
+import numpy as np
+from core.frame import OHLCVFrame
+
+START = "2015-01-01"
+
+
+def ticker_names(n: int, prefix: str = "SYN") -> list:
+    return [f"{prefix}{i:04d}" for i in range(n)]
+
+
+def _walk(rng: np.random.Generator, shape, start_price) -> tuple:
+    """(open, high, low, close, volume) arrays of `shape` (tickers, bars)."""
+    rets = rng.normal(0.0003, 0.015, shape)
+    close = start_price[:, None] * np.exp(np.cumsum(rets, axis=1))
+    gap = rng.normal(0, 0.004, shape)
+    open_ = np.concatenate([start_price[:, None], close[:, :-1]], axis=1) * np.exp(gap)
+    wick = np.abs(rng.normal(0, 0.006, (2,) + shape))
+    high = np.maximum(open_, close) * (1 + wick[0])
+    low = np.minimum(open_, close) * (1 - wick[1])
+    volume = rng.lognormal(12, 0.8, shape).astype(np.int64)
+    # rounding is monotone, so the OHLC ordering survives it
+    return tuple(np.round(a, 2) for a in (open_, high, low, close)) + (volume,)
+
+
+def synthetic_frame(tickers: int = 50, days: int = 500, start: str = START, seed: int = 7,
+                    shuffle: bool = False) -> OHLCVFrame:
+    """
+    tickers x days business-day bars, sorted by (company, date); shuffle=True
+    returns the same rows in random order (input for the sort benchmarks).
+    """
+    rng = np.random.default_rng(seed)
+    dates = np.busday_offset(np.datetime64(start, "D"), np.arange(days), roll="forward")
+    o, h, l, c, v = _walk(rng, (tickers, days), rng.uniform(50, 3000, tickers))
+    code = np.repeat(np.arange(tickers, dtype=np.int32), days)
+    frame = OHLCVFrame(
+        date=np.tile(dates, tickers), code=code,
+        open=o.ravel(), high=h.ravel(), low=l.ravel(), close=c.ravel(), volume=v.ravel(),
+        companies=ticker_names(tickers),
+    )
+    if shuffle:
+        frame = frame.take(rng.permutation(len(frame)))
+    return frame
+
+
+def synthetic_series(bars: int, ticker: str = "BENCH.NS", seed: int = 7,
+                     step: Optional[np.timedelta64] = None, start: str = START) -> OHLCVFrame:
+    """
+    One ticker, `bars` bars: business days by default, or every `step`
+    (e.g. np.timedelta64(60, "s")) for intraday series.
+    """
+    rng = np.random.default_rng(seed)
+    if step is None:
+        dates = np.busday_offset(np.datetime64(start, "D"), np.arange(bars), roll="forward")
+    else:
+        dates = np.datetime64(start + "T09:15:00", "s") + np.arange(bars) * step
+    o, h, l, c, v = (a[0] for a in _walk(rng, (1, bars), np.array([1000.0])))
+    return OHLCVFrame(date=dates, code=np.zeros(bars, dtype=np.int32),
+                      open=o, high=h, low=l, close=c, volume=v, companies=[ticker])
+
+
+def write_csv(frame: OHLCVFrame, path: str) -> str:
+    """CSV in the loader's format (date,company,open,high,low,close,volume)."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    names = frame.company_names()
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(["date", "company", "open", "high", "low", "close", "volume"])
+        w.writerows(zip(frame.date_strings(), names, *(np.char.mod("%.2f", a) for a in
+                                                        (frame.open, frame.high, frame.low, frame.close)),
+                        frame.volume.tolist()))
+    return path
@@ -1,26 +1,36 @@
-from datetime import datetime
+import argparse
+import asyncio
+import json
 import os
-from core.loader import load_csv
-from core.sort_algos import merge_sort_by_date, merge_sort_by_company
-from core.search import find_company_block
-from viz.candlestick import plot_candles
-from core.analytics import average_volume, price_summary, export_to_csv
+import sys
+from core.loader import load_frame
+from core.frame import OHLCVFrame
+from core.sort_algos import argsort_by_date, argsort_by_company
+from core.index import CompanyIndex
+from core.store import STORE_DIR
+from core.analytics import export_to_csv
 
-# GLOBAL DATA
-DATA = []
-DATA_BY_DATE = []
-DATA_BY_COMPANY = []
+# GLOBAL DATA (columnar frames, see core.frame)
+DATA = OHLCVFrame.empty()
+DATA_BY_DATE = OHLCVFrame.empty()
+DATA_BY_COMPANY = OHLCVFrame.empty()
+INDEX = CompanyIndex(DATA_BY_COMPANY)
 
 def pretty_print(records, n=5):
     for r in records[:n]:
         print(f"{r.date} | {r.company:10} | O:{r.open} H:{r.high} L:{r.low} C:{r.close} V:{r.volume}")
 
 def load_data():
-    global DATA, DATA_BY_DATE, DATA_BY_COMPANY
-    DATA = load_csv("sample_data.csv")
-    DATA_BY_DATE = merge_sort_by_date(DATA)
-    DATA_BY_COMPANY = merge_sort_by_company(DATA)
+    global DATA, DATA_BY_DATE, DATA_BY_COMPANY, INDEX
+    DATA, report = load_frame("sample_data.csv")
+    DATA_BY_DATE = DATA.take(argsort_by_date(DATA))
+    DATA_BY_COMPANY = DATA.take(argsort_by_company(DATA))
+    INDEX = CompanyIndex(DATA_BY_COMPANY)
     print(f"\n✔ Loaded {len(DATA)} records successfully.\n")
+    if report.rejected:
+        print(f"   Skipped {report.rows_rejected} invalid rows: {report.by_reason()}")
+        for r in report.rejected[:5]:
+            print(f"   line {r.line}: {r.message}")
 
 def search_company():
     if not DATA_BY_COMPANY:
@@ -28,7 +38,7 @@ def search_company():
         return
 
     q = input("Enter company ticker: ").strip()
-    block = find_company_block(DATA_BY_COMPANY, q)
+    block = INDEX.block(q)
 
     if not block:
         print("❌ No records found.\n")
@@ -39,10 +49,10 @@ def search_company():
     pretty_print(block, n=5)
 
     print("\n--- ANALYTICS ---")
-    avg_vol = average_volume(block)
-    print(f"Average Volume       : {avg_vol:.2f}")
+    stats = INDEX.summary(q)   # precomputed rollups, no scan of the block
+    print(f"Average Volume       : {stats['avg_volume']:.2f}")
 
-    summary = price_summary(block)
+    summary = stats["summary"]
     print(f"Highest Price        : {summary['highest']}")
     print(f"Lowest Price         : {summary['lowest']}")
     print(f"First Open Price     : {summary['first_open']}")
@@ -58,9 +68,7 @@ def plot_candlestick():
         return
 
     q = input("Enter company for plot: ").strip().upper()
-    block = find_company_block(DATA_BY_COMPANY, q)
-
-    if not block:
+    if q not in INDEX:
         print("❌ No records for this company.")
         return
 
@@ -68,14 +76,8 @@ def plot_candlestick():
     end = input("End date (YYYY-MM-DD or blank): ").strip()
 
     try:
-        filtr = block
-        if start:
-            s = datetime.strptime(start, "%Y-%m-%d").date()
-            filtr = [r for r in filtr if r.date >= s]
-        if end:
-            e = datetime.strptime(end, "%Y-%m-%d").date()
-            filtr = [r for r in filtr if r.date <= e]
-    except:
+        filtr = INDEX.range(q, start, end)
+    except ValueError:
         print("❌ Invalid date format.")
         return
 
@@ -87,6 +89,8 @@ def plot_candlestick():
     os.makedirs("out", exist_ok=True)
     save_path = f"out/candlestick_{company}.png"
 
+    from viz.candlestick import plot_candles   # matplotlib is only needed here
+
     title = f"{company} Candlestick ({filtr[0].date} → {filtr[-1].date})"
     plot_candles(filtr, title=title, save_path=save_path)
     print(f"\n✔ Plot saved to {save_path}\n")
@@ -114,5 +118,337 @@ def menu():
         else:
             print("❌ Invalid choice. Try again.\n")
 
+# ---------- non-interactive subcommands ----------
+
+def _read_tickers(args) -> list:
+    tickers = list(args.tickers)
+    if args.file:
+        f = sys.stdin if args.file == "-" else open(args.file, encoding="utf-8")
+        with f:
+            tickers += [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    return list(dict.fromkeys(t.strip().upper() for t in tickers))
+
+def _frames(args, tickers):
+    """(ticker, frame) pairs from the CSV, history store or live source; live ones as fetches finish."""
+    from core.batch import iter_frames
+
+    if args.source == "live":
+        from web.sources import fetch_ohlc
+        return iter_frames(tickers, lambda t: fetch_ohlc(t, period=args.period, interval=args.interval))
+    if args.source == "store":
+        from core.store import HistoryStore
+        store = HistoryStore(args.store)
+
+        async def stored():
+            for t in tickers:
+                try:
+                    frame = store.read(t, args.interval, getattr(args, "start", None), getattr(args, "end", None))
+                except ValueError:   # not a valid ticker / interval: nothing can be stored under it
+                    frame = OHLCVFrame.empty()
+                yield t, frame
+        return stored()
+
+    frame, _ = load_frame(args.csv)
+    index = CompanyIndex.build(frame)
+
+    async def csv_blocks():
+        for t in tickers:
+            yield t, index.block(t)
+    return csv_blocks()
+
+def batch_command(args):
+    """Analytics for many tickers; prints one JSON line per ticker as each finishes."""
+    from core.batch import analyze_stream, shutdown_pool
+    from core.technical import parse_specs
+
+    tickers = _read_tickers(args)
+    if not tickers:
+        print("❌ No tickers given.", file=sys.stderr)
+        return 2
+    try:
+        specs = parse_specs(args.indicators)
+    except ValueError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 2
+
+    async def run():
+        async for res in analyze_stream(_frames(args, tickers), specs, args.full):
+            print(json.dumps(res), flush=True)
+
+    try:
+        asyncio.run(run())
+    finally:
+        shutdown_pool()
+    return 0
+
+def charts_command(args):
+    """Candlestick PNGs for many tickers through the chart pool + cache."""
+    from core.index import date_range
+    from viz.charts import parse_size, render_chart, shutdown_pool
+
+    tickers = _read_tickers(args)
+    if not tickers:
+        print("❌ No tickers given.", file=sys.stderr)
+        return 2
+    try:
+        size = parse_size(args.size)
+    except ValueError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 2
+    os.makedirs(args.out, exist_ok=True)
+    failed = []
+
+    async def one(ticker, frame):
+        try:
+            frame = date_range(frame, args.start, args.end)
+        except ValueError:
+            failed.append(ticker)
+            print(f"❌ {ticker}: invalid date format", file=sys.stderr)
+            return
+        if not len(frame):
+            failed.append(ticker)
+            print(f"❌ {ticker}: no data", file=sys.stderr)
+            return
+        png, key = await render_chart(ticker, frame, args.start, args.end, size)
+        path = os.path.join(args.out, f"candlestick_{ticker}.png")
+        with open(path, "wb") as f:
+            f.write(png)
+        print(f"✔ {path}  ({key[:12]})", flush=True)
+
+    async def run():
+        jobs = [asyncio.create_task(one(t, frame)) async for t, frame in _frames(args, tickers)]
+        await asyncio.gather(*jobs)
+
+    try:
+        asyncio.run(run())
+    finally:
+        shutdown_pool()
+    return 1 if failed else 0
+
+def ingest_command(args):
+    """Land CSV files in the partitioned history store."""
+    from core.store import HistoryStore
+
+    store = HistoryStore(args.store)
+    for path in args.paths:
+        try:
+            written = store.ingest_csv(path, args.interval)
+        except (OSError, ValueError) as e:
+            print(f"❌ {path}: {e}", file=sys.stderr)
+            return 1
+        print(f"✔ {path}: {sum(written.values())} bars for {len(written)} tickers -> {store.root}")
+    if args.compact:
+        print(f"✔ compacted {store.compact(interval=args.interval)} partitions")
+    return 0
+
+# ---------- streaming file commands (path or '-' = stdin, bounded memory) ----------
+
+def _chunks(args, report=None):
+    from core.loader import iter_chunks
+    from core.pipeline import rows_for_budget, select
+
+    source = sys.stdin.buffer if args.input == "-" else args.input
+    companies = [c for arg in args.company for c in arg.split(",")]
+    chunk_rows = min(args.chunk_rows, rows_for_budget(args.memory_mb))   # a parsed chunk fits the sort budget
+    return select(iter_chunks(source, chunk_rows, report), companies, args.start, args.end)
+
+def _sorter(args, by):
+    from core.pipeline import ExternalSort, rows_for_budget
+
+    return ExternalSort(by, rows_for_budget(args.memory_mb), args.tmpdir, args.chunk_rows)
+
+def _spill_note(sorter):
+    if sorter.spilled_rows:
+        print(f"   sorted {sorter.spilled_rows} rows in {sorter.runs} runs on disk", file=sys.stderr)
+
+def _streaming(fn):
+    """Input errors -> exit 1 with a message; a closed stdout (| head) ends quietly."""
+    def run(args):
+        try:
+            return fn(args)
+        except (OSError, ValueError) as e:
+            if isinstance(e, BrokenPipeError):
+                os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+                return 0
+            print(f"❌ {e}", file=sys.stderr)
+            return 1
+    run.__doc__ = fn.__doc__
+    return run
+
+@_streaming
+def load_command(args):
+    """Parse + validate a CSV stream; prints row counts, companies and date range as JSON."""
+    from core.loader import LoadReport
+
+    report = LoadReport()
+    companies, first, last = set(), None, None
+    for chunk in _chunks(args, report):
+        companies.update(chunk.present_companies())
+        lo, hi = chunk.date.min(), chunk.date.max()
+        first = lo if first is None or lo < first else first
+        last = hi if last is None or hi > last else last
+    print(json.dumps({
+        "input": args.input, "rows_read": report.rows_read, "rows_loaded": report.rows_loaded,
+        "rows_rejected": report.rows_rejected, "rejected_by_reason": report.by_reason(),
+        "companies": len(companies),
+        "first_date": str(first) if first is not None else None,
+        "last_date": str(last) if last is not None else None,
+    }))
+    for r in report.rejected[:args.show_rejected]:
+        print(f"   line {r.line}: {r.message}", file=sys.stderr)
+    return 0
+
+@_streaming
+def query_command(args):
+    """Rows matching --company / --start / --end, optionally sorted, as CSV or NDJSON on stdout."""
+    from core.export import write
+    from core.pipeline import limit, write_ndjson
+
+    chunks = _chunks(args)
+    sorter = None
+    if args.sort != "none":
+        sorter = _sorter(args, args.sort)
+        chunks = sorter.sort(chunks)
+    if args.format == "ndjson":
+        write_ndjson(limit(chunks, args.limit), sys.stdout)
+    else:
+        write(limit(chunks, args.limit), sys.stdout.buffer, "csv")
+    sys.stdout.flush()
+    if sorter is not None:
+        _spill_note(sorter)
+    return 0
+
+@_streaming
+def summary_command(args):
+    """Per-company summary (NDJSON) via an external sort by (company, date)."""
+    from core.pipeline import group_summaries
+
+    sorter = _sorter(args, "company")
+    for company, acc in group_summaries(sorter.sort(_chunks(args))):
+        print(json.dumps({"company": company, "count": acc.count, "avg_volume": acc.average_volume,
+                          "summary": acc.summary()}), flush=args.flush)
+    _spill_note(sorter)
+    return 0
+
+@_streaming
+def export_command(args):
+    """Selected rows sorted by (company, date) into a CSV, gzip-CSV or Parquet file."""
+    from core.export import FormatUnavailable, format_for, write_file
+
+    sorter = _sorter(args, "company")
+    try:
+        n = write_file(sorter.sort(_chunks(args)), args.out, args.format or format_for(args.out))
+    except FormatUnavailable as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 2
+    _spill_note(sorter)
+    print(f"✔ Exported {n} rows to {args.out}")
+    return 0
+
+@_streaming
+def plot_command(args):
+    """Candlestick PNG for one company (only its rows are kept in memory)."""
+    from core.frame import OHLCVFrame
+    from viz.candlestick import plot_candles
+
+    if len(args.company) != 1 or "," in args.company[0]:
+        print("❌ plot needs exactly one --company", file=sys.stderr)
+        return 2
+    frame = OHLCVFrame.concat(list(_chunks(args)))
+    if not len(frame):
+        print("❌ No data for this company / range.", file=sys.stderr)
+        return 1
+    frame = frame.take(argsort_by_date(frame))
+    company = frame.companies[0]
+    out = args.out or os.path.join("out", f"candlestick_{company}.png")
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    plot_candles(frame, title=f"{company} Candlestick ({frame.first_date()} → {frame.last_date()})",
+                 save_path=out, show=False)
+    print(f"✔ Plot saved to {out}")
+    return 0
+
+def _add_input_args(p: argparse.ArgumentParser):
+    from core.loader import CHUNK_ROWS
+    from core.pipeline import MEMORY_MB
+
+    p.add_argument("input", nargs="?", default="-", help="CSV path (date,company,open,high,low,close,volume); '-' = stdin")
+    p.add_argument("--company", action="append", default=[], help="ticker(s), repeatable or comma-separated")
+    p.add_argument("--start", default="", help="YYYY-MM-DD")
+    p.add_argument("--end", default="", help="YYYY-MM-DD")
+    p.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS, help="rows parsed per chunk")
+    p.add_argument("--memory-mb", type=int, default=MEMORY_MB, help="sort budget before spilling runs to disk")
+    p.add_argument("--tmpdir", default=None, help="directory for sort runs (default: system temp)")
+
+def _add_source_args(p: argparse.ArgumentParser):
+    p.add_argument("tickers", nargs="*", help="ticker symbols, e.g. TCS INFY or TCS.NS INFY.NS for --source live")
+    p.add_argument("--file", help="file with one ticker per line ('-' = stdin)")
+    p.add_argument("--source", choices=("csv", "store", "live"), default="csv")
+    p.add_argument("--csv", default="sample_data.csv", help="CSV path for --source csv")
+    p.add_argument("--store", default=STORE_DIR, help="history store directory for --source store")
+    p.add_argument("--period", default="6mo")
+    p.add_argument("--interval", default="1d")
+
+def build_parser() -> argparse.ArgumentParser:
+    ap = argparse.ArgumentParser(prog="python -m cli.main", description="Stock analyzer (no arguments: interactive menu)")
+    sub = ap.add_subparsers(dest="command", required=True)
+
+    b = sub.add_parser("batch", help="price summary, average volume and indicators for many tickers (NDJSON)")
+    _add_source_args(b)
+    b.add_argument("--indicators", default="", help="e.g. rsi,macd:12:26:9,bb:20:2")
+    b.add_argument("--full", action="store_true", help="full indicator series instead of the last values")
+    b.set_defaults(func=batch_command)
+
+    c = sub.add_parser("charts", help="render candlestick PNGs for many tickers (process pool + image cache)")
+    _add_source_args(c)
+    c.add_argument("--start", default="", help="YYYY-MM-DD")
+    c.add_argument("--end", default="", help="YYYY-MM-DD")
+    c.add_argument("--size", default="640x320", help="WIDTHxHEIGHT in pixels")
+    c.add_argument("--out", default=os.path.join("out", "charts"))
+    c.set_defaults(func=charts_command)
+
+    ld = sub.add_parser("load", help="parse and validate a CSV (path or stdin) without keeping it in memory")
+    _add_input_args(ld)
+    ld.add_argument("--show-rejected", type=int, default=5, help="rejected rows to print")
+    ld.set_defaults(func=load_command)
+
+    q = sub.add_parser("query", help="filter (and sort) rows, CSV or NDJSON to stdout")
+    _add_input_args(q)
+    q.add_argument("--sort", choices=("none", "company", "date"), default="none")
+    q.add_argument("--limit", type=int, default=0, help="stop after this many rows (0 = all)")
+    q.add_argument("--format", choices=("csv", "ndjson"), default="csv")
+    q.set_defaults(func=query_command)
+
+    sm = sub.add_parser("summary", help="per-company price summary and average volume (NDJSON), any input size")
+    _add_input_args(sm)
+    sm.add_argument("--flush", action="store_true", help="flush after every company")
+    sm.set_defaults(func=summary_command)
+
+    e = sub.add_parser("export", help="write selected rows, sorted by company and date, to a CSV / gzip-CSV / Parquet file")
+    _add_input_args(e)
+    e.add_argument("--out", default=os.path.join("out", "export.csv"))
+    e.add_argument("--format", choices=("csv", "csv.gz", "parquet"), default=None, help="default: from the --out extension")
+    e.set_defaults(func=export_command)
+
+    pl = sub.add_parser("plot", help="candlestick PNG for one company")
+    _add_input_args(pl)
+    pl.add_argument("--out", default="", help="PNG path (default out/candlestick_<COMPANY>.png)")
+    pl.set_defaults(func=plot_command)
+
+    i = sub.add_parser("ingest", help="load CSV files into the partitioned history store")
+    i.add_argument("paths", nargs="+", help="CSV files (date,company,open,high,low,close,volume)")
+    i.add_argument("--store", default=STORE_DIR)
+    i.add_argument("--interval", default="1d")
+    i.add_argument("--compact", action="store_true", help="merge each partition into one segment afterwards")
+    i.set_defaults(func=ingest_command)
+    return ap
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        menu()
+        return 0
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
 if __name__ == "__main__":
-    menu()
+    sys.exit(main())
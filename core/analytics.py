@@ -1,16 +1,30 @@
-from typing import List
+from typing import List, Union
 from core.models import Record
+from core.frame import OHLCVFrame
 
-def average_volume(records: List[Record]) -> float:
-    if not records:
+Records = Union[List[Record], OHLCVFrame]
+
+def average_volume(records: Records) -> float:
+    if not len(records):
         return 0.0
+    if isinstance(records, OHLCVFrame):
+        return float(records.volume.mean())
     total = sum(r.volume for r in records)
     return total / len(records)
 
-def price_summary(records: List[Record]) -> dict:
-    if not records:
+def price_summary(records: Records) -> dict:
+    if not len(records):
         return {}
 
+    if isinstance(records, OHLCVFrame):
+        # vectorized path: columns are contiguous, no per-row objects
+        return {
+            "highest": float(records.high.max()),
+            "lowest": float(records.low.min()),
+            "first_open": float(records.open[0]),   # after sorting by date
+            "last_close": float(records.close[-1])
+        }
+
     highs = max(r.high for r in records)
     lows  = min(r.low for r in records)
     opens = records[0].open   # after sorting by date
@@ -23,14 +37,10 @@ def price_summary(records: List[Record]) -> dict:
         "last_close": closes
     }
 
-def export_to_csv(records: List[Record], filepath: str):
-    import csv, os
-    os.makedirs(os.path.dirname(filepath), exist_ok=True)
-
-    with open(filepath, "w", newline="", encoding="utf-8") as f:
-        writer = csv.writer(f)
-        writer.writerow(["date","company","open","high","low","close","volume"])
-        for r in records:
-            writer.writerow([r.date, r.company, r.open, r.high, r.low, r.close, r.volume])
+def export_to_csv(records: Records, filepath: str):
+    """Streamed through core.export in chunks, straight from the columns."""
+    from core.export import write_file
 
+    frame = records if isinstance(records, OHLCVFrame) else OHLCVFrame.from_records(records)
+    write_file([frame], filepath, "csv")
     print(f"✔ Exported to {filepath}")
@@ -0,0 +1,198 @@
+import asyncio
+import os
+import sys
+from concurrent.futures import Executor, ProcessPoolExecutor
+from multiprocessing import get_context, shared_memory
+from typing import AsyncIterator, List, Optional, Sequence, Tuple
+import numpy as np
+from .analytics import average_volume, price_summary
+from .frame import OHLCVFrame
+from .indicators import DEFAULT_WINDOWS, ma_ema
+from .technical import IndicatorSpec, compute_frame
+
+# Multi-ticker analytics. Each ticker's columns are copied once into a
+# shared-memory segment; pool workers map the segment and compute on views,
+# so bars are never pickled. Results come back in completion order.
+
+BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", str(min(8, os.cpu_count() or 1))))   # 0 = in-process threads
+_COLUMNS = ("date", "code", "open", "high", "low", "close", "volume")
+_ALIGN = 64
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+# ---------- shared-memory frames ----------
+
+class SharedFrame:
+    """
+    An OHLCVFrame's columns in one shared-memory block.
+    ref() is a small picklable handle; attach(ref) rebuilds the frame on the
+    mapped buffer in another process. The creator close()s (and unlinks) it.
+    """
+
+    def __init__(self, frame: OHLCVFrame):
+        layout, offset = [], 0
+        for name in _COLUMNS:
+            col = getattr(frame, name)
+            layout.append((name, col.dtype.str, offset, len(col)))
+            offset += -(-col.nbytes // _ALIGN) * _ALIGN
+        self.shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        for name, dtype, off, n in layout:
+            np.ndarray(n, dtype=dtype, buffer=self.shm.buf, offset=off)[:] = getattr(frame, name)
+        self.layout = tuple(layout)
+        self.companies = list(frame.companies)
+
+    def ref(self) -> tuple:
+        return (self.shm.name, self.layout, self.companies)
+
+    def close(self) -> None:
+        self.shm.close()
+        self.shm.unlink()
+
+    def __enter__(self) -> "SharedFrame":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def _open_shm(name: str) -> shared_memory.SharedMemory:
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    # older Pythons always register with the resource tracker; pool workers share
+    # the creator's tracker, so the creator's unlink() settles it
+    return shared_memory.SharedMemory(name=name)
+
+
+def attach(ref: tuple) -> Tuple[OHLCVFrame, shared_memory.SharedMemory]:
+    """Frame whose columns are views on the segment; keep the shm open while using it."""
+    name, layout, companies = ref
+    shm = _open_shm(name)
+    cols = {col: np.ndarray(n, dtype=dtype, buffer=shm.buf, offset=off) for col, dtype, off, n in layout}
+    return OHLCVFrame(companies=companies, **cols), shm
+
+
+# ---------- per-ticker analytics ----------
+
+def analyze_frame(ticker: str, frame: OHLCVFrame, specs: Sequence[IndicatorSpec] = (),
+                  full: bool = False, windows: Sequence[int] = DEFAULT_WINDOWS) -> dict:
+    """
+    price_summary + average_volume + MA/EMA + registry indicators for one ticker.
+    Indicator values are the last bar's unless `full` (then whole series + dates).
+    """
+    n = len(frame)
+    out = {"ticker": ticker, "rows": n}
+    if not n:
+        out["error"] = "No data"
+        return out
+    take = None if full else np.array([n - 1])
+    me = ma_ema(frame.close, windows, take=take)
+    inds = compute_frame(frame, specs, take=take)
+    if not full:
+        me = {kind: {w: v[0] for w, v in vals.items()} for kind, vals in me.items()}
+        inds = {label: {k: v[0] for k, v in ind["values"].items()} for label, ind in inds.items()}
+    out.update(
+        first_date=str(frame.date[0]).replace("T", " "),
+        last_date=str(frame.date[-1]).replace("T", " "),
+        avg_volume=average_volume(frame),
+        summary=price_summary(frame),
+        ma=me["ma"], ema=me["ema"],
+    )
+    if specs:
+        out["indicators"] = inds
+    if full:
+        out["dates"] = frame.date_strings()
+    return out
+
+
+def _analyze_shared(ticker: str, ref: tuple, specs, full: bool) -> dict:
+    frame, shm = attach(ref)
+    try:
+        return analyze_frame(ticker, frame, specs, full)
+    finally:
+        del frame   # drop the views before unmapping
+        shm.close()
+
+
+# ---------- pool + streaming ----------
+
+def _executor() -> Optional[Executor]:
+    global _pool
+    if BATCH_WORKERS <= 0:
+        return None
+    if _pool is None:
+        # spawn: the server process runs threads (uvicorn, to_thread fetches); fork would copy their locks
+        _pool = ProcessPoolExecutor(max_workers=BATCH_WORKERS, mp_context=get_context("spawn"))
+    return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+        _pool = None
+
+
+async def _analyze_one(ticker: str, frame: OHLCVFrame, specs, full: bool) -> dict:
+    if not len(frame):
+        return {"ticker": ticker, "rows": 0, "error": "No data"}
+    pool = _executor()
+    try:
+        if pool is None:
+            return await asyncio.to_thread(analyze_frame, ticker, frame, specs, full)
+        with SharedFrame(frame) as shared:
+            fut = pool.submit(_analyze_shared, ticker, shared.ref(), specs, full)
+            return await asyncio.wrap_future(fut)
+    except Exception as e:
+        return {"ticker": ticker, "rows": len(frame), "error": f"{type(e).__name__}: {e}"}
+
+
+async def analyze_stream(items: AsyncIterator[Tuple[str, OHLCVFrame]],
+                         specs: Sequence[IndicatorSpec] = (), full: bool = False) -> AsyncIterator[dict]:
+    """
+    Consume (ticker, frame) pairs as they arrive (e.g. as fetches complete),
+    analyze each in the pool and yield results in completion order.
+    """
+    done: "asyncio.Queue[Optional[dict]]" = asyncio.Queue()   # results; None = no more items
+    tasks: List[asyncio.Task] = []
+    failure: List[BaseException] = []
+
+    async def feed():
+        try:
+            async for ticker, frame in items:
+                t = asyncio.create_task(_analyze_one(ticker, frame, specs, full))
+                t.add_done_callback(lambda t: t.cancelled() or done.put_nowait(t.result()))
+                tasks.append(t)
+        except Exception as e:
+            failure.append(e)
+        finally:
+            done.put_nowait(None)
+
+    feeder = asyncio.create_task(feed())
+    try:
+        fed, yielded = False, 0
+        while not (fed and yielded == len(tasks)):
+            res = await done.get()
+            if res is None:
+                fed = True
+                if failure:
+                    raise failure[0]
+                continue
+            yielded += 1
+            yield res
+    finally:
+        feeder.cancel()
+        for t in tasks:
+            t.cancel()
+
+
+async def iter_frames(tickers: Sequence[str], load) -> AsyncIterator[Tuple[str, OHLCVFrame]]:
+    """Run async load(ticker) -> frame for all tickers concurrently; yield as each finishes."""
+    async def one(t):
+        try:
+            return t, await load(t)
+        except Exception:
+            return t, OHLCVFrame.empty()
+
+    for fut in asyncio.as_completed([one(t) for t in tickers]):
+        yield await fut
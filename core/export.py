@@ -0,0 +1,209 @@
+import csv
+import io
+import os
+import zlib
+from typing import BinaryIO, Iterable, Iterator, Optional, Sequence
+import numpy as np
+from .frame import OHLCVFrame
+from .metrics import stage
+
+# Streaming export of bar frames. encode() turns an iterable of OHLCVFrame
+# chunks into output bytes one chunk at a time, so a response or file never
+# holds more than one encoded chunk:
+#   csv      rows formatted per chunk with csv.writer
+#   csv.gz   the same bytes through one streaming gzip compressor
+#   parquet  row groups of ~CHUNK_ROWS, written from the column arrays (pyarrow)
+# Callers feed views (CompanyIndex.range, HistoryStore.read, pipeline chunks);
+# nothing is turned into per-row dicts or Records first.
+
+COLUMNS = ("date", "company", "open", "high", "low", "close", "volume")
+BAR_COLUMNS = ("date", "open", "high", "low", "close", "volume")   # single-series exports
+CHUNK_ROWS = 50_000
+GZIP_LEVEL = 6
+MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "csv.gz": "application/gzip",
+    "parquet": "application/vnd.apache.parquet",
+}
+FORMATS = tuple(MEDIA_TYPES)
+
+
+class FormatUnavailable(Exception):
+    """A format's optional dependency (pyarrow) is missing; web.serialize raises it too."""
+
+
+def format_for(path: str, default: str = "csv") -> str:
+    """Export format from a file name (.csv / .csv.gz / .parquet)."""
+    name = path.lower()
+    for fmt in sorted(FORMATS, key=len, reverse=True):
+        if name.endswith("." + fmt):
+            return fmt
+    return default
+
+
+def rechunk(frames: Iterable[OHLCVFrame], rows: int = CHUNK_ROWS) -> Iterator[OHLCVFrame]:
+    """Split large frames into views of at most `rows` rows (small ones pass through)."""
+    for frame in frames:
+        for i in range(0, len(frame), rows):
+            yield frame[i:i + rows]
+
+
+def batched(frames: Iterable[OHLCVFrame], rows: int = CHUNK_ROWS) -> Iterator[OHLCVFrame]:
+    """Frames of about `rows` rows: large ones split, small ones (e.g. one per ticker) combined."""
+    pending, held = [], 0
+    for frame in rechunk(frames, rows):
+        pending.append(frame)
+        held += len(frame)
+        if held >= rows:
+            yield OHLCVFrame.concat(pending)
+            pending, held = [], 0
+    if held:
+        yield OHLCVFrame.concat(pending)
+
+
+def _column(frame: OHLCVFrame, name: str) -> list:
+    if name == "date":
+        return frame.date_strings()
+    if name == "company":
+        return frame.company_names().tolist()
+    return getattr(frame, name).tolist()
+
+
+def csv_chunks(frames: Iterable[OHLCVFrame], columns: Sequence[str] = COLUMNS,
+               header: bool = True) -> Iterator[bytes]:
+    buf = io.StringIO()
+    writer = csv.writer(buf, lineterminator="\n")
+    if header:
+        writer.writerow(columns)
+    for frame in rechunk(frames):
+        if not len(frame):
+            continue
+        with stage("export", format="csv"):
+            writer.writerows(zip(*(_column(frame, c) for c in columns)))
+            data = buf.getvalue().encode("utf-8")
+            buf.seek(0)
+            buf.truncate()
+        yield data
+    if buf.tell():   # header only (nothing matched)
+        yield buf.getvalue().encode("utf-8")
+
+
+def gzip_chunks(chunks: Iterable[bytes], level: int = GZIP_LEVEL) -> Iterator[bytes]:
+    z = zlib.compressobj(level, zlib.DEFLATED, 31)   # wbits 31: gzip container
+    for chunk in chunks:
+        out = z.compress(chunk)
+        if out:
+            yield out
+    yield z.flush()
+
+
+class _Spool(io.RawIOBase):
+    """Write-only file that hands out what was written since the last drain()."""
+
+    def __init__(self):
+        self._parts = []
+        self._pos = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        self._parts.append(bytes(b))
+        self._pos += len(b)
+        return len(b)
+
+    def tell(self) -> int:
+        return self._pos
+
+    def drain(self) -> bytes:
+        out, self._parts = b"".join(self._parts), []
+        return out
+
+
+def check_format(fmt: str) -> None:
+    """ValueError for an unknown format, FormatUnavailable when its optional dependency is missing."""
+    if fmt not in MEDIA_TYPES:
+        raise ValueError(f"unknown export format {fmt!r}; expected one of {FORMATS}")
+    if fmt == "parquet":
+        try:
+            import pyarrow.parquet  # noqa: F401
+        except ImportError:
+            raise FormatUnavailable("parquet export needs pyarrow installed")
+
+
+def parquet_chunks(frames: Iterable[OHLCVFrame], columns: Sequence[str] = COLUMNS) -> Iterator[bytes]:
+    check_format("parquet")
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    spool = _Spool()
+    writer = None
+    for frame in batched(frames):   # one row group each
+        if not len(frame):
+            continue
+        with stage("export", format="parquet"):
+            arrays = {}
+            for c in columns:
+                if c == "company":
+                    arrays[c] = pa.DictionaryArray.from_arrays(frame.code, pa.array(frame.companies, pa.string()))
+                elif c == "date" and frame.date.dtype == np.dtype("datetime64[D]"):
+                    arrays[c] = pa.array(frame.date, pa.date32())
+                else:
+                    arrays[c] = pa.array(getattr(frame, c))
+            table = pa.table(arrays)
+            if writer is None:
+                writer = pq.ParquetWriter(spool, table.schema, compression="zstd")
+            writer.write_table(table)
+        yield spool.drain()
+    if writer is None:   # nothing matched: a valid file with the bar schema and no rows
+        writer = pq.ParquetWriter(spool, _empty_schema(columns), compression="zstd")
+    writer.close()
+    yield spool.drain()
+
+
+def _empty_schema(columns: Sequence[str]):
+    import pyarrow as pa
+
+    types = {"date": pa.date32(), "company": pa.dictionary(pa.int32(), pa.string()), "volume": pa.int64()}
+    return pa.schema([(c, types.get(c, pa.float64())) for c in columns])
+
+
+def encode(frames: Iterable[OHLCVFrame], fmt: str = "csv", columns: Sequence[str] = COLUMNS) -> Iterator[bytes]:
+    """Encoded export as a byte-chunk iterator (StreamingResponse body or file writes)."""
+    check_format(fmt)   # fail before the first byte is sent
+    if fmt == "csv":
+        return csv_chunks(frames, columns)
+    if fmt == "csv.gz":
+        return gzip_chunks(csv_chunks(frames, columns))
+    return parquet_chunks(frames, columns)
+
+
+def write(frames: Iterable[OHLCVFrame], out: BinaryIO, fmt: str = "csv",
+          columns: Sequence[str] = COLUMNS) -> int:
+    """Stream an export into a binary file object. Returns rows written."""
+    rows = [0]
+
+    def counted():
+        for frame in frames:
+            rows[0] += len(frame)
+            yield frame
+
+    for data in encode(counted(), fmt, columns):
+        out.write(data)
+    return rows[0]
+
+
+def write_file(frames: Iterable[OHLCVFrame], path: str, fmt: Optional[str] = None,
+               columns: Sequence[str] = COLUMNS) -> int:
+    """Export to `path` (format from the extension unless given); the file appears only when complete."""
+    fmt = fmt or format_for(path)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, "wb") as f:
+            n = write(frames, f, fmt, columns)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return n
@@ -0,0 +1,187 @@
+from datetime import date
+from typing import Iterable, Iterator, List, Optional, Sequence, Union
+import numpy as np
+from .models import Record
+
+# Columnar OHLCV store: one typed contiguous array per field,
+# companies dictionary-encoded (codes -> self.companies).
+
+DATE_DTYPE = "datetime64[D]"
+PRICE_COLUMNS = ("open", "high", "low", "close")
+
+
+class OHLCVFrame:
+    """
+    Array-backed replacement for List[Record].
+    - date    : datetime64[D] (CSV / daily data) or datetime64[s] (intraday bars)
+    - code    : int32, index into `companies` (sorted, so code order == name order)
+    - open/high/low/close : float64
+    - volume  : int64
+    Slicing with a slice object returns a view (no copy).
+    """
+
+    __slots__ = ("date", "code", "open", "high", "low", "close", "volume", "companies", "_lookup")
+
+    def __init__(self, date, code, open, high, low, close, volume, companies: Sequence[str]):
+        date = np.asarray(date)
+        self.date = date if date.dtype.kind == "M" else date.astype(DATE_DTYPE)
+        self.code = np.asarray(code, dtype=np.int32)
+        self.open = np.asarray(open, dtype=np.float64)
+        self.high = np.asarray(high, dtype=np.float64)
+        self.low = np.asarray(low, dtype=np.float64)
+        self.close = np.asarray(close, dtype=np.float64)
+        self.volume = np.asarray(volume, dtype=np.int64)
+        self.companies = list(companies)
+        self._lookup = None
+
+    # ---------- construction ----------
+
+    @classmethod
+    def empty(cls) -> "OHLCVFrame":
+        return cls([], [], [], [], [], [], [], [])
+
+    @classmethod
+    def from_records(cls, records: Iterable[Record]) -> "OHLCVFrame":
+        records = list(records)
+        if not records:
+            return cls.empty()
+        names = np.array([r.company for r in records])
+        companies, codes = np.unique(names, return_inverse=True)
+        return cls(
+            date=np.array([r.date for r in records], dtype=DATE_DTYPE),
+            code=codes,
+            open=np.fromiter((r.open for r in records), np.float64, len(records)),
+            high=np.fromiter((r.high for r in records), np.float64, len(records)),
+            low=np.fromiter((r.low for r in records), np.float64, len(records)),
+            close=np.fromiter((r.close for r in records), np.float64, len(records)),
+            volume=np.fromiter((r.volume for r in records), np.int64, len(records)),
+            companies=companies.tolist(),
+        )
+
+    @classmethod
+    def from_columns(cls, date, company, open, high, low, close, volume) -> "OHLCVFrame":
+        """Build from plain columns; `company` is an array of ticker strings."""
+        companies, codes = np.unique(np.asarray(company, dtype=str), return_inverse=True)
+        return cls(date, codes, open, high, low, close, volume, companies.tolist())
+
+    @classmethod
+    def from_dicts(cls, rows: Sequence[dict], company: str) -> "OHLCVFrame":
+        """Single-company frame from API-shaped dicts {date, open, high, low, close, volume}."""
+        if not rows:
+            return cls.empty()
+        n = len(rows)
+        return cls(
+            date=np.array([r["date"] for r in rows], dtype="datetime64"),
+            code=np.zeros(n, dtype=np.int32),
+            open=np.fromiter((r["open"] for r in rows), np.float64, n),
+            high=np.fromiter((r["high"] for r in rows), np.float64, n),
+            low=np.fromiter((r["low"] for r in rows), np.float64, n),
+            close=np.fromiter((r["close"] for r in rows), np.float64, n),
+            volume=np.fromiter((r["volume"] for r in rows), np.int64, n),
+            companies=[company.strip().upper()],
+        )
+
+    @classmethod
+    def concat(cls, frames: Sequence["OHLCVFrame"]) -> "OHLCVFrame":
+        """Concatenate frames, re-encoding companies into one shared dictionary."""
+        frames = [f for f in frames if len(f)]
+        if not frames:
+            return cls.empty()
+        companies = sorted(set().union(*(f.companies for f in frames)))
+        pos = {c: i for i, c in enumerate(companies)}
+        codes = [np.array([pos[c] for c in f.companies], dtype=np.int32)[f.code] for f in frames]
+        return cls(
+            date=np.concatenate([f.date for f in frames]),
+            code=np.concatenate(codes),
+            open=np.concatenate([f.open for f in frames]),
+            high=np.concatenate([f.high for f in frames]),
+            low=np.concatenate([f.low for f in frames]),
+            close=np.concatenate([f.close for f in frames]),
+            volume=np.concatenate([f.volume for f in frames]),
+            companies=companies,
+        )
+
+    # ---------- sequence protocol ----------
+
+    def __len__(self) -> int:
+        return len(self.date)
+
+    def __getitem__(self, key) -> Union[Record, "OHLCVFrame"]:
+        if isinstance(key, (int, np.integer)):
+            return self.record(int(key))
+        if isinstance(key, slice):
+            return self._derive(lambda col: col[key])
+        return self.take(key)
+
+    def __iter__(self) -> Iterator[Record]:
+        for i in range(len(self)):
+            yield self.record(i)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(getattr(self, c).nbytes for c in ("date", "code", "open", "high", "low", "close", "volume"))
+
+    def __repr__(self) -> str:
+        return f"OHLCVFrame(rows={len(self)}, companies={len(self.companies)})"
+
+    def record(self, i: int) -> Record:
+        return Record(
+            date=self.date[i].item(),
+            company=self.companies[self.code[i]],
+            open=float(self.open[i]), high=float(self.high[i]),
+            low=float(self.low[i]), close=float(self.close[i]),
+            volume=int(self.volume[i]),
+        )
+
+    def to_records(self) -> List[Record]:
+        return list(self)
+
+    def date_strings(self) -> List[str]:
+        """'YYYY-MM-DD' for daily frames, 'YYYY-MM-DD HH:MM:SS' for intraday ones."""
+        out = np.datetime_as_string(self.date).tolist()
+        if self.date.dtype != np.dtype(DATE_DTYPE):
+            out = [d.replace("T", " ") for d in out]
+        return out
+
+    def to_dicts(self) -> List[dict]:
+        """Per-bar dicts in the API shape {date, open, high, low, close, volume}."""
+        return [
+            {"date": d, "open": o, "high": h, "low": l, "close": c, "volume": v}
+            for d, o, h, l, c, v in zip(
+                self.date_strings(), self.open.tolist(), self.high.tolist(),
+                self.low.tolist(), self.close.tolist(), self.volume.tolist(),
+            )
+        ]
+
+    def take(self, indices) -> "OHLCVFrame":
+        """Gather rows by index array / bool mask (copies)."""
+        return self._derive(lambda col: col[indices])
+
+    def _derive(self, fn) -> "OHLCVFrame":
+        out = OHLCVFrame.__new__(OHLCVFrame)
+        out.date, out.code = fn(self.date), fn(self.code)
+        out.open, out.high, out.low, out.close = fn(self.open), fn(self.high), fn(self.low), fn(self.close)
+        out.volume = fn(self.volume)
+        out.companies = self.companies
+        out._lookup = self._lookup
+        return out
+
+    # ---------- company helpers ----------
+
+    def company_code(self, company: str) -> Optional[int]:
+        if self._lookup is None:
+            self._lookup = {c: i for i, c in enumerate(self.companies)}
+        return self._lookup.get(company.strip().upper())
+
+    def company_names(self) -> np.ndarray:
+        """Decoded company column (materializes strings)."""
+        return np.asarray(self.companies, dtype=str)[self.code] if len(self) else np.array([], dtype=str)
+
+    def present_companies(self) -> List[str]:
+        return [self.companies[c] for c in np.unique(self.code)]
+
+    def first_date(self) -> Optional[date]:
+        return self.date[0].item() if len(self) else None
+
+    def last_date(self) -> Optional[date]:
+        return self.date[-1].item() if len(self) else None
@@ -0,0 +1,101 @@
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple, Union
+import numpy as np
+from .frame import OHLCVFrame
+from .rollups import SeriesRollup
+from .sort_algos import argsort_by_company
+
+DateLike = Union[None, str, date, np.datetime64]
+
+
+def _to_day(d: DateLike) -> Optional[np.datetime64]:
+    if d is None or d == "":
+        return None
+    if isinstance(d, str):
+        d = datetime.strptime(d.strip(), "%Y-%m-%d").date()
+    return np.datetime64(d, "D")
+
+
+class CompanyIndex:
+    """
+    Ticker -> (start, end) offset table over a frame sorted by (company, date).
+    Built once at load time; lookups are O(1), date ranges O(log k) via searchsorted.
+    Every query returns a view into the underlying frame (no copies).
+    summary() answers from per-company rollups (built on first use) without
+    scanning the bars.
+    """
+
+    def __init__(self, frame_by_company: OHLCVFrame):
+        self.frame = frame_by_company
+        codes = frame_by_company.code
+        n = len(codes)
+        starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]]) if n else np.empty(0, dtype=np.int64)
+        ends = np.r_[starts[1:], n] if n else starts
+        self._offsets: Dict[str, Tuple[int, int]] = {
+            frame_by_company.companies[codes[s]]: (int(s), int(e)) for s, e in zip(starts, ends)
+        }
+        self._rollups: Dict[str, SeriesRollup] = {}
+
+    @classmethod
+    def build(cls, frame: OHLCVFrame) -> "CompanyIndex":
+        """Sort `frame` by (company, date) and index it."""
+        return cls(frame.take(argsort_by_company(frame)))
+
+    def __contains__(self, company: str) -> bool:
+        return company.strip().upper() in self._offsets
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def companies(self) -> List[str]:
+        return sorted(self._offsets)
+
+    def span(self, company: str) -> Tuple[int, int]:
+        return self._offsets.get(company.strip().upper(), (0, 0))
+
+    def block(self, company: str) -> OHLCVFrame:
+        s, e = self.span(company)
+        return self.frame[s:e]
+
+    def dates(self, company: str) -> np.ndarray:
+        s, e = self.span(company)
+        return self.frame.date[s:e]
+
+    def range(self, company: str, start: DateLike = None, end: DateLike = None) -> OHLCVFrame:
+        """
+        Rows of `company` with start <= date <= end (either bound optional).
+        Dates may be 'YYYY-MM-DD' strings, date objects or datetime64.
+        """
+        return date_range(self.block(company), start, end)
+
+    def rollup(self, company: str) -> SeriesRollup:
+        key = company.strip().upper()
+        r = self._rollups.get(key)
+        if r is None:
+            r = self._rollups[key] = SeriesRollup.from_frame(self.block(key))
+        return r
+
+    def summary(self, company: str, start: DateLike = None, end: DateLike = None) -> dict:
+        """
+        {"count", "avg_volume", "summary"} for `company` over [start, end], same
+        values as core.analytics on range(); O(log n) after the first call.
+        """
+        i, j = day_bounds(self.dates(company), start, end)
+        return self.rollup(company).summary(i, j)
+
+
+def day_bounds(dates: np.ndarray, start: DateLike = None, end: DateLike = None) -> Tuple[int, int]:
+    """
+    [i, j) positions in sorted `dates` with start <= day <= end.
+    Intraday bars count by their day, so `end` includes that whole day.
+    """
+    lo, hi = _to_day(start), _to_day(end)
+    i = int(np.searchsorted(dates, lo, side="left")) if lo is not None else 0
+    j = int(np.searchsorted(dates, hi + np.timedelta64(1, "D"), side="left")) if hi is not None else len(dates)
+    return i, max(i, j)
+
+
+def date_range(frame: OHLCVFrame, start: DateLike = None, end: DateLike = None) -> OHLCVFrame:
+    """View of a date-sorted single-company frame with start <= day <= end."""
+    i, j = day_bounds(frame.date, start, end)
+    return frame[i:j]
@@ -0,0 +1,232 @@
+from typing import Dict, Optional, Sequence
+import numpy as np
+from .metrics import stage
+
+# Moving-average engine.
+# - batch: every SMA/EMA window over a close array in one pass
+# - streaming: rolling state per window, O(1) per appended bar
+# Semantics match pandas: rolling(w, min_periods=1).mean() and ewm(span=w, adjust=False).mean().
+
+DEFAULT_WINDOWS = (5, 10, 20)
+_EMA_BLOCK = 64   # block length for the blocked EMA recurrence
+
+
+def sma_batch(closes: np.ndarray, windows: Sequence[int] = DEFAULT_WINDOWS) -> Dict[int, np.ndarray]:
+    """
+    All SMA windows over one Series; the first w-1 bars average what exists (min_periods=1).
+    Means of 3-4 decimal prices land exactly on rounding ties, so a plain cumsum
+    difference rounds differently from pandas now and then; its compensated
+    rolling kernel is used instead (RollingSMA mirrors it bar by bar).
+    """
+    import pandas as pd
+
+    x = np.asarray(closes, dtype=np.float64)
+    if not len(x):
+        return {w: np.empty(0) for w in windows}
+    s = pd.Series(x, copy=False)
+    return {w: s.rolling(w, min_periods=1).mean().to_numpy() for w in windows}
+
+
+def _linear_recurrence(u: np.ndarray, d: float, y0: float) -> np.ndarray:
+    """
+    y[t] = d * y[t-1] + u[t] with y[-1] = y0, without a per-element Python loop.
+    Blocks of _EMA_BLOCK are solved with one matrix product; the block-end
+    carries form the same recurrence (factor d**_EMA_BLOCK) and are solved recursively.
+    """
+    m = len(u)
+    if not m:
+        return np.empty(0)
+    L = _EMA_BLOCK
+    nblocks = -(-m // L)
+    blocks = np.zeros(nblocks * L)
+    blocks[:m] = u
+    blocks = blocks.reshape(nblocks, L)
+    j = np.arange(L)
+    expo = j[:, None] - j[None, :]
+    kernel = np.where(expo >= 0, d ** np.maximum(expo, 0), 0.0)   # d^(t-k) for k <= t
+    local = blocks @ kernel.T
+    if nblocks == 1:
+        carry_in = np.array([y0])
+    else:
+        carries = _linear_recurrence(local[:-1, -1], d ** L, y0)
+        carry_in = np.concatenate(([y0], carries))
+    y = local + carry_in[:, None] * (d ** (j + 1))[None, :]
+    return y.reshape(-1)[:m]
+
+
+def ewm_batch(x: np.ndarray, alpha: float) -> np.ndarray:
+    """pandas ewm(alpha=alpha, adjust=False).mean() for a NaN-free array."""
+    x = np.asarray(x, dtype=np.float64)
+    if not len(x):
+        return np.empty(0)
+    return np.concatenate(([x[0]], _linear_recurrence(alpha * x[1:], 1.0 - alpha, x[0])))
+
+
+def ema_batch(closes: np.ndarray, windows: Sequence[int] = DEFAULT_WINDOWS) -> Dict[int, np.ndarray]:
+    """EMA with alpha = 2/(w+1) and y0 = x0 (adjust=False), one blocked linear recurrence per window."""
+    x = np.asarray(closes, dtype=np.float64)
+    return {w: ewm_batch(x, 2.0 / (w + 1.0)) for w in windows}
+
+
+def ma_ema(closes: np.ndarray, windows: Sequence[int] = DEFAULT_WINDOWS, decimals: int = 4,
+           take: Optional[np.ndarray] = None) -> dict:
+    """
+    {"ma": {w: [...]}, "ema": {w: [...]}} rounded like the old pandas path.
+    `take` (bar indices) keeps only those bars of the full-length series.
+    """
+    if not len(closes):
+        return {"ma": {}, "ema": {}}
+    with stage("indicators", kind="ma_ema"):
+        ma = sma_batch(closes, windows)
+        ema = ema_batch(closes, windows)
+        pick = (lambda a: a) if take is None else (lambda a: a[take])
+        return {
+            "ma": {w: np.round(pick(ma[w]), decimals).tolist() for w in windows},
+            "ema": {w: np.round(pick(ema[w]), decimals).tolist() for w in windows},
+        }
+
+
+# ---------- streaming state ----------
+
+class RollingSMA:
+    """
+    Ring buffer + running sum. update()/replace_last() are O(1).
+    The sum is kept exactly like pandas' rolling mean (Kahan-compensated adds and
+    removes, a run of identical values returns the value itself), so rounded
+    outputs match the batch path bit for bit.
+    """
+
+    __slots__ = ("window", "buf", "pos", "count", "total", "comp_add", "comp_remove",
+                 "prev_value", "same_run", "_undo")
+
+    def __init__(self, window: int):
+        self.window = window
+        self.buf = [0.0] * window
+        self.pos = -1          # slot of the newest value
+        self.count = 0         # bars seen (divisor is min(count, window))
+        self.total = 0.0
+        self.comp_add = self.comp_remove = 0.0
+        self.prev_value = float("nan")
+        self.same_run = 0
+        self._undo: Optional[tuple] = None
+
+    def update(self, x: float) -> Optional[float]:
+        self._undo = (self.pos, self.buf[(self.pos + 1) % self.window], self.total,
+                      self.comp_add, self.comp_remove, self.prev_value, self.same_run)
+        self.pos = (self.pos + 1) % self.window
+        if self.count >= self.window:
+            y = -self.buf[self.pos] - self.comp_remove
+            t = self.total + y
+            self.comp_remove = t - self.total - y
+            self.total = t
+        y = x - self.comp_add
+        t = self.total + y
+        self.comp_add = t - self.total - y
+        self.total = t
+        self.same_run = self.same_run + 1 if x == self.prev_value else 1
+        self.prev_value = x
+        self.buf[self.pos] = x
+        self.count += 1
+        return self.value
+
+    def replace_last(self, x: float) -> Optional[float]:
+        if self._undo is None:
+            return self.update(x)
+        (self.pos, evicted, self.total, self.comp_add, self.comp_remove,
+         self.prev_value, self.same_run) = self._undo
+        self.buf[(self.pos + 1) % self.window] = evicted
+        self.count -= 1
+        return self.update(x)
+
+    @property
+    def value(self) -> Optional[float]:
+        n = min(self.count, self.window)
+        if not n:
+            return None
+        return self.prev_value if self.same_run >= n else self.total / n
+
+
+class RollingEMA:
+    """Last value (and the one before, so the forming bar can be replaced)."""
+
+    __slots__ = ("window", "alpha", "value", "prev")
+
+    def __init__(self, window: int):
+        self.window = window
+        self.alpha = 2.0 / (window + 1.0)
+        self.value: Optional[float] = None
+        self.prev: Optional[float] = None
+
+    def _step(self, base: Optional[float], x: float) -> float:
+        if base is None:
+            return x
+        # same arithmetic as pandas' adjust=False ewma loop
+        d = 1.0 - self.alpha
+        return x if base == x else (d * base + self.alpha * x) / (d + self.alpha)
+
+    def update(self, x: float) -> float:
+        self.prev = self.value
+        self.value = self._step(self.prev, x)
+        return self.value
+
+    def replace_last(self, x: float) -> float:
+        self.value = self._step(self.prev, x)
+        return self.value
+
+
+class IndicatorState:
+    """SMA + EMA state for every window of one series."""
+
+    def __init__(self, windows: Sequence[int] = DEFAULT_WINDOWS):
+        self.windows = tuple(windows)
+        self.sma = {w: RollingSMA(w) for w in self.windows}
+        self.ema = {w: RollingEMA(w) for w in self.windows}
+
+    @classmethod
+    def from_closes(cls, closes: np.ndarray, windows: Sequence[int] = DEFAULT_WINDOWS) -> "IndicatorState":
+        """
+        Seed from history. EMA state comes from the batch path; the SMA sums are
+        replayed, since the compensation terms depend on every earlier bar.
+        """
+        st = cls(windows)
+        x = np.asarray(closes, dtype=np.float64)
+        if not len(x):
+            return st
+        ema = ema_batch(x, st.windows)
+        values = x.tolist()
+        for w in st.windows:
+            update = st.sma[w].update
+            for v in values:
+                update(v)
+            e = st.ema[w]
+            e.value = float(ema[w][-1])
+            e.prev = float(ema[w][-2]) if len(x) > 1 else None
+        return st
+
+    def advance(self, close: float) -> None:
+        """Append one bar without building the output dict: O(len(windows))."""
+        for w in self.windows:
+            self.sma[w].update(close)
+            self.ema[w].update(close)
+
+    def update(self, close: float) -> dict:
+        """Append one bar: O(len(windows))."""
+        self.advance(close)
+        return self.latest()
+
+    def replace_last(self, close: float) -> dict:
+        """The last bar changed (still forming): O(len(windows))."""
+        for w in self.windows:
+            self.sma[w].replace_last(close)
+            self.ema[w].replace_last(close)
+        return self.latest()
+
+    def latest(self, decimals: int = 4) -> dict:
+        def r(v):
+            # np.round, not round(): same half-way behaviour as the batch/pandas path
+            return None if v is None else float(np.round(v, decimals))
+        return {
+            "ma": {w: r(self.sma[w].value) for w in self.windows},
+            "ema": {w: r(self.ema[w].value) for w in self.windows},
+        }
+
@@ -1,12 +1,21 @@
 import csv
-from typing import List
+import os
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import BinaryIO, Iterator, List, Optional, Tuple, Union
+import numpy as np
 from .models import Record
+from .frame import OHLCVFrame
+from .metrics import stage
+
+REQUIRED_COLUMNS = {"date","company","open","high","low","close","volume"}
+CHUNK_ROWS = 250_000
 
 def load_csv(path: str) -> List[Record]:
     records: List[Record] = []
     with open(path, newline="", encoding="utf-8") as f:
         reader = csv.DictReader(f)
-        required = {"date","company","open","high","low","close","volume"}
+        required = REQUIRED_COLUMNS
         # Normalize fieldnames to lowercase
         fieldnames = [h.lower().strip() for h in (reader.fieldnames or [])]
         if set(fieldnames) != required:
@@ -19,3 +28,162 @@ def load_csv(path: str) -> List[Record]:
             except Exception as e:
                 print(f"[load_csv] Skipping line {i}: {e}")
     return records
+
+
+# ---------- bulk (columnar) ingestion ----------
+
+@dataclass(frozen=True)
+class RejectedRow:
+    line: int      # CSV line number, header is line 1 (same numbering as load_csv)
+    reason: str    # "date" | "number" | "volume" | "negative" | "ohlc"
+    message: str   # same text Record.from_row would raise
+
+@dataclass
+class LoadReport:
+    rows_read: int = 0
+    rows_loaded: int = 0
+    rejected: List[RejectedRow] = field(default_factory=list)
+
+    @property
+    def rows_rejected(self) -> int:
+        return len(self.rejected)
+
+    def by_reason(self) -> dict:
+        out: dict = {}
+        for r in self.rejected:
+            out[r.reason] = out.get(r.reason, 0) + 1
+        return out
+
+
+def load_frame(path: str, chunk_rows: int = CHUNK_ROWS) -> Tuple[OHLCVFrame, LoadReport]:
+    """
+    Bulk loader: parses the CSV in chunks of `chunk_rows` into typed columns and
+    validates each chunk with vectorized masks (same rules as Record.from_row).
+    Returns (frame, report); rejected rows are reported, not printed.
+    """
+    report = LoadReport()
+    with stage("csv_parse"):
+        frame = OHLCVFrame.concat(list(iter_chunks(path, chunk_rows, report)))
+    return frame, report
+
+
+def iter_chunks(source: Union[str, os.PathLike, BinaryIO], chunk_rows: int = CHUNK_ROWS,
+                report: Optional[LoadReport] = None) -> Iterator[OHLCVFrame]:
+    """
+    Validated frames of at most `chunk_rows` rows, parsed as the input is read,
+    from a CSV path or a binary file object (e.g. sys.stdin.buffer). Memory is
+    bounded by one chunk; rejected rows are added to `report`.
+    """
+    report = report if report is not None else LoadReport()
+    f = open(source, "rb") if isinstance(source, (str, os.PathLike)) else source
+    try:   # header problems raise here, not on the first next()
+        header = next(csv.reader([f.readline().decode("utf-8-sig")]), [])
+        columns = [h.lower().strip() for h in header]
+        _check_header(columns)
+    except Exception:
+        if f is not source:
+            f.close()
+        raise
+    return _read_chunks(f, columns, chunk_rows, report, close=f is not source)
+
+
+def _read_chunks(f: BinaryIO, columns: List[str], chunk_rows: int, report: LoadReport,
+                 close: bool) -> Iterator[OHLCVFrame]:
+    import pandas as pd
+
+    try:
+        with pd.read_csv(f, dtype=str, keep_default_na=False, header=None, names=columns,
+                         chunksize=chunk_rows, encoding="utf-8") as chunks:
+            for chunk in chunks:
+                line0 = report.rows_read + 2   # header is line 1
+                report.rows_read += len(chunk)
+                frame = _validate_chunk(chunk, line0, report)
+                report.rows_loaded += len(frame)
+                yield frame
+    finally:
+        if close:
+            f.close()
+
+
+def _check_header(columns) -> None:
+    if set(columns) != REQUIRED_COLUMNS:
+        raise ValueError(f"CSV header must be exactly: {sorted(REQUIRED_COLUMNS)}")
+
+
+def _validate_chunk(chunk, line0: int, report: LoadReport) -> OHLCVFrame:
+    import pandas as pd
+
+    n = len(chunk)
+    col = {c: chunk[c].fillna("").str.strip() for c in REQUIRED_COLUMNS}
+    reason = np.full(n, "", dtype=object)
+    message = np.full(n, "", dtype=object)
+
+    def reject(mask, why, msgs):
+        # keep only the first failure per row, like the sequential checks in from_row
+        mask = mask & (reason == "")
+        reason[mask] = why
+        message[mask] = msgs[mask] if isinstance(msgs, np.ndarray) else msgs
+
+    # date: vectorized parse, strptime only for rows pandas could not parse
+    parsed = pd.to_datetime(col["date"], format="%Y-%m-%d", errors="coerce")
+    dates = parsed.to_numpy().astype("datetime64[D]")
+    bad = np.isnat(dates)
+    date_err = np.full(n, "", dtype=object)
+    for i in np.flatnonzero(bad):
+        try:
+            dates[i] = np.datetime64(datetime.strptime(col["date"].iat[i], "%Y-%m-%d").date(), "D")
+            bad[i] = False
+        except ValueError as e:
+            date_err[i] = str(e)
+    reject(bad, "date", date_err)
+
+    # prices: to_numeric, python float() only where the fast path gave NaN
+    prices = {}
+    for name in ("open", "high", "low", "close"):
+        vals = np.array(pd.to_numeric(col[name], errors="coerce"), dtype=np.float64)
+        err = np.full(n, "", dtype=object)
+        bad = np.zeros(n, dtype=bool)
+        for i in np.flatnonzero(np.isnan(vals)):
+            try:
+                vals[i] = float(col[name].iat[i])
+            except ValueError as e:
+                bad[i] = True
+                err[i] = str(e)
+        reject(bad, "number", err)
+        prices[name] = vals
+
+    # volume: plain integer literals vectorized, the rest through int()
+    vol_s = col["volume"]
+    simple = vol_s.str.fullmatch(r"[+-]?[0-9]{1,18}").to_numpy(dtype=bool)
+    volume = np.zeros(n, dtype=np.int64)
+    volume[simple] = vol_s[simple].astype(np.int64).to_numpy()
+    err = np.full(n, "", dtype=object)
+    bad = np.zeros(n, dtype=bool)
+    for i in np.flatnonzero(~simple):
+        try:
+            v = int(vol_s.iat[i])
+            if not -2**63 <= v < 2**63:
+                raise ValueError(f"volume out of range: {v}")
+            volume[i] = v
+        except ValueError as e:
+            bad[i] = True
+            err[i] = str(e)
+    reject(bad, "volume", err)
+
+    o, h, l, c = prices["open"], prices["high"], prices["low"], prices["close"]
+    with np.errstate(invalid="ignore"):
+        negative = (o < 0) | (h < 0) | (l < 0) | (c < 0) | (volume < 0)
+        # NaN fails every comparison, so ~(...) rejects it just like from_row
+        ohlc = (l > h) | ~((l <= o) & (o <= h)) | ~((l <= c) & (c <= h))
+    reject(negative, "negative", "Negative price/volume not allowed.")
+    reject(ohlc, "ohlc", "OHLC consistency failed.")
+
+    ok = reason == ""
+    for i in np.flatnonzero(~ok):
+        report.rejected.append(RejectedRow(line=line0 + int(i), reason=reason[i], message=message[i]))
+
+    return OHLCVFrame.from_columns(
+        date=dates[ok],
+        company=col["company"].str.upper().to_numpy(dtype=str)[ok],
+        open=o[ok], high=h[ok], low=l[ok], close=c[ok], volume=volume[ok],
+    )
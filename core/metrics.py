@@ -0,0 +1,236 @@
+import contextvars
+import sys
+import threading
+import time
+from collections import Counter as _Tally
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+# In-process metrics: counters, histograms and stage timers, rendered in the
+# Prometheus text exposition format. Everything is thread-safe (upstream
+# fetches and CSV parsing run in worker threads).
+#
+#   with stage("csv_parse"): ...            -> stage_seconds{stage="csv_parse"}
+#   UPSTREAM_CALLS.inc(source="yf", outcome="ok")
+#   register_collector(fn)                   -> values read at scrape time (cache stats, ...)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+Sample = Tuple[str, Dict[str, str], float]          # (name suffix, labels, value)
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _key(labels: Dict[str, str]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _fmt_labels(labels: Iterable[Tuple[str, str]]) -> str:
+    parts = []
+    for k, v in labels:
+        v = v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        parts.append(f'{k}="{v}"')
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _fmt_value(v: float) -> str:
+    if v == float("inf"):
+        return "+Inf"
+    return repr(float(v)) if not float(v).is_integer() else str(int(v))
+
+
+class Counter:
+    def __init__(self, name: str, doc: str):
+        self.name, self.doc, self.kind = name, doc, "counter"
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        k = _key(labels)
+        with self._lock:
+            self._values[k] = self._values.get(k, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(_key(labels), 0.0)
+
+    def samples(self) -> List[Sample]:
+        with self._lock:
+            return [("_total", dict(k), v) for k, v in self._values.items()]
+
+
+class Histogram:
+    def __init__(self, name: str, doc: str, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name, self.doc, self.kind = name, doc, "histogram"
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[LabelKey, List[float]] = {}   # per label set: bucket counts..., sum, count
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        k = _key(labels)
+        with self._lock:
+            s = self._series.get(k)
+            if s is None:
+                s = self._series[k] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    s[i] += 1
+            s[-2] += value
+            s[-1] += 1
+
+    def count(self, **labels) -> float:
+        s = self._series.get(_key(labels))
+        return s[-1] if s else 0.0
+
+    def samples(self) -> List[Sample]:
+        out: List[Sample] = []
+        with self._lock:
+            for k, s in self._series.items():
+                labels = dict(k)
+                for bound, n in zip(self.buckets, s):
+                    out.append(("_bucket", {**labels, "le": _fmt_value(bound)}, n))
+                out.append(("_bucket", {**labels, "le": "+Inf"}, s[-1]))
+                out.append(("_sum", labels, s[-2]))
+                out.append(("_count", labels, s[-1]))
+        return out
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._collectors: List[Callable[[], Iterable[Tuple[str, str, str, List[Sample]]]]] = []
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, doc: str) -> Counter:
+        return self._get(name, lambda: Counter(name, doc))
+
+    def histogram(self, name: str, doc: str, buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get(name, lambda: Histogram(name, doc, buckets))
+
+    def _get(self, name, make):
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = make()
+            return self._metrics[name]
+
+    def register_collector(self, fn: Callable[[], Iterable[Tuple[str, str, str, List[Sample]]]]) -> None:
+        """fn() -> [(name, "gauge"|"counter", doc, [(suffix, labels, value), ...]), ...] at scrape time."""
+        self._collectors.append(fn)
+
+    def render(self) -> str:
+        families = [(m.name, m.kind, m.doc, m.samples()) for m in list(self._metrics.values())]
+        for fn in self._collectors:
+            try:
+                families.extend(fn())
+            except Exception:
+                continue   # a broken collector must not take /metrics down
+        lines = []
+        for name, kind, doc, samples in families:
+            lines.append(f"# HELP {name} {doc}")
+            lines.append(f"# TYPE {name} {kind}")
+            for suffix, labels, value in samples:
+                lines.append(f"{name}{suffix}{_fmt_labels(sorted(labels.items()))} {_fmt_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+REQUEST_SECONDS = REGISTRY.histogram("http_request_duration_seconds", "HTTP request latency by route")
+STAGE_SECONDS = REGISTRY.histogram("stage_seconds", "Time spent in hot-path stages")
+UPSTREAM_CALLS = REGISTRY.counter("upstream_calls", "Upstream market-data calls by source and outcome")
+
+# stages timed during the current request (set by the web middleware in ?profile=1 mode)
+_request_stages: contextvars.ContextVar[Optional[list]] = contextvars.ContextVar("request_stages", default=None)
+
+
+@contextmanager
+def stage(name: str, **labels) -> Iterator[None]:
+    """Time a block into stage_seconds{stage=name, ...}."""
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        dt = time.perf_counter() - t0
+        STAGE_SECONDS.observe(dt, stage=name, **labels)
+        trace = _request_stages.get()
+        if trace is not None:
+            trace.append((name, dt))
+
+
+@contextmanager
+def trace_stages() -> Iterator[list]:
+    """Collect (stage, seconds) for everything timed in this context (threads included via to_thread)."""
+    trace: list = []
+    token = _request_stages.set(trace)
+    try:
+        yield trace
+    finally:
+        _request_stages.reset(token)
+
+
+# ---------- sampling profiler ----------
+
+class SamplingProfiler:
+    """
+    Samples the Python stacks of all threads every `interval` seconds from a
+    background thread. Only stacks passing through `roots` (path prefixes,
+    e.g. the project directory) are kept, so idle pool threads do not count.
+    Everything else running in the process is sampled too: to profile one
+    request, run it on an otherwise idle instance.
+    """
+
+    def __init__(self, roots: Sequence[str], interval: float = 0.001, max_depth: int = 64):
+        self.roots = tuple(roots)
+        self.interval = interval
+        self.max_depth = max_depth
+        self.samples = 0
+        self.self_counts: _Tally = _Tally()
+        self.total_counts: _Tally = _Tally()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __enter__(self) -> "SamplingProfiler":
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for tid, frame in sys._current_frames().items():
+                if tid != me:
+                    self._sample(frame)
+
+    def _sample(self, frame) -> None:
+        stack = []
+        while frame is not None and len(stack) < self.max_depth:
+            code = frame.f_code
+            stack.append((code.co_filename, code.co_name, frame.f_lineno))
+            frame = frame.f_back
+        if not any(f.startswith(self.roots) for f, _, _ in stack):
+            return
+        self.samples += 1
+        top = stack[0]
+        self.self_counts[f"{self._short(top[0])}:{top[2]} {top[1]}"] += 1
+        for fn in {f"{self._short(f)} {name}" for f, name, _ in stack}:
+            self.total_counts[fn] += 1
+
+    def _short(self, filename: str) -> str:
+        for root in self.roots:
+            if filename.startswith(root):
+                return filename[len(root):].lstrip("/\\")
+        return filename
+
+    def report(self, top: int = 25) -> dict:
+        n = max(self.samples, 1)
+
+        def rows(counts):
+            return [{"where": k, "samples": v, "pct": round(100.0 * v / n, 1)} for k, v in counts.most_common(top)]
+        return {
+            "samples": self.samples,
+            "interval_ms": self.interval * 1000,
+            "self": rows(self.self_counts),
+            "cumulative": rows(self.total_counts),
+        }
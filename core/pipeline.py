@@ -0,0 +1,247 @@
+import json
+import os
+import shutil
+import tempfile
+from typing import IO, Iterable, Iterator, List, Optional, Sequence, Tuple
+import numpy as np
+from .export import COLUMNS
+from .frame import OHLCVFrame
+from .index import _to_day
+from .metrics import stage
+from .sort_algos import argsort_by_company, argsort_by_date
+from .streaming import RunningSummary
+
+# Chunked pipeline stages for inputs larger than memory. Every stage is a
+# generator over OHLCVFrame chunks (core.loader.iter_chunks produces them), so
+# a pipeline holds a few chunks at a time:
+#   iter_chunks(path) -> select(...) -> ExternalSort(by).sort(...) -> group_summaries(...)
+# ExternalSort keeps up to `memory_rows` rows. Each full run is sorted and spilled
+# to a temporary .npy file, and the runs are then k-way merged in blocks through
+# memory maps.
+
+SORT_KEYS = ("company", "date")
+ROW_BYTES = 160          # columns + key + argsort scratch per row, roughly; for --memory-mb
+MEMORY_MB = int(os.getenv("SORT_MEMORY_MB", "256"))
+
+
+def rows_for_budget(memory_mb: int = MEMORY_MB) -> int:
+    return max(10_000, memory_mb * 2**20 // ROW_BYTES)
+
+
+def select(chunks: Iterable[OHLCVFrame], companies: Sequence[str] = (), start=None,
+           end=None) -> Iterator[OHLCVFrame]:
+    """Rows of `companies` (all when empty) with start <= date <= end."""
+    wanted = {c.strip().upper() for c in companies if c.strip()}
+    lo, hi = _to_day(start), _to_day(end)   # ValueError on a bad date, before any input is read
+    return _select(chunks, wanted, lo, hi)
+
+
+def _select(chunks: Iterable[OHLCVFrame], wanted: set, lo, hi) -> Iterator[OHLCVFrame]:
+    for chunk in chunks:
+        mask = np.ones(len(chunk), dtype=bool)
+        if wanted:
+            mask &= np.isin(chunk.code, [i for i, c in enumerate(chunk.companies) if c in wanted])
+        if lo is not None:
+            mask &= chunk.date >= lo.astype(chunk.date.dtype)
+        if hi is not None:
+            mask &= chunk.date < (hi + np.timedelta64(1, "D")).astype(chunk.date.dtype)
+        if mask.any():
+            yield chunk if mask.all() else chunk.take(mask)
+
+
+# ---------- external sort ----------
+
+def _rows(frame: OHLCVFrame) -> np.ndarray:
+    """Frame -> structured array with the company decoded (a spill file is self-contained)."""
+    names = frame.company_names()
+    rows = np.empty(len(frame), dtype=[("date", frame.date.dtype), ("company", names.dtype),
+                                       ("open", "<f8"), ("high", "<f8"), ("low", "<f8"),
+                                       ("close", "<f8"), ("volume", "<i8")])
+    rows["date"], rows["company"] = frame.date, names
+    for f in ("open", "high", "low", "close", "volume"):
+        rows[f] = getattr(frame, f)
+    return rows
+
+
+def _frame(cols: dict) -> OHLCVFrame:
+    return OHLCVFrame.from_columns(**{f: cols[f] for f in COLUMNS})
+
+
+class ExternalSort:
+    """
+    Stable sort of a chunk stream by (company, date) or (date, company) in
+    bounded memory. Yields sorted chunks of at most `chunk_rows` rows.
+    `runs` / `spilled_rows` tell afterwards whether the input went to disk.
+    """
+
+    def __init__(self, by: str = "company", memory_rows: Optional[int] = None,
+                 tmpdir: Optional[str] = None, chunk_rows: int = 250_000):
+        if by not in SORT_KEYS:
+            raise ValueError(f"sort key must be one of {SORT_KEYS}")
+        self.by = by
+        self.memory_rows = memory_rows or rows_for_budget()
+        self.tmpdir = tmpdir
+        self.chunk_rows = chunk_rows
+        self.runs = self.spilled_rows = 0
+
+    def _sorted(self, frame: OHLCVFrame) -> OHLCVFrame:
+        order = argsort_by_company(frame) if self.by == "company" else argsort_by_date(frame)
+        return frame.take(order)
+
+    def _keys(self, rows) -> Tuple[np.ndarray, np.ndarray]:
+        return (rows["company"], rows["date"]) if self.by == "company" else (rows["date"], rows["company"])
+
+    def sort(self, chunks: Iterable[OHLCVFrame]) -> Iterator[OHLCVFrame]:
+        workdir = None
+        paths: List[str] = []
+        pending: List[OHLCVFrame] = []
+        held = 0
+        try:
+            for chunk in chunks:
+                pending.append(chunk)
+                held += len(chunk)
+                if held >= self.memory_rows:
+                    if workdir is None:
+                        workdir = tempfile.mkdtemp(prefix="sort_", dir=self.tmpdir)
+                    paths.append(self._spill(OHLCVFrame.concat(pending), workdir, len(paths)))
+                    pending, held = [], 0
+            if not paths:   # fits in memory: no disk at all
+                self.runs = 1 if held else 0
+                frame = self._sorted(OHLCVFrame.concat(pending))
+                for i in range(0, len(frame), self.chunk_rows):
+                    yield frame[i:i + self.chunk_rows]
+                return
+            if held:
+                paths.append(self._spill(OHLCVFrame.concat(pending), workdir, len(paths)))
+            pending = []
+            yield from self._merge(paths)
+        finally:
+            if workdir is not None:
+                shutil.rmtree(workdir, ignore_errors=True)
+
+    def _spill(self, frame: OHLCVFrame, workdir: str, n: int) -> str:
+        path = os.path.join(workdir, f"run{n:05d}.npy")
+        with stage("sort_spill", key=self.by):
+            np.save(path, _rows(self._sorted(frame)), allow_pickle=False)
+        self.runs += 1
+        self.spilled_rows += len(frame)
+        return path
+
+    def _merge(self, paths: Sequence[str]) -> Iterator[OHLCVFrame]:
+        """
+        Blocked k-way merge: take a block from every run and merge on (key, run
+        index), which orders ties by run and so keeps them in input order (runs
+        hold consecutive input and are sorted stably). Everything up to the
+        smallest (last key, run) among blocks that do not end their run is final,
+        so it is merged (one stable lexsort) and emitted.
+        """
+        runs = [np.load(p, mmap_mode="r") for p in paths]
+        block = max(1024, self.memory_rows // (2 * len(runs)))
+        bufs = [np.array(run[:block]) for run in runs]   # unmerged rows of each run's current block
+        read = [len(b) for b in bufs]                     # rows of each run read so far
+        out: List[dict] = []
+        out_rows = 0
+        while True:
+            for r, run in enumerate(runs):
+                if not len(bufs[r]) and read[r] < len(run):
+                    bufs[r] = np.array(run[read[r]:read[r] + block])
+                    read[r] += len(bufs[r])
+            live = [(r, b) for r, b in enumerate(bufs) if len(b)]
+            if not live:
+                break
+            bounds = [(self._keys(b)[0][-1], self._keys(b)[1][-1], r) for r, b in live if read[r] < len(runs[r])]
+            parts = self._take(live, min(bounds) if bounds else None)
+            for r, b in parts:
+                bufs[r] = bufs[r][len(b):]
+            parts = [b for _, b in parts]
+            cols = {f: np.concatenate([p[f] for p in parts]) for f in COLUMNS}
+            primary, secondary = self._keys(cols)
+            order = np.lexsort((secondary, primary))   # stable: ties keep run (= input) order
+            out.append({f: v[order] for f, v in cols.items()})
+            out_rows += len(order)
+            if out_rows >= self.chunk_rows:
+                yield from self._emit(out)
+                out, out_rows = [], 0
+        if out:
+            yield from self._emit(out)
+
+    def _take(self, live, bound) -> List[Tuple[int, np.ndarray]]:
+        # rows with (key, run) <= bound. The bounding run always gives up its whole
+        # block (progress); rows equal to the bound key in later runs wait until
+        # that run has no more of them, earlier runs have shown all of theirs.
+        out = []
+        for r, b in live:
+            if bound is None:
+                take = len(b)
+            else:
+                p, s = self._keys(b)
+                key_p, key_s, key_run = bound
+                below = (p < key_p) | ((p == key_p) & (s < key_s))
+                if r <= key_run:
+                    below |= (p == key_p) & (s == key_s)
+                take = int(np.count_nonzero(below))
+            if take:
+                out.append((r, b[:take]))
+        return out
+
+    def _emit(self, parts: List[dict]) -> Iterator[OHLCVFrame]:
+        cols = {f: np.concatenate([p[f] for p in parts]) for f in COLUMNS}
+        n = len(cols["date"])
+        for i in range(0, n, self.chunk_rows):
+            yield _frame({f: v[i:i + self.chunk_rows] for f, v in cols.items()})
+
+
+# ---------- group-by ----------
+
+def group_summaries(chunks: Iterable[OHLCVFrame]) -> Iterator[Tuple[str, RunningSummary]]:
+    """
+    (company, RunningSummary) per company over chunks sorted by (company, date),
+    each yielded as soon as the company's last row has gone by.
+    """
+    current: Optional[str] = None
+    acc = RunningSummary()
+    for chunk in chunks:
+        if not len(chunk):
+            continue
+        code = chunk.code
+        starts = np.flatnonzero(np.r_[True, code[1:] != code[:-1]])
+        ends = np.r_[starts[1:], len(chunk)]
+        highs = np.maximum.reduceat(chunk.high, starts)
+        lows = np.minimum.reduceat(chunk.low, starts)
+        volumes = np.add.reduceat(chunk.volume, starts)
+        for k, (s, e) in enumerate(zip(starts.tolist(), ends.tolist())):
+            name = chunk.companies[code[s]]
+            if name != current:
+                if current is not None:
+                    yield current, acc
+                current, acc = name, RunningSummary()
+            acc.update_block(float(chunk.open[s]), float(highs[k]), float(lows[k]),
+                             float(chunk.close[e - 1]), int(volumes[k]), e - s)
+    if current is not None:
+        yield current, acc
+
+
+# ---------- output ----------
+
+def write_ndjson(chunks: Iterable[OHLCVFrame], out: IO[str]) -> int:
+    """One JSON object per row ({date, company, open, high, low, close, volume}). Returns rows written."""
+    n = 0
+    for chunk in chunks:
+        for row in zip(chunk.date_strings(), chunk.company_names().tolist(), chunk.open.tolist(),
+                       chunk.high.tolist(), chunk.low.tolist(), chunk.close.tolist(), chunk.volume.tolist()):
+            out.write(json.dumps(dict(zip(COLUMNS, row))) + "\n")
+        n += len(chunk)
+    return n
+
+
+def limit(chunks: Iterable[OHLCVFrame], n: int) -> Iterator[OHLCVFrame]:
+    """The first `n` rows (n <= 0: all); stops reading the input once they are out."""
+    if n <= 0:
+        yield from chunks
+        return
+    for chunk in chunks:
+        if len(chunk) >= n:
+            yield chunk[:n]
+            return
+        n -= len(chunk)
+        yield chunk
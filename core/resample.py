@@ -0,0 +1,169 @@
+import re
+from typing import NamedTuple, Optional, Tuple
+import numpy as np
+from .frame import DATE_DTYPE, OHLCVFrame
+
+# Server-side reduction of OHLCV series before serialization.
+# - resample(frame, "1w"): aggregate bars into calendar buckets
+#   (first open, max high, min low, last close, summed volume)
+# - lttb_indices(y, n): pick at most n representative bars (Largest-Triangle-Three-Buckets)
+# Both work on the column arrays; no per-bar Python loop.
+
+_RULE_RE = re.compile(r"^(\d*)\s*(min|m|h|d|wk|w|mo|q|y)$")
+_UNITS = {"min": "m", "m": "m", "h": "h", "d": "D", "wk": "W", "w": "W", "mo": "M", "q": "M", "y": "Y"}
+_EPOCH_WEEKDAY_SHIFT = 3   # 1970-01-01 was a Thursday; +3 days puts week starts on Monday
+
+
+class Rule(NamedTuple):
+    n: int
+    unit: str      # numpy datetime unit: m, h, D, W (Monday weeks), M, Y
+
+    @property
+    def intraday(self) -> bool:
+        return self.unit in ("m", "h")
+
+
+def parse_rule(rule: str) -> Rule:
+    """
+    '15m', '1h', '1d', '1w' / '1wk', '1mo', '1q', '1y' -> Rule.
+    Raises ValueError on anything else.
+    """
+    m = _RULE_RE.match((rule or "").strip().lower())
+    if not m:
+        raise ValueError(f"Invalid resample rule '{rule}'. Use e.g. 15m, 1h, 1d, 1w, 1mo, 1q, 1y")
+    n = int(m.group(1) or 1)
+    if n < 1:
+        raise ValueError("Resample rule count must be >= 1")
+    unit = m.group(2)
+    return Rule(n * 3 if unit == "q" else n, _UNITS[unit])
+
+
+def bucket_keys(dates: np.ndarray, rule: Rule) -> np.ndarray:
+    """int64 bucket id per timestamp; equal ids share a bucket."""
+    if rule.unit == "W":
+        days = dates.astype("datetime64[D]").astype(np.int64)
+        return (days + _EPOCH_WEEKDAY_SHIFT) // (7 * rule.n)
+    return dates.astype(f"datetime64[{rule.unit}]").astype(np.int64) // rule.n
+
+
+def bucket_start(keys: np.ndarray, rule: Rule, dtype) -> np.ndarray:
+    """First instant of each bucket, as `dtype` (the frame's date dtype)."""
+    keys = np.asarray(keys, dtype=np.int64)
+    if rule.unit == "W":
+        start = (keys * 7 * rule.n - _EPOCH_WEEKDAY_SHIFT).astype("datetime64[D]")
+    else:
+        start = (keys * rule.n).astype(f"datetime64[{rule.unit}]")
+    return start.astype(dtype)
+
+
+def resample(frame: OHLCVFrame, rule) -> OHLCVFrame:
+    """
+    Aggregate a frame sorted by (company, date) into buckets of `rule`
+    (str or Rule). Each output bar is labelled with its bucket start; daily and
+    coarser rules give a daily-dtype frame.
+    """
+    if isinstance(rule, str):
+        rule = parse_rule(rule)
+    if not len(frame):
+        return frame
+    keys = bucket_keys(frame.date, rule)
+    change = (keys[1:] != keys[:-1]) | (frame.code[1:] != frame.code[:-1])
+    starts = np.flatnonzero(np.r_[True, change])
+    ends = np.r_[starts[1:], len(frame)] - 1
+    dtype = frame.date.dtype if rule.intraday else np.dtype(DATE_DTYPE)
+    return OHLCVFrame(
+        date=bucket_start(keys[starts], rule, dtype),
+        code=frame.code[starts],
+        open=frame.open[starts],
+        high=np.maximum.reduceat(frame.high, starts),
+        low=np.minimum.reduceat(frame.low, starts),
+        close=frame.close[ends],
+        volume=np.add.reduceat(frame.volume, starts),
+        companies=frame.companies,
+    )
+
+
+def lttb_indices(y: np.ndarray, n_out: int, x: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Indices of at most `n_out` points of y (x defaults to the bar position, so
+    overnight / weekend gaps do not skew the selection). First and last points
+    are always kept.
+    Vectorized LTTB: the interior is split into n_out-2 equal buckets and each
+    keeps its point forming the largest triangle with the previous bucket's
+    average and the next bucket's average (classic LTTB anchors on the point
+    picked in the previous bucket, which makes it a sequential loop).
+    """
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if n_out >= n or n <= 2:
+        return np.arange(n)
+    if n_out < 3:
+        return np.array([0, n - 1])[:max(n_out, 1)]
+    x = np.arange(n, dtype=np.float64) if x is None else np.asarray(x, dtype=np.float64)
+
+    nb = n_out - 2
+    edges = np.floor(np.linspace(1, n - 1, nb + 1)).astype(np.int64)   # interior points 1..n-2
+    starts = edges[:-1]
+    counts = np.diff(edges)
+    sx = np.add.reduceat(x[1:n - 1], starts - 1)
+    sy = np.add.reduceat(y[1:n - 1], starts - 1)
+    mx, my = sx / counts, sy / counts
+
+    # anchors: a = previous bucket average (first point for bucket 0), c = next bucket average (last point at the end)
+    ax, ay = np.r_[x[0], mx[:-1]], np.r_[y[0], my[:-1]]
+    cx, cy = np.r_[mx[1:], x[-1]], np.r_[my[1:], y[-1]]
+    bucket = np.repeat(np.arange(nb), counts)
+    px, py = x[1:n - 1], y[1:n - 1]
+    area = np.abs((ax[bucket] - cx[bucket]) * (py - ay[bucket]) - (ax[bucket] - px) * (cy[bucket] - ay[bucket]))
+    area = np.nan_to_num(area, nan=-1.0)
+
+    # first index of the max area in every bucket
+    best = np.maximum.reduceat(area, starts - 1)
+    hit = np.flatnonzero(area == best[bucket])
+    _, first = np.unique(bucket[hit], return_index=True)
+    return np.r_[0, hit[first] + 1, n - 1]
+
+
+def downsample(frame: OHLCVFrame, max_points: int) -> Tuple[OHLCVFrame, Optional[np.ndarray]]:
+    """(thinned frame, picked indices) by LTTB on close; (frame, None) when already small enough."""
+    if not max_points or len(frame) <= max_points:
+        return frame, None
+    idx = lttb_indices(frame.close, max_points)
+    return frame.take(idx), idx
+
+
+class BucketAggregator:
+    """
+    Row-at-a-time resample for a stream already in date order (uploads).
+    push() returns the finished bar of the previous bucket when a new bucket starts;
+    flush() returns the bucket still open. Bars are (date_str, o, h, l, c, v).
+    """
+
+    def __init__(self, rule):
+        self.rule = parse_rule(rule) if isinstance(rule, str) else rule
+        self._key: Optional[int] = None
+        self._bar: Optional[list] = None
+
+    def push(self, when: np.datetime64, o: float, h: float, l: float, c: float, v: int) -> Optional[tuple]:
+        key = int(bucket_keys(np.array([when]), self.rule)[0])
+        if key != self._key:
+            done = self.flush()
+            self._key, self._bar = key, [o, h, l, c, v]
+            return done
+        bar = self._bar
+        if h > bar[1]:
+            bar[1] = h
+        if l < bar[2]:
+            bar[2] = l
+        bar[3] = c
+        bar[4] += v
+        return None
+
+    def flush(self) -> Optional[tuple]:
+        if self._bar is None:
+            return None
+        dtype = "datetime64[s]" if self.rule.intraday else DATE_DTYPE
+        label = str(bucket_start([self._key], self.rule, dtype)[0]).replace("T", " ")
+        out = (label, *self._bar)
+        self._key = self._bar = None
+        return out
@@ -0,0 +1,141 @@
+from typing import Callable, Optional
+import numpy as np
+from .frame import OHLCVFrame
+
+# Precomputed per-series aggregates for range summaries without scanning bars.
+# A SeriesRollup covers one company's date-sorted bars:
+# - prefix sums of volume        -> sum / average volume of any range in O(1)
+# - segment trees on high / low  -> range max(high) / min(low) in O(log n)
+# - open / close columns         -> first open / last close in O(1)
+# extend() appends bars (optionally replacing a tail, e.g. the still-forming bar)
+# in O(k log n); storage grows by doubling, so appends are amortized.
+
+
+def _grow(a: np.ndarray, n: int, fill=0) -> np.ndarray:
+    out = np.full(max(n, 2 * len(a), 16), fill, dtype=a.dtype)
+    out[:len(a)] = a
+    return out
+
+
+class SegmentTree:
+    """
+    Iterative segment tree over a power-of-two capacity: leaves at tree[cap + i],
+    unused leaves hold `identity`. `op` is a numpy ufunc (np.maximum / np.minimum).
+    """
+
+    def __init__(self, values: np.ndarray, op: Callable, identity: float):
+        self.op, self.identity = op, identity
+        self.n = len(values)
+        self._build(values, max(1, 1 << max(0, self.n - 1).bit_length()))
+
+    def _build(self, values: np.ndarray, cap: int) -> None:
+        self.cap = cap
+        self.tree = np.full(2 * cap, self.identity, dtype=np.float64)
+        self.tree[cap:cap + len(values)] = values
+        size = cap // 2
+        while size >= 1:
+            self.tree[size:2 * size] = self.op(self.tree[2 * size:4 * size:2], self.tree[2 * size + 1:4 * size:2])
+            size //= 2
+
+    def assign(self, start: int, values: np.ndarray) -> None:
+        """Leaves [start, ...) = values; the series now ends after them (old leaves past it are cleared)."""
+        old_n, new_n = self.n, start + len(values)
+        if new_n > self.cap:
+            cap = self.cap
+            while cap < new_n:
+                cap *= 2
+            self._build(np.concatenate([self.tree[self.cap:self.cap + start], values]), cap)
+            self.n = new_n
+            return
+        stop = max(old_n, new_n)
+        self.n = new_n
+        if stop <= start:
+            return
+        t, cap = self.tree, self.cap
+        t[cap + start:cap + stop] = self.identity
+        t[cap + start:cap + new_n] = values
+        lo, hi = (cap + start) >> 1, (cap + stop - 1) >> 1
+        while lo >= 1:
+            t[lo:hi + 1] = self.op(t[2 * lo:2 * hi + 2:2], t[2 * lo + 1:2 * hi + 2:2])
+            lo, hi = lo >> 1, hi >> 1
+
+    def query(self, i: int, j: int) -> float:
+        """op over leaves [i, j); identity when empty."""
+        nodes = []
+        i += self.cap
+        j += self.cap
+        while i < j:   # the O(log n) covering nodes, then one vectorized reduce
+            if i & 1:
+                nodes.append(i)
+                i += 1
+            if j & 1:
+                j -= 1
+                nodes.append(j)
+            i >>= 1
+            j >>= 1
+        return float(self.op.reduce(self.tree[nodes])) if nodes else self.identity
+
+
+class SeriesRollup:
+    """Aggregates over one date-sorted single-company series (see module comment)."""
+
+    def __init__(self, open, high, low, close, volume):
+        n = len(close)
+        self.n = n
+        self._open = np.array(open, dtype=np.float64)
+        self._close = np.array(close, dtype=np.float64)
+        self._vol_prefix = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(volume, out=self._vol_prefix[1:])
+        self._high = SegmentTree(np.asarray(high, dtype=np.float64), np.maximum, -np.inf)
+        self._low = SegmentTree(np.asarray(low, dtype=np.float64), np.minimum, np.inf)
+
+    @classmethod
+    def from_frame(cls, frame: OHLCVFrame) -> "SeriesRollup":
+        return cls(frame.open, frame.high, frame.low, frame.close, frame.volume)
+
+    def __len__(self) -> int:
+        return self.n
+
+    def extend(self, frame: OHLCVFrame, keep: Optional[int] = None) -> None:
+        """
+        Keep the first `keep` bars (default: all) and append `frame`'s bars after
+        them, the way web.bars.merge_bars combines old and delta bars.
+        """
+        keep = self.n if keep is None else min(max(keep, 0), self.n)
+        k, new_n = len(frame), keep + len(frame)
+        if new_n > len(self._close):
+            self._open, self._close = _grow(self._open[:keep], new_n), _grow(self._close[:keep], new_n)
+            self._vol_prefix = _grow(self._vol_prefix[:keep + 1], len(self._close) + 1)   # one slot past close
+        self._open[keep:new_n] = frame.open
+        self._close[keep:new_n] = frame.close
+        np.cumsum(frame.volume, out=self._vol_prefix[keep + 1:new_n + 1])
+        self._vol_prefix[keep + 1:new_n + 1] += self._vol_prefix[keep]
+        self._high.assign(keep, np.asarray(frame.high, dtype=np.float64))
+        self._low.assign(keep, np.asarray(frame.low, dtype=np.float64))
+        self.n = new_n
+
+    def volume_sum(self, i: int = 0, j: Optional[int] = None) -> int:
+        j = self.n if j is None else j
+        return int(self._vol_prefix[j] - self._vol_prefix[i]) if j > i else 0
+
+    def close_at(self, i: int) -> float:
+        return float(self._close[i])
+
+    def summary(self, i: int = 0, j: Optional[int] = None) -> dict:
+        """
+        Bars [i, j): {"count", "avg_volume", "summary"} with the same values as
+        core.analytics average_volume / price_summary over those bars.
+        """
+        j = self.n if j is None else min(j, self.n)
+        if j <= i:
+            return {"count": 0, "avg_volume": 0.0, "summary": {}}
+        return {
+            "count": j - i,
+            "avg_volume": self.volume_sum(i, j) / (j - i),
+            "summary": {
+                "highest": self._high.query(i, j),
+                "lowest": self._low.query(i, j),
+                "first_open": float(self._open[i]),
+                "last_close": float(self._close[j - 1]),
+            },
+        }
@@ -1,5 +1,7 @@
-from typing import List
+from typing import List, Union
+import numpy as np
 from .models import Record
+from .frame import OHLCVFrame
 
 # Binary search helpers on array sorted by (company, date)
 
@@ -23,12 +25,23 @@ def _upper_bound_company(a: List[Record], company: str) -> int:
             hi = mid
     return lo
 
-def find_company_block(a_company_sorted: List[Record], company: str) -> List[Record]:
+def _frame_company_block(frame: OHLCVFrame, company: str) -> OHLCVFrame:
+    code = frame.company_code(company)
+    if code is None:
+        return frame[0:0]
+    start = int(np.searchsorted(frame.code, code, side="left"))
+    end = int(np.searchsorted(frame.code, code, side="right"))
+    return frame[start:end]
+
+def find_company_block(a_company_sorted: Union[List[Record], OHLCVFrame], company: str):
     """
     Precondition: a_company_sorted is sorted by (company, date)
     Returns all records for 'company' as a contiguous slice.
-    Time: O(log n + k) where k = results count
+    For an OHLCVFrame the slice is a zero-copy view over the columns.
+    Time: O(log n + k) where k = results count (O(log n) for frames)
     """
+    if isinstance(a_company_sorted, OHLCVFrame):
+        return _frame_company_block(a_company_sorted, company)
     if not a_company_sorted:
         return []
     company = company.strip().upper()
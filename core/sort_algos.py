@@ -1,5 +1,44 @@
 from typing import List
+import numpy as np
 from .models import Record
+from .frame import OHLCVFrame
+from .metrics import stage
+
+# ---------- key-encoded sort engine (OHLCVFrame) ----------
+# Composite keys are packed into one int64 per row, then sorted with a single
+# stable argsort. Ties keep input order, same as the merge sorts below.
+# Company codes are assigned in sorted-name order, so code order == name order.
+
+def _day_offsets(frame: OHLCVFrame) -> np.ndarray:
+    days = frame.date.astype(np.int64)
+    return days - days.min()
+
+def date_company_keys(frame: OHLCVFrame) -> np.ndarray:
+    """Packed (date, company) key: day_offset * n_companies + code."""
+    if not len(frame):
+        return np.empty(0, dtype=np.int64)
+    return _day_offsets(frame) * max(1, len(frame.companies)) + frame.code
+
+def company_date_keys(frame: OHLCVFrame) -> np.ndarray:
+    """Packed (company, date) key: code * day_span + day_offset."""
+    if not len(frame):
+        return np.empty(0, dtype=np.int64)
+    offs = _day_offsets(frame)
+    span = int(offs.max()) + 1
+    return frame.code.astype(np.int64) * span + offs
+
+def argsort_by_date(frame: OHLCVFrame) -> np.ndarray:
+    """Permutation that orders `frame` by (date, company). Time: O(n log n), one pass."""
+    with stage("sort", key="date"):
+        return np.argsort(date_company_keys(frame), kind="stable")
+
+def argsort_by_company(frame: OHLCVFrame) -> np.ndarray:
+    """Permutation that orders `frame` by (company, date). Time: O(n log n), one pass."""
+    with stage("sort", key="company"):
+        return np.argsort(company_date_keys(frame), kind="stable")
+
+
+# ---------- reference implementations on List[Record] ----------
 
 # Merge Sort (stable), key = (date, company)  -> date pe sort, tie ho to company
 def merge_sort_by_date(arr: List[Record]) -> List[Record]:
@@ -25,11 +64,6 @@ def _merge_by_date(left: List[Record], right: List[Record]) -> List[Record]:
     if j < len(right): out.extend(right[j:])
     return out
 
-from typing import List
-from .models import Record
-
-# ---- already defined above: merge_sort_by_date ----
-
 # Merge Sort (stable), key = (company, date)
 # Time: O(n log n), Space: O(n)
 def merge_sort_by_company(arr: List[Record]) -> List[Record]:
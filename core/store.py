@@ -0,0 +1,231 @@
+import os
+import re
+import threading
+from collections import defaultdict
+from datetime import date
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+import numpy as np
+from .frame import OHLCVFrame
+from .metrics import stage
+
+# Partitioned on-disk bar history:
+#   <root>/<interval>/<TICKER>/<year>/<seq>.npy
+# Each segment is one structured .npy array (date + OHLCV fields), sorted by
+# date, read through a memory map so a range query only pages in what it needs.
+# Writes are append-only: every append() adds new segments (atomic rename), and
+# reads merge a partition's segments with the newest value winning per bar
+# time, so a re-sent forming bar simply replaces the old one. compact() rewrites
+# a partition into a single segment; append() does so itself past COMPACT_AT.
+
+STORE_DIR = os.getenv("HISTORY_STORE_DIR", os.path.join("out", "store"))
+COMPACT_AT = int(os.getenv("HISTORY_COMPACT_AT", "8"))   # segments per partition before auto-compaction
+_FIELDS = ("open", "high", "low", "close", "volume")
+INTERVALS = ("1m", "2m", "5m", "15m", "30m", "60m", "90m", "1h", "1d", "5d", "1wk", "1mo", "3mo")
+_TICKER = re.compile(r"^[A-Z0-9^][A-Z0-9.^&=-]{0,19}$")   # TCS.NS, ^NSEI, M&M.NS, BRK-B, INR=X
+
+DateLike = Union[None, str, date, np.datetime64]
+
+
+def _dtype(date_dtype) -> np.dtype:
+    return np.dtype([("date", np.dtype(date_dtype)), ("open", "<f8"), ("high", "<f8"),
+                     ("low", "<f8"), ("close", "<f8"), ("volume", "<i8")])
+
+
+def _day(d: DateLike) -> Optional[np.datetime64]:
+    if d is None or d == "":
+        return None
+    return np.datetime64(d, "D")
+
+
+def check_key(ticker: str, interval: str) -> str:
+    """
+    The normalized ticker. ValueError unless ticker and interval are known-safe
+    path components (both end up in partition paths and come from query strings).
+    """
+    t = (ticker or "").strip().upper()
+    if not _TICKER.match(t):
+        raise ValueError(f"Invalid ticker {ticker!r}")
+    if interval not in INTERVALS:
+        raise ValueError(f"Invalid interval {interval!r}; expected one of {', '.join(INTERVALS)}")
+    return t
+
+
+def _latest_wins(seg: np.ndarray) -> np.ndarray:
+    """Sort by date; for duplicate dates keep the row that came last."""
+    if len(seg) < 2:
+        return seg
+    order = np.argsort(seg["date"], kind="stable")
+    seg = seg[order]
+    keep = np.r_[seg["date"][1:] != seg["date"][:-1], True]
+    return seg[keep]
+
+
+class HistoryStore:
+    """Per-(interval, ticker, year) partitions of memory-mapped .npy segments."""
+
+    def __init__(self, root: str = STORE_DIR, compact_at: int = COMPACT_AT):
+        self.root = root
+        self.compact_at = compact_at
+        self._locks: Dict[Tuple[str, str, int], threading.Lock] = defaultdict(threading.Lock)
+        self._guard = threading.Lock()
+        self.appends = self.compactions = 0
+
+    # ---------- layout ----------
+
+    def _dir(self, ticker: str, interval: str, year: Optional[int] = None) -> str:
+        parts = [self.root, interval, check_key(ticker, interval)]
+        return os.path.join(*parts, str(year)) if year is not None else os.path.join(*parts)
+
+    def _lock(self, ticker: str, interval: str, year: int) -> threading.Lock:
+        with self._guard:
+            return self._locks[(ticker.strip().upper(), interval, year)]
+
+    def _segments(self, ticker: str, interval: str, year: int) -> List[str]:
+        d = self._dir(ticker, interval, year)
+        try:
+            names = sorted(n for n in os.listdir(d) if n.endswith(".npy"))
+        except FileNotFoundError:
+            return []
+        return [os.path.join(d, n) for n in names]
+
+    def years(self, ticker: str, interval: str = "1d") -> List[int]:
+        try:
+            return sorted(int(n) for n in os.listdir(self._dir(ticker, interval)) if n.isdigit())
+        except FileNotFoundError:
+            return []
+
+    def tickers(self, interval: str = "1d") -> List[str]:
+        if interval not in INTERVALS:
+            raise ValueError(f"Invalid interval {interval!r}")
+        try:
+            return sorted(os.listdir(os.path.join(self.root, interval)))
+        except FileNotFoundError:
+            return []
+
+    # ---------- writes ----------
+
+    def append(self, ticker: str, interval: str, frame: OHLCVFrame) -> int:
+        """
+        Persist `frame` (one ticker's bars) as new segments, one per year touched.
+        Bars at times already stored replace them on read. Returns bars written.
+        """
+        if not len(frame):
+            return 0
+        years = frame.date.astype("datetime64[Y]").astype(np.int64) + 1970
+        cuts = np.flatnonzero(np.r_[True, years[1:] != years[:-1], True])
+        rows = np.empty(len(frame), dtype=_dtype(frame.date.dtype))
+        rows["date"] = frame.date
+        for f in _FIELDS:
+            rows[f] = getattr(frame, f)
+        for a, b in zip(cuts[:-1], cuts[1:]):
+            year = int(years[a])
+            part = rows[a:b]
+            if np.any(part["date"][1:] < part["date"][:-1]):
+                part = _latest_wins(part)
+            with self._lock(ticker, interval, year):
+                segs = self._segments(ticker, interval, year)
+                self._write(ticker, interval, year, part, segs)
+                if len(segs) + 1 >= self.compact_at:
+                    self._compact(ticker, interval, year)
+        self.appends += 1
+        return len(frame)
+
+    def _write(self, ticker: str, interval: str, year: int, rows: np.ndarray, existing: Sequence[str]) -> str:
+        d = self._dir(ticker, interval, year)
+        os.makedirs(d, exist_ok=True)
+        seq = int(os.path.basename(existing[-1])[:-4]) + 1 if existing else 0
+        path = os.path.join(d, f"{seq:08d}.npy")
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            np.save(f, rows, allow_pickle=False)
+        os.replace(tmp, path)   # atomic: readers never see a partial segment
+        return path
+
+    def compact(self, ticker: Optional[str] = None, interval: Optional[str] = None) -> int:
+        """Merge every partition with more than one segment (optionally one ticker / interval)."""
+        done = 0
+        if interval:
+            intervals = [interval]
+        else:
+            intervals = sorted(n for n in os.listdir(self.root) if n in INTERVALS) if os.path.isdir(self.root) else []
+        for iv in intervals:
+            for t in ([ticker.strip().upper()] if ticker else self.tickers(iv)):
+                for year in self.years(t, iv):
+                    with self._lock(t, iv, year):
+                        done += self._compact(t, iv, year)
+        return done
+
+    def _compact(self, ticker: str, interval: str, year: int) -> int:
+        segs = self._segments(ticker, interval, year)
+        if len(segs) < 2:
+            return 0
+        merged = _latest_wins(np.concatenate([np.load(p, mmap_mode="r") for p in segs]))
+        self._write(ticker, interval, year, merged, segs)   # new segment first: a reader sees old or new data
+        for p in segs:
+            os.remove(p)
+        self.compactions += 1
+        return 1
+
+    # ---------- reads ----------
+
+    def read(self, ticker: str, interval: str = "1d", start: DateLike = None, end: DateLike = None) -> OHLCVFrame:
+        """
+        Bars of `ticker` with start <= day <= end, date-sorted. Only partitions
+        (years) overlapping the range are opened, and each segment is cut with
+        searchsorted on its memory-mapped dates.
+        """
+        lo, hi = _day(start), _day(end)
+        y0 = int(str(lo)[:4]) if lo is not None else None
+        y1 = int(str(hi)[:4]) if hi is not None else None
+        parts = []
+        with stage("store_read"):
+            for year in self.years(ticker, interval):
+                if (y0 is not None and year < y0) or (y1 is not None and year > y1):
+                    continue
+                for p in self._segments(ticker, interval, year):
+                    try:
+                        seg = np.load(p, mmap_mode="r")
+                    except FileNotFoundError:   # compacted away under us; its bars are in the new segment
+                        continue
+                    i = int(np.searchsorted(seg["date"], lo, side="left")) if lo is not None else 0
+                    j = (int(np.searchsorted(seg["date"], hi + np.timedelta64(1, "D"), side="left"))
+                         if hi is not None else len(seg))
+                    if j > i:
+                        parts.append(np.array(seg[i:j]))
+        if not parts:
+            return OHLCVFrame.empty()
+        rows = _latest_wins(np.concatenate(parts)) if len(parts) > 1 else parts[0]
+        return OHLCVFrame(rows["date"], np.zeros(len(rows), dtype=np.int32),
+                          *(rows[f] for f in _FIELDS), companies=[ticker.strip().upper()])
+
+    def first_date(self, ticker: str, interval: str = "1d") -> Optional[np.datetime64]:
+        years = self.years(ticker, interval)
+        if not years:
+            return None
+        first = self.read(ticker, interval, f"{years[0]}-01-01", f"{years[0]}-12-31")
+        return first.date[0] if len(first) else None
+
+    # ---------- ingestion ----------
+
+    def ingest(self, frame: OHLCVFrame, interval: str = "1d") -> Dict[str, int]:
+        """Land a multi-company frame (e.g. core.loader.load_frame output): {ticker: bars}."""
+        from .index import CompanyIndex
+
+        index = CompanyIndex.build(frame)
+        return {c: self.append(c, interval, index.block(c)) for c in index.companies()}
+
+    def ingest_csv(self, path: str, interval: str = "1d") -> Dict[str, int]:
+        from .loader import load_frame
+
+        frame, _ = load_frame(path)
+        return self.ingest(frame, interval)
+
+    def stats(self) -> dict:
+        segments = files_bytes = 0
+        for dirpath, _, names in os.walk(self.root):
+            for n in names:
+                if n.endswith(".npy"):
+                    segments += 1
+                    files_bytes += os.path.getsize(os.path.join(dirpath, n))
+        return {"root": self.root, "segments": segments, "bytes": files_bytes,
+                "appends": self.appends, "compactions": self.compactions}
@@ -0,0 +1,134 @@
+import codecs
+import csv
+import io
+from typing import Any, List, Optional
+
+# Building blocks for bounded-memory, row-at-a-time processing:
+# bytes chunks -> CSV rows -> running aggregates / thinned series.
+
+
+class IncrementalCSV:
+    """
+    Push parser: feed() byte chunks as they arrive, get back the complete CSV rows.
+    A row is only emitted once its terminating newline is seen outside quotes,
+    so chunk boundaries (and quoted newlines) never split a row.
+    """
+
+    def __init__(self, encoding: str = "utf-8"):
+        self._decoder = codecs.getincrementaldecoder(encoding)(errors="ignore")
+        self._pending = ""
+
+    def feed(self, chunk: bytes) -> List[List[str]]:
+        text = self._pending + self._decoder.decode(chunk)
+        cut = self._safe_cut(text)
+        self._pending = text[cut:]
+        return self._parse(text[:cut])
+
+    def close(self) -> List[List[str]]:
+        text = self._pending + self._decoder.decode(b"", final=True)
+        self._pending = ""
+        return self._parse(text)
+
+    @staticmethod
+    def _safe_cut(text: str) -> int:
+        # last newline with an even number of quotes before it
+        pos = text.rfind("\n")
+        while pos != -1 and text.count('"', 0, pos) % 2:
+            pos = text.rfind("\n", 0, pos)
+        return pos + 1
+
+    @staticmethod
+    def _parse(text: str) -> List[List[str]]:
+        if not text:
+            return []
+        return [row for row in csv.reader(io.StringIO(text, newline="")) if row]
+
+
+class RunningSummary:
+    """price_summary + average_volume over a stream, O(1) memory."""
+
+    __slots__ = ("count", "highest", "lowest", "first_open", "last_close", "volume_sum")
+
+    def __init__(self):
+        self.count = 0
+        self.highest: Optional[float] = None
+        self.lowest: Optional[float] = None
+        self.first_open: Optional[float] = None
+        self.last_close: Optional[float] = None
+        self.volume_sum = 0
+
+    def update(self, o: float, h: float, l: float, c: float, v: int) -> None:
+        if self.count == 0:
+            self.first_open, self.highest, self.lowest = o, h, l
+        else:
+            if h > self.highest:
+                self.highest = h
+            if l < self.lowest:
+                self.lowest = l
+        self.last_close = c
+        self.volume_sum += v
+        self.count += 1
+
+    def update_block(self, o: float, h: float, l: float, c: float, v: int, n: int) -> None:
+        """Fold in `n` consecutive rows given as first open, max high, min low, last close, volume sum."""
+        if not n:
+            return
+        if self.count == 0:
+            self.first_open, self.highest, self.lowest = o, h, l
+        else:
+            self.highest = max(self.highest, h)
+            self.lowest = min(self.lowest, l)
+        self.last_close = c
+        self.volume_sum += v
+        self.count += n
+
+    @property
+    def average_volume(self) -> float:
+        return self.volume_sum / self.count if self.count else 0.0
+
+    def summary(self) -> dict:
+        return {"highest": self.highest, "lowest": self.lowest,
+                "first_open": self.first_open, "last_close": self.last_close}
+
+
+class StrideSampler:
+    """
+    Keeps at most `max_points` items of an unbounded stream, evenly spaced:
+    every `stride`-th item is kept and, when the buffer fills up, every other
+    kept item is dropped and the stride doubles. The last item is always kept.
+    """
+
+    def __init__(self, max_points: int):
+        self.max_points = max(2, max_points)
+        self.stride = 1
+        self.items: List[Any] = []
+        self._seen = 0
+        self._last: Any = None
+        self._last_kept = False
+
+    def wants_next(self) -> bool:
+        """Whether the next add() lands on the stride (so callers can skip building items)."""
+        return self._seen % self.stride == 0
+
+    def add(self, item: Any) -> None:
+        keep = self._seen % self.stride == 0
+        self._seen += 1
+        self._last, self._last_kept = item, keep
+        if not keep:
+            return
+        self.items.append(item)
+        if len(self.items) > self.max_points:
+            self.items = self.items[::2]
+            self.stride *= 2
+            self._last_kept = bool(self.items) and self.items[-1] is item
+
+    def result(self) -> List[Any]:
+        if self._seen and not self._last_kept:
+            if len(self.items) >= self.max_points:
+                return self.items[:-1] + [self._last]
+            return self.items + [self._last]
+        return list(self.items)
+
+    @property
+    def thinned(self) -> bool:
+        return self.stride > 1
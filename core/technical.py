@@ -0,0 +1,254 @@
+import math
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from .frame import OHLCVFrame
+from .indicators import ewm_batch, sma_batch
+from .metrics import stage
+
+# Registry-based technical indicators over OHLCV column arrays.
+# Indicators are declared with @indicator(name, **defaults) and computed together:
+# a Context memoizes shared intermediates (true range, rolling windows, EMAs) so e.g.
+# ATR and several Bollinger specs do not redo the same work.
+
+
+@dataclass(frozen=True)
+class IndicatorDef:
+    name: str
+    fn: Callable[..., Dict[str, np.ndarray]]
+    params: Tuple[Tuple[str, float], ...]   # declared order -> positional query params
+    doc: str = ""
+
+
+@dataclass(frozen=True)
+class IndicatorSpec:
+    name: str
+    params: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def label(self) -> str:
+        defaults = dict(REGISTRY[self.name].params)
+        if self.params == defaults:
+            return self.name
+        return ":".join([self.name] + [_fmt(v) for v in self.params.values()])
+
+
+REGISTRY: Dict[str, IndicatorDef] = {}
+
+
+def indicator(name: str, **defaults):
+    """Register fn(ctx, **params) -> {output_name: array} under `name`."""
+    def deco(fn):
+        REGISTRY[name] = IndicatorDef(name, fn, tuple(defaults.items()), (fn.__doc__ or "").strip())
+        return fn
+    return deco
+
+
+def _fmt(v: float) -> str:
+    return str(int(v)) if float(v).is_integer() else str(v)
+
+
+def parse_specs(query: str) -> List[IndicatorSpec]:
+    """
+    "rsi,macd:12:26:9,bb:20:2" -> specs. Params are positional in declared order,
+    missing ones take defaults. Raises ValueError on unknown names / bad numbers.
+    """
+    specs: List[IndicatorSpec] = []
+    for part in (query or "").split(","):
+        part = part.strip().lower()
+        if not part:
+            continue
+        name, *args = part.split(":")
+        d = REGISTRY.get(name)
+        if d is None:
+            raise ValueError(f"Unknown indicator '{name}'. Available: {sorted(REGISTRY)}")
+        if len(args) > len(d.params):
+            raise ValueError(f"'{name}' takes at most {len(d.params)} parameters")
+        params = dict(d.params)
+        for (key, default), raw in zip(d.params, args):
+            val = float(raw)
+            if not math.isfinite(val):
+                raise ValueError(f"'{name}' parameter '{key}' must be a finite number")
+            if isinstance(default, int):
+                if not val.is_integer():
+                    raise ValueError(f"'{name}' parameter '{key}' must be a whole number")
+                val = int(val)
+            params[key] = val
+        if any(isinstance(dv, int) and params[k] < 1 for k, dv in d.params):
+            raise ValueError(f"'{name}' window parameters must be >= 1")
+        specs.append(IndicatorSpec(name, params))
+    return specs
+
+
+class Context:
+    """OHLCV columns + memo of intermediates shared across indicators."""
+
+    def __init__(self, open, high, low, close, volume, date=None):
+        self.open = np.asarray(open, dtype=np.float64)
+        self.high = np.asarray(high, dtype=np.float64)
+        self.low = np.asarray(low, dtype=np.float64)
+        self.close = np.asarray(close, dtype=np.float64)
+        self.volume = np.asarray(volume, dtype=np.float64)
+        self.date = date
+        self._memo: Dict[tuple, np.ndarray] = {}
+
+    @classmethod
+    def from_frame(cls, frame: OHLCVFrame) -> "Context":
+        return cls(frame.open, frame.high, frame.low, frame.close, frame.volume, frame.date)
+
+    def __len__(self) -> int:
+        return len(self.close)
+
+    def shared(self, key: tuple, fn: Callable[[], np.ndarray]) -> np.ndarray:
+        if key not in self._memo:
+            self._memo[key] = fn()
+        return self._memo[key]
+
+    # ---- shared intermediates ----
+
+    def ewm(self, name: str, alpha: float, src: Optional[np.ndarray] = None) -> np.ndarray:
+        """adjust=False EWM of a column (or of `src`, memoized under `name`)."""
+        return self.shared(("ewm", name, alpha), lambda: ewm_batch(getattr(self, name) if src is None else src, alpha))
+
+    def ema(self, name: str, span: int) -> np.ndarray:
+        return self.ewm(name, 2.0 / (span + 1.0))
+
+    def rolling(self, name: str, window: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Full-window rolling mean and population std of a column; NaN until `window`
+        bars exist. pandas' windowed kernels, not E[x^2] - mean^2 from prefix sums,
+        which cancels badly on long low-volatility series.
+        """
+        def calc():
+            import pandas as pd
+            r = pd.Series(getattr(self, name), copy=False).rolling(window)
+            return r.mean().to_numpy(), r.std(ddof=0).to_numpy()
+        return self.shared(("rolling", name, window), calc)
+
+    def true_range(self) -> np.ndarray:
+        def calc():
+            prev_close = np.concatenate(([np.nan], self.close[:-1]))
+            hl = self.high - self.low
+            with np.errstate(invalid="ignore"):
+                tr = np.fmax(hl, np.fmax(np.abs(self.high - prev_close), np.abs(self.low - prev_close)))
+            return tr
+        return self.shared(("tr",), calc)
+
+
+def compute(ctx: Context, specs: Sequence[IndicatorSpec], decimals: int = 4,
+            take: Optional[np.ndarray] = None) -> dict:
+    """
+    Run every spec over one Context in a single pass (intermediates are shared).
+    Returns {label: {"params": {...}, "values": {output: [float|None, ...]}}}.
+    `take` (bar indices) keeps only those bars of each full-length output.
+    """
+    out = {}
+    with stage("indicators", kind="technical"):
+        for spec in specs:
+            res = REGISTRY[spec.name].fn(ctx, **spec.params)
+            out[spec.label] = {
+                "params": dict(spec.params),
+                "values": {k: _to_list(v if take is None else v[take], decimals) for k, v in res.items()},
+            }
+    return out
+
+
+def compute_frame(frame: OHLCVFrame, specs: Sequence[IndicatorSpec], decimals: int = 4,
+                  take: Optional[np.ndarray] = None) -> dict:
+    return compute(Context.from_frame(frame), specs, decimals, take) if specs else {}
+
+
+def _to_list(arr: np.ndarray, decimals: int) -> list:
+    a = np.round(np.asarray(arr, dtype=np.float64), decimals)
+    out = a.astype(object)
+    out[~np.isfinite(a)] = None     # JSON has no NaN
+    return out.tolist()
+
+
+# ---------- indicators ----------
+
+@indicator("sma", window=20)
+def _sma(ctx: Context, window: int):
+    """Simple moving average of close (min_periods=1)."""
+    return {"sma": sma_batch(ctx.close, (window,))[window]}
+
+
+@indicator("ema", span=20)
+def _ema(ctx: Context, span: int):
+    """Exponential moving average of close (adjust=False)."""
+    return {"ema": ctx.ema("close", span)}
+
+
+@indicator("rsi", period=14)
+def _rsi(ctx: Context, period: int):
+    """Wilder RSI: RMA (alpha=1/period) of gains and losses."""
+    n = len(ctx)
+    out = np.full(n, np.nan)
+    if n < 2:
+        return {"rsi": out}
+    diff = np.diff(ctx.close)
+    gain = np.clip(diff, 0, None)
+    loss = np.clip(-diff, 0, None)
+    a = 1.0 / period
+    avg_gain = ctx.ewm("gain", a, gain)
+    avg_loss = ctx.ewm("loss", a, loss)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rs = avg_gain / avg_loss
+        rsi = 100.0 - 100.0 / (1.0 + rs)
+    rsi = np.where(avg_loss == 0, np.where(avg_gain == 0, 50.0, 100.0), rsi)
+    out[1:] = rsi
+    if period > 1:
+        out[:min(period, n)] = np.nan   # warm-up
+    return {"rsi": out}
+
+
+@indicator("macd", fast=12, slow=26, signal=9)
+def _macd(ctx: Context, fast: int, slow: int, signal: int):
+    """MACD line = EMA(fast) - EMA(slow); signal = EMA(signal) of the line."""
+    line = ctx.ema("close", fast) - ctx.ema("close", slow)
+    sig = ctx.ewm(f"macd_{fast}_{slow}", 2.0 / (signal + 1.0), line)
+    return {"macd": line, "signal": sig, "hist": line - sig}
+
+
+@indicator("bb", window=20, k=2.0)
+def _bollinger(ctx: Context, window: int, k: float):
+    """Bollinger bands: SMA(window) +/- k * population std, full windows only."""
+    mid, std = ctx.rolling("close", window)
+    return {"mid": mid, "upper": mid + k * std, "lower": mid - k * std}
+
+
+@indicator("atr", period=14)
+def _atr(ctx: Context, period: int):
+    """Average true range, Wilder smoothing of the true range."""
+    tr = ctx.true_range()
+    if not len(tr):
+        return {"atr": tr}
+    tr = tr.copy()
+    tr[0] = ctx.high[0] - ctx.low[0]
+    atr = ctx.ewm("tr", 1.0 / period, tr)
+    out = atr.copy()
+    out[:min(period - 1, len(out))] = np.nan
+    return {"atr": out}
+
+
+@indicator("vwap")
+def _vwap(ctx: Context):
+    """Cumulative VWAP of the typical price; resets each day for intraday bars."""
+    tp = (ctx.high + ctx.low + ctx.close) / 3.0
+    pv, vol = tp * ctx.volume, ctx.volume
+    if ctx.date is not None and len(ctx) and np.dtype(ctx.date.dtype) != np.dtype("datetime64[D]"):
+        day = ctx.date.astype("datetime64[D]")
+        starts = np.flatnonzero(np.r_[True, day[1:] != day[:-1]])
+        cpv = _segment_cumsum(pv, starts)
+        cvol = _segment_cumsum(vol, starts)
+    else:
+        cpv, cvol = np.cumsum(pv), np.cumsum(vol)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return {"vwap": np.where(cvol > 0, cpv / cvol, np.nan)}
+
+
+def _segment_cumsum(x: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    cs = np.cumsum(x)
+    base = np.concatenate(([0.0], cs))[starts]
+    seg = np.repeat(base, np.diff(np.r_[starts, len(x)]))
+    return cs - seg
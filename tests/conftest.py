@@ -0,0 +1,59 @@
+import os
+import tempfile
+import threading
+import time
+
+# before any web.* import: no background tasks, no writes into the repo's out/
+os.environ.setdefault("PREFETCH", "0")
+os.environ.setdefault("WARMUP", "0")
+os.environ.setdefault("HISTORY_STORE_DIR", "")
+os.environ.setdefault("CHART_CACHE_DIR", tempfile.mkdtemp(prefix="chart_cache_"))
+os.environ.setdefault("CHART_WORKERS", "0")
+os.environ.setdefault("BATCH_WORKERS", "0")
+
+import numpy as np
+import pandas as pd
+import pytest
+
+
+class YahooStub:
+    """Stands in for yfinance.download: daily bars, an optional delay per ticker, call log."""
+
+    def __init__(self, bars: int = 30, delays=None):
+        self.bars = bars
+        self.delays = dict(delays or {})
+        self.calls = []
+        self.active = self.peak = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, ticker, interval="1d", period=None, start=None, **kwargs):
+        with self._lock:
+            self.calls.append((ticker, period, start))
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            time.sleep(self.delays.get(ticker, 0.0))
+            n = self.bars
+            close = 100.0 + np.arange(n) + (sum(map(ord, ticker)) % 7)
+            index = pd.DatetimeIndex(pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=n), name="Date")
+            return pd.DataFrame({"Open": close - 0.5, "High": close + 1, "Low": close - 1,
+                                 "Close": close, "Volume": np.full(n, 1000)}, index=index)
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+@pytest.fixture
+def yahoo(monkeypatch):
+    """A fresh YahooStub behind yf.download, with the market cache and bar store emptied."""
+    import yfinance
+    from web.cache import CACHE
+    from web.sources import BAR_STORE
+
+    stub = YahooStub()
+    monkeypatch.setattr(yfinance, "download", stub)
+    CACHE.clear()
+    BAR_STORE._series.clear()
+    yield stub
+    CACHE.clear()
+    BAR_STORE._series.clear()
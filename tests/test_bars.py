@@ -0,0 +1,43 @@
+from datetime import date
+
+import numpy as np
+
+from core.frame import OHLCVFrame
+from web.bars import BarStore, period_index
+
+
+def _frame(days, per_day=1):
+    """Bars on `days` (datetime64[D]); per_day > 1 gives intraday bars, an hour apart."""
+    stamps = np.array([np.datetime64(d, "s") + np.timedelta64(3600 * k, "s")
+                       for d in days for k in range(per_day)])
+    if per_day == 1:
+        stamps = stamps.astype("datetime64[D]")
+    n = len(stamps)
+    close = 100.0 + np.arange(n)
+    return OHLCVFrame(date=stamps, code=np.zeros(n, np.int32), open=close, high=close + 1,
+                      low=close - 1, close=close, volume=np.full(n, 10, np.int64), companies=["TCS.NS"])
+
+
+# Mon 2026-10-05 .. Fri 2026-10-16 (two trading weeks)
+WEEKDAYS = np.busday_offset("2026-10-05", np.arange(10), roll="forward")
+
+
+def test_short_periods_count_sessions_over_a_weekend():
+    frame = _frame(WEEKDAYS)
+    sunday = date(2026, 10, 18)
+    assert len(frame[period_index(frame, "1d", sunday):]) == 1
+    assert len(frame[period_index(frame, "5d", sunday):]) == 5
+    assert len(frame[period_index(frame, "1mo", sunday):]) == 10
+
+
+def test_one_day_of_intraday_bars_is_the_last_session():
+    frame = _frame(WEEKDAYS[-3:], per_day=6)
+    i = period_index(frame, "1d")
+    assert len(frame[i:]) == 6
+    assert (frame.date[i:].astype("datetime64[D]") == WEEKDAYS[-1]).all()
+
+
+def test_bar_store_serves_last_session_for_1d():
+    store = BarStore(lambda ticker, period="6mo", interval="1d", start=None: _frame(WEEKDAYS))
+    assert len(store.get("TCS.NS", "1d")) == 1
+    assert len(store.get("TCS.NS", "5d")) == 5
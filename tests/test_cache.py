@@ -0,0 +1,45 @@
+import asyncio
+
+import pytest
+
+from web.cache import MarketCache
+
+
+def test_cancelled_leader_does_not_cancel_coalesced_waiters():
+    cache = MarketCache(max_bytes=1 << 20)
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return [1, 2, 3]
+
+    async def run():
+        leader = asyncio.create_task(cache.get_or_fetch("k", fetch, 60))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(cache.get_or_fetch("k", fetch, 60))
+        await asyncio.sleep(0.01)
+        leader.cancel()   # the client that started the fetch disconnects
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await waiter
+
+    assert asyncio.run(run()) == [1, 2, 3]
+    assert len(calls) == 1
+    assert cache.get("k") == [1, 2, 3] and cache.coalesced == 1
+
+
+def test_fetch_error_reaches_every_waiter_and_is_not_cached():
+    cache = MarketCache(max_bytes=1 << 20)
+
+    async def fetch():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream down")
+
+    async def run():
+        return await asyncio.gather(*(cache.get_or_fetch("k", fetch, 60) for _ in range(3)),
+                                    return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert cache.get("k") is None and not cache._inflight
@@ -0,0 +1,60 @@
+import asyncio
+import time
+
+import numpy as np
+import pytest
+
+from core.frame import OHLCVFrame
+from viz import charts
+from viz.charts import ChartCache, render_chart
+
+
+def _frame(n=20):
+    close = 100.0 + np.arange(n)
+    return OHLCVFrame(date=np.datetime64("2026-01-01", "D") + np.arange(n), code=np.zeros(n, np.int32),
+                      open=close, high=close + 1, low=close - 1, close=close,
+                      volume=np.full(n, 10, np.int64), companies=["TCS.NS"])
+
+
+def test_cancelled_leader_does_not_cancel_coalesced_render(tmp_path, monkeypatch):
+    calls = []
+
+    def slow_render(frame, title, size):
+        calls.append(title)
+        time.sleep(0.1)
+        return b"png"
+
+    monkeypatch.setattr(charts, "_render_inline", slow_render)
+    cache = ChartCache(str(tmp_path))
+    frame = _frame()
+
+    async def run():
+        leader = asyncio.create_task(render_chart("TCS.NS", frame, cache=cache))
+        await asyncio.sleep(0.03)
+        waiter = asyncio.create_task(render_chart("TCS.NS", frame, cache=cache))
+        await asyncio.sleep(0.01)
+        leader.cancel()   # the client that started the render disconnects
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await waiter
+
+    png, key = asyncio.run(run())
+    assert png == b"png" and len(calls) == 1
+    assert cache.get(key) == b"png" and not charts._inflight
+
+
+def test_render_error_reaches_every_waiter(tmp_path, monkeypatch):
+    def broken(frame, title, size):
+        time.sleep(0.02)
+        raise RuntimeError("render failed")
+
+    monkeypatch.setattr(charts, "_render_inline", broken)
+    cache = ChartCache(str(tmp_path))
+    frame = _frame()
+
+    async def run():
+        return await asyncio.gather(*(render_chart("TCS.NS", frame, cache=cache) for _ in range(3)),
+                                    return_exceptions=True)
+
+    assert all(isinstance(r, RuntimeError) for r in asyncio.run(run()))
+    assert not charts._inflight
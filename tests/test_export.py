@@ -0,0 +1,100 @@
+import gzip
+import io
+
+import numpy as np
+import pytest
+
+from core import export
+from core.frame import OHLCVFrame
+from core.store import HistoryStore
+
+
+def _frame(n, start="2026-01-01", companies=("INFY.NS", "TCS.NS")):
+    k = len(companies)
+    close = 100.0 + np.arange(n) / 4
+    return OHLCVFrame(np.datetime64(start, "D") + np.arange(n) // k, (np.arange(n) % k).astype(np.int32),
+                      close - 0.5, close + 1, close - 1, close, np.arange(n, dtype=np.int64),
+                      companies=list(companies))
+
+
+def _rows(frame, columns=export.COLUMNS):
+    names = frame.company_names()
+    out = []
+    for i in range(len(frame)):
+        vals = {"date": str(frame.date[i]), "company": names[i], "open": frame.open[i], "high": frame.high[i],
+                "low": frame.low[i], "close": frame.close[i], "volume": frame.volume[i]}
+        out.append(",".join(str(vals[c]) for c in columns))
+    return out
+
+
+def test_csv_bytes_match_the_rows():
+    frame = _frame(7)
+    data = b"".join(export.encode([frame[:3], frame[3:]], "csv")).decode()
+    assert data.splitlines() == [",".join(export.COLUMNS)] + _rows(frame)
+
+
+def test_csv_is_encoded_one_chunk_at_a_time():
+    frame = _frame(10)
+    chunks = list(export.csv_chunks([frame[:4], frame[4:4], frame[4:]], export.BAR_COLUMNS))
+    assert len(chunks) == 2   # header rides with the first chunk; empty frames add nothing
+    assert b"".join(chunks).decode().splitlines()[1:] == _rows(frame, export.BAR_COLUMNS)
+
+
+def test_csv_gz_gunzips_to_the_csv():
+    frame = _frame(500)
+    plain = b"".join(export.encode([frame], "csv"))
+    packed = b"".join(export.encode([frame[:200], frame[200:]], "csv.gz"))
+    assert gzip.decompress(packed) == plain and len(packed) < len(plain)
+
+
+def test_nothing_matched_is_header_only():
+    empty = OHLCVFrame.empty()
+    assert b"".join(export.encode([empty], "csv")) == b"date,company,open,high,low,close,volume\n"
+    assert b"".join(export.encode([], "csv", export.BAR_COLUMNS)) == b"date,open,high,low,close,volume\n"
+    assert gzip.decompress(b"".join(export.encode([], "csv.gz"))) == b"date,company,open,high,low,close,volume\n"
+
+
+def test_parquet_round_trip():
+    pq = pytest.importorskip("pyarrow.parquet")
+    frame = _frame(2 * export.CHUNK_ROWS + 500)
+    data = b"".join(export.encode([frame[:90], frame[90:]], "parquet"))
+    table = pq.read_table(io.BytesIO(data))
+    assert table.num_rows == len(frame) and table.column_names == list(export.COLUMNS)
+    assert str(table.schema.field("date").type) == "date32[day]"
+    assert table.column("company").to_pylist() == frame.company_names().tolist()
+    assert table.column("close").to_pylist() == frame.close.tolist()
+    assert table.column("volume").to_pylist() == frame.volume.tolist()
+    assert pq.ParquetFile(io.BytesIO(data)).num_row_groups == 3   # ~CHUNK_ROWS rows each
+
+
+def test_parquet_with_nothing_matched_has_the_bar_schema():
+    pq = pytest.importorskip("pyarrow.parquet")
+    table = pq.read_table(io.BytesIO(b"".join(export.parquet_chunks([OHLCVFrame.empty()]))))
+    assert table.num_rows == 0 and table.schema == export._empty_schema(export.COLUMNS)
+
+
+def test_unknown_format_fails_before_any_bytes():
+    with pytest.raises(ValueError):
+        export.encode([_frame(2)], "xlsx")
+
+
+def test_get_export_streams_the_store(tmp_path, monkeypatch):
+    from fastapi.testclient import TestClient
+    import web.server as server
+
+    history = HistoryStore(str(tmp_path))
+    frame = _frame(20, companies=("TCS.NS",))
+    history.append("TCS.NS", "1d", frame)
+    monkeypatch.setattr(server, "HISTORY", history)
+    client = TestClient(server.app)
+
+    r = client.get("/api/export", params={"tickers": "TCS.NS", "start": "2026-01-05", "end": "2026-01-09"})
+    assert r.status_code == 200 and r.headers["content-type"].startswith("text/csv")
+    assert 'filename="TCS.NS_2026-01-05_2026-01-09.csv"' in r.headers["content-disposition"]
+    assert r.text.splitlines() == [",".join(export.COLUMNS)] + _rows(frame[4:9])
+
+    r = client.get("/api/export", params={"tickers": "TCS.NS,INFY.NS", "format": "csv.gz"})
+    assert gzip.decompress(r.content).decode().splitlines()[1:] == _rows(frame)
+
+    r = client.get("/api/export", params={"tickers": "INFY.NS"})
+    assert r.status_code == 200 and r.text == ",".join(export.COLUMNS) + "\n"
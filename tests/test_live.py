@@ -0,0 +1,66 @@
+import asyncio
+import json
+
+import numpy as np
+
+from core.frame import OHLCVFrame
+from core.indicators import ma_ema
+from web.live import LiveHub
+
+
+def _frame(n, last_close=None):
+    close = 100.0 + np.sin(np.arange(n)) * 7 + np.arange(n) * 0.3
+    if last_close is not None:
+        close[-1] = last_close
+    return OHLCVFrame(np.datetime64("2026-01-01") + np.arange(n), np.zeros(n, np.int32), close, close + 1,
+                      close - 1, close, np.full(n, 10, np.int64), companies=["TCS.NS"])
+
+
+def _indicators(msg):
+    return {k: {int(w): v for w, v in msg[k].items()} for k in ("ma", "ema")}
+
+
+def _expected(closes, take):
+    me = ma_ema(closes, take=np.asarray(list(take)))
+    return {k: {w: [None if np.isnan(x) else x for x in v] for w, v in me[k].items()} for k in ("ma", "ema")}
+
+
+def test_one_poll_feeds_every_subscriber_snapshot_then_delta():
+    grown = _frame(32)
+    grown.close[30] = 4.0   # the forming bar moved again, and a new bar opened
+    frames = [_frame(30), _frame(31), _frame(31, last_close=5.0), grown]
+    polls = []
+
+    async def poll(ticker, period, interval):
+        polls.append(ticker)
+        return frames[min(len(polls), len(frames)) - 1]
+
+    async def run():
+        hub = LiveHub(poll, every=lambda: 0.02)
+        inboxes = []
+        for _ in range(3):
+            inbox = []
+
+            async def send(text, inbox=inbox):
+                inbox.append(json.loads(text))
+            sub = hub.connect(send)
+            asyncio.create_task(hub.pump(sub))
+            await hub.subscribe(sub, ["TCS.NS"], period="max")
+            inboxes.append(inbox)
+        await asyncio.sleep(0.07)
+        hub.close()
+        return hub, inboxes
+
+    hub, inboxes = asyncio.run(run())
+    assert hub.stats()["feeds"] == 0
+    for inbox in inboxes:
+        snap, *deltas = inbox
+        assert snap["type"] == "snapshot" and len(snap["columns"]["date"]) == 30
+        assert _indicators(snap) == _expected(frames[0].close, range(30))
+        assert [d["from"] for d in deltas[:3]] == ["2026-01-31"] * 3
+        assert deltas[1]["bars"]["close"] == [5.0]
+        # incremental values (new bar, replaced forming bar) match the batch path
+        assert _indicators(deltas[0]) == _expected(frames[1].close, [30])
+        assert _indicators(deltas[1]) == _expected(frames[2].close, [30])
+        assert _indicators(deltas[2]) == _expected(frames[3].close, [30, 31])
+    assert hub.polls <= 5   # one poll per tick for the feed, not one per subscriber
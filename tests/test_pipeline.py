@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+from core.frame import OHLCVFrame
+from core.pipeline import ExternalSort
+from core.sort_algos import argsort_by_company, argsort_by_date
+
+
+def _frame(n, companies, days, seed=1):
+    """Heavily duplicated (company, date) keys; volume is the input row number."""
+    rng = np.random.default_rng(seed)
+    code = rng.integers(0, len(companies), n).astype(np.int32)
+    date = np.datetime64("2026-01-01") + rng.integers(0, days, n)
+    close = rng.random(n)
+    return OHLCVFrame(date, code, close, close, close, close, np.arange(n, dtype=np.int64),
+                      companies=sorted(companies))   # codes follow sorted names, as OHLCVFrame expects
+
+
+def _chunks(frame, size):
+    return [frame[i:i + size] for i in range(0, len(frame), size)]
+
+
+@pytest.mark.parametrize("by, argsort", [("company", argsort_by_company), ("date", argsort_by_date)])
+def test_spilled_sort_matches_stable_in_memory_sort_on_duplicate_keys(by, argsort, tmp_path):
+    frame = _frame(60_000, ["TCS", "INFY", "RELIANCE", "HDFC", "SBIN"], days=20)
+    sorter = ExternalSort(by, memory_rows=10_000, tmpdir=str(tmp_path), chunk_rows=7_000)
+    out = OHLCVFrame.concat(list(sorter.sort(_chunks(frame, 3_000))))
+    assert sorter.runs == 5 and sorter.spilled_rows == len(frame)
+    np.testing.assert_array_equal(out.volume, frame.volume[argsort(frame)])
+
+
+def test_all_equal_keys_come_out_in_input_order(tmp_path):
+    frame = _frame(25_000, ["TCS"], days=1)
+    sorter = ExternalSort("company", memory_rows=10_000, tmpdir=str(tmp_path))
+    out = OHLCVFrame.concat(list(sorter.sort(_chunks(frame, 4_000))))
+    assert sorter.runs > 1
+    np.testing.assert_array_equal(out.volume, np.arange(len(frame)))
@@ -0,0 +1,30 @@
+import asyncio
+
+from web.prefetch import Prefetcher, TokenBucket
+
+
+def test_a_failing_round_does_not_stop_the_scheduler():
+    rounds = []
+
+    async def refresh(ticker, period, interval):
+        return [1]
+
+    async def on_round(done):
+        rounds.append(done)
+        if len(rounds) == 1:
+            raise RuntimeError("snapshot rebuild failed")
+
+    async def run():
+        pf = Prefetcher(refresh, curated=[("TCS.NS", "5d", "1d")], bucket=TokenBucket(1000, 1000),
+                        on_round=on_round)
+        pf._task = asyncio.create_task(pf.run(tick=0.01))
+        await asyncio.sleep(0.05)
+        pf._due.clear()   # make the series due again
+        await asyncio.sleep(0.05)
+        running, errors = pf.running, pf.round_errors
+        pf._task.cancel()
+        return running, errors
+
+    running, errors = asyncio.run(run())
+    assert running and errors == 1
+    assert len(rounds) >= 2
@@ -0,0 +1,13 @@
+from fastapi.testclient import TestClient
+
+import web.server as server
+
+
+def test_profile_is_opt_in(monkeypatch):
+    client = TestClient(server.app)
+    r = client.get("/metrics?profile=1")
+    assert r.status_code == 200 and r.headers["content-type"].startswith("text/plain")
+
+    monkeypatch.setattr(server, "ALLOW_PROFILE", True)
+    r = client.get("/metrics?profile=1")
+    assert r.json()["path"] == "/metrics" and "profile" in r.json()
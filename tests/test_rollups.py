@@ -0,0 +1,54 @@
+import numpy as np
+
+from core.frame import OHLCVFrame
+from core.rollups import SeriesRollup
+from web.bars import BarStore
+
+
+def _frame(n, start="2026-01-01", seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 + rng.normal(0, 1, n).cumsum()
+    return OHLCVFrame(date=np.datetime64(start, "D") + np.arange(n), code=np.zeros(n, np.int32),
+                      open=close - 0.5, high=close + rng.random(n), low=close - rng.random(n),
+                      close=close, volume=rng.integers(1, 10_000, n), companies=["TCS.NS"])
+
+
+def _same(a: SeriesRollup, b: SeriesRollup):
+    assert len(a) == len(b)
+    for i, j in [(0, len(b)), (0, 1), (len(b) // 3, len(b) - 1), (len(b) - 1, len(b))]:
+        assert a.summary(i, j) == b.summary(i, j)
+
+
+def test_extend_one_bar_at_a_time_past_growth_points():
+    full = _frame(70)
+    rollup = SeriesRollup.from_frame(full[:5])
+    for n in range(6, 71):   # crosses the 16-row floor and the 2x doublings (32, 64)
+        rollup.extend(full[n - 1:n])
+        _same(rollup, SeriesRollup.from_frame(full[:n]))
+
+
+def test_extend_replacing_the_forming_bar():
+    full = _frame(40)
+    rollup = SeriesRollup.from_frame(full[:3])
+    for n in range(4, 41):
+        rollup.extend(full[n - 2:n], keep=n - 2)   # re-sent last bar plus one new bar
+        _same(rollup, SeriesRollup.from_frame(full[:n]))
+
+
+def test_bar_store_daily_deltas_keep_serving():
+    full = _frame(40)
+    held = {"n": 5}
+
+    def fetch(ticker, period=None, interval="1d", start=None):
+        if start is None:
+            return full[:held["n"]]
+        i = int(np.searchsorted(full.date, np.datetime64(start, "D")))
+        return full[i:held["n"]]
+
+    store = BarStore(fetch)
+    store.get("TCS.NS", "max")
+    for n in range(6, 41):
+        held["n"] = n
+        frame = store.get("TCS.NS", "max")
+        assert len(frame) == n
+        assert store.summary("TCS.NS", "1d", frame) == SeriesRollup.from_frame(full[:n]).summary()
@@ -0,0 +1,30 @@
+import pytest
+from starlette.requests import Request
+
+from web.serialize import _accepts
+
+
+def _request(accept_encoding):
+    return Request({"type": "http", "headers": [(b"accept-encoding", accept_encoding.encode())]})
+
+
+@pytest.mark.parametrize("header, coding, ok", [
+    ("gzip, br", "br", True),
+    ("gzip;q=1.0, br;q=0", "br", False),
+    ("br;q=0.0", "br", False),
+    ("br; q=0.5", "br", True),
+    ("*", "gzip", True),
+    ("*;q=0, gzip", "br", False),
+    ("*, br;q=0", "br", False),
+    ("identity", "gzip", False),
+    ("", "gzip", False),
+])
+def test_accept_encoding_honours_q_values(header, coding, ok):
+    assert _accepts(_request(header), coding) is ok
+
+
+def test_one_format_unavailable_for_exports_and_responses():
+    from core import export
+    from web import serialize
+
+    assert serialize.FormatUnavailable is export.FormatUnavailable
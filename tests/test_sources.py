@@ -0,0 +1,52 @@
+import asyncio
+import time
+
+import web.sources as sources
+from web.cache import CACHE
+
+
+def test_concurrent_misses_share_one_upstream_call(yahoo):
+    yahoo.delays["TCS.NS"] = 0.2
+    before = CACHE.coalesced
+
+    async def run():
+        return await asyncio.gather(*(sources.fetch_yf("TCS.NS", "6mo", "1d") for _ in range(5)))
+
+    frames = asyncio.run(run())
+    assert len(yahoo.calls) == 1
+    assert CACHE.coalesced - before == 4
+    assert all(len(f) == yahoo.bars for f in frames)
+
+
+def test_slow_upstream_times_out_as_no_data(yahoo, monkeypatch):
+    monkeypatch.setattr(sources, "YF_TIMEOUT", 0.1)
+    yahoo.delays["SLOW.NS"] = 1.0
+
+    async def run():
+        t0 = time.perf_counter()
+        frames = await sources.fetch_many(["SLOW.NS", "FAST.NS"], fallback=False)
+        return frames, time.perf_counter() - t0   # (asyncio.run then waits for the abandoned thread)
+
+    (slow, fast), elapsed = asyncio.run(run())
+    assert elapsed < 0.8
+    assert len(slow) == 0 and len(fast) == yahoo.bars
+    assert ("yf", "SLOW.NS", "6mo", "1d") not in CACHE._data   # a timeout is not cached
+
+
+def test_featured_fans_out_and_returns_the_snapshot(yahoo):
+    from fastapi.testclient import TestClient
+    from web.server import FEATURED, PREFETCHER, app
+
+    PREFETCHER.snapshots.clear()
+    yahoo.delays.update({t: 0.3 for t in FEATURED})
+    with TestClient(app) as client:
+        t0 = time.perf_counter()
+        body = client.get("/api/featured").json()
+        elapsed = time.perf_counter() - t0
+
+    assert elapsed < 0.3 * len(FEATURED) / 2   # concurrent, not one after another
+    assert yahoo.peak > 1
+    assert [row["ticker"] for row in body["featured"]] == FEATURED
+    for row in body["featured"]:
+        assert row["last"] == row["prev"] + 1
+        assert row["pct"] == round((row["last"] - row["prev"]) / row["prev"] * 100, 2)
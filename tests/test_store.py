@@ -0,0 +1,155 @@
+import numpy as np
+import pytest
+
+from core.frame import OHLCVFrame
+from core.store import HistoryStore, check_key
+
+
+@pytest.mark.parametrize("ticker, interval", [
+    ("../..", "1d"), ("..", "1d"), ("a/b", "1d"), ("TCS.NS", "../.."), ("TCS.NS", "1d/../x"),
+    ("", "1d"), ("X" * 21, "1d"),
+])
+def test_unsafe_keys_are_rejected(ticker, interval):
+    with pytest.raises(ValueError):
+        check_key(ticker, interval)
+
+
+@pytest.mark.parametrize("ticker", ["tcs.ns", "^NSEI", "M&M.NS", "BRK-B", "INR=X"])
+def test_real_tickers_are_accepted(ticker):
+    assert check_key(ticker, "1d") == ticker.upper()
+
+
+def test_store_paths_never_leave_the_root(tmp_path):
+    store = HistoryStore(str(tmp_path / "store"))
+    n = 3
+    frame = OHLCVFrame(np.datetime64("2026-01-05") + np.arange(n), np.zeros(n, np.int32),
+                       *(np.ones(n) for _ in range(4)), np.ones(n, np.int64), companies=["X"])
+    with pytest.raises(ValueError):
+        store.append("../../escape", "1d", frame)
+    with pytest.raises(ValueError):
+        store.read("TCS", "../../..")
+    assert not (tmp_path / "escape").exists()
+
+
+def test_endpoints_answer_400_for_bad_keys(yahoo):
+    from fastapi.testclient import TestClient
+    from web.server import app
+
+    with TestClient(app) as client:
+        assert client.get("/api/export", params={"tickers": "TCS", "interval": "../.."}).status_code == 400
+        assert client.get("/api/export", params={"tickers": "../..", "source": "store"}).status_code == 400
+        assert client.get("/api/live/TCS", params={"interval": "../../x"}).status_code == 400
+        assert client.get("/api/compare", params={"t1": "TCS", "t2": "..", "interval": "1d"}).status_code == 400
+    assert not yahoo.calls
+
+
+def _bars(start, n, close=100.0, ticker="TCS.NS"):
+    dates = np.datetime64(start, "D") + np.arange(n)
+    c = close + np.arange(n, dtype=np.float64)
+    return OHLCVFrame(dates, np.zeros(n, np.int32), c - 0.5, c + 1, c - 1, c,
+                      np.arange(n, dtype=np.int64) + 10, companies=[ticker])
+
+
+def _segments(root):
+    return sorted(p.relative_to(root).as_posix() for p in root.rglob("*.npy"))
+
+
+def _same(a: OHLCVFrame, b: OHLCVFrame):
+    assert len(a) == len(b)
+    assert (a.date.astype("datetime64[D]") == b.date.astype("datetime64[D]")).all()
+    for f in ("open", "high", "low", "close", "volume"):
+        assert (getattr(a, f) == getattr(b, f)).all(), f
+
+
+def test_append_partitions_by_year_and_reads_back(tmp_path):
+    store = HistoryStore(str(tmp_path))
+    frame = _bars("2025-12-20", 30)   # 12 days of 2025, 18 of 2026
+    assert store.append("tcs.ns", "1d", frame) == 30
+    assert store.years("TCS.NS") == [2025, 2026] and store.tickers() == ["TCS.NS"]
+    assert _segments(tmp_path) == ["1d/TCS.NS/2025/00000000.npy", "1d/TCS.NS/2026/00000000.npy"]
+    _same(store.read("TCS.NS"), frame)
+    assert store.first_date("TCS.NS") == np.datetime64("2025-12-20")
+
+
+def test_read_cuts_ranges_and_skips_other_years(tmp_path):
+    store = HistoryStore(str(tmp_path))
+    frame = _bars("2025-12-20", 30)
+    store.append("TCS.NS", "1d", frame)
+    _same(store.read("TCS.NS", start="2025-12-25", end="2026-01-03"), frame[5:15])
+    _same(store.read("TCS.NS", end="2025-12-21"), frame[:2])
+    assert not len(store.read("TCS.NS", start="2027-01-01"))
+    # a range inside 2026 never opens the 2025 partition
+    (tmp_path / "1d" / "TCS.NS" / "2025" / "00000001.npy").write_bytes(b"not a segment")
+    _same(store.read("TCS.NS", start="2026-01-01"), frame[12:])
+
+
+def test_newest_segment_wins_per_bar(tmp_path):
+    store = HistoryStore(str(tmp_path), compact_at=100)
+    store.append("TCS.NS", "1d", _bars("2026-01-01", 10))
+    store.append("TCS.NS", "1d", _bars("2026-01-08", 5, close=500.0))   # re-sent / revised tail
+    out = store.read("TCS.NS")
+    assert len(out) == 12 and (np.diff(out.date.astype(np.int64)) > 0).all()
+    assert out.close[:7].tolist() == [100.0 + i for i in range(7)]
+    assert out.close[7:].tolist() == [500.0 + i for i in range(5)]
+
+
+def test_duplicate_bars_within_one_append_keep_the_last(tmp_path):
+    store = HistoryStore(str(tmp_path))
+    a, b = _bars("2026-01-01", 3), _bars("2026-01-02", 1, close=7.0)
+    store.append("TCS.NS", "1d", OHLCVFrame.concat([a, b]))
+    assert store.read("TCS.NS").close.tolist() == [100.0, 7.0, 102.0]
+
+
+def test_auto_compaction_keeps_the_newest_values(tmp_path):
+    store = HistoryStore(str(tmp_path), compact_at=3)
+    store.append("TCS.NS", "1d", _bars("2026-01-01", 10))
+    store.append("TCS.NS", "1d", _bars("2026-01-05", 2, close=300.0))
+    assert len(_segments(tmp_path)) == 2 and store.compactions == 0
+    store.append("TCS.NS", "1d", _bars("2026-01-10", 3, close=900.0))
+    assert _segments(tmp_path) == ["1d/TCS.NS/2026/00000003.npy"] and store.compactions == 1
+    out = store.read("TCS.NS")
+    assert out.close.tolist() == [100, 101, 102, 103, 300, 301, 106, 107, 108, 900, 901, 902]
+
+
+def test_explicit_compact_merges_every_partition(tmp_path):
+    store = HistoryStore(str(tmp_path), compact_at=100)
+    for ticker in ("TCS.NS", "INFY.NS"):
+        store.append(ticker, "1d", _bars("2025-12-30", 5, ticker=ticker))
+        store.append(ticker, "1d", _bars("2026-01-02", 3, close=50.0, ticker=ticker))
+    store.append("TCS.NS", "1wk", _bars("2026-01-01", 2))
+    before = {t: store.read(t) for t in ("TCS.NS", "INFY.NS")}
+    assert store.compact(interval="1d", ticker="INFY.NS") == 1   # only 2026 has two segments
+    assert store.compact() == 1
+    assert store.compact() == 0
+    assert _segments(tmp_path) == [
+        "1d/INFY.NS/2025/00000000.npy", "1d/INFY.NS/2026/00000002.npy",
+        "1d/TCS.NS/2025/00000000.npy", "1d/TCS.NS/2026/00000002.npy", "1wk/TCS.NS/2026/00000000.npy",
+    ]
+    for t, frame in before.items():
+        _same(store.read(t), frame)
+
+
+def test_bar_store_seeds_from_disk_and_fetches_only_the_delta(tmp_path):
+    from web.bars import BarStore
+
+    today = np.datetime64("today", "D")
+    history = HistoryStore(str(tmp_path))
+    history.append("TCS.NS", "1d", _bars(today - 400, 400))   # up to yesterday
+    calls = []
+
+    def fetch(ticker, period="6mo", interval="1d", start=None):
+        calls.append((period, start))
+        return _bars(today - 1, 2, close=1000.0) if start is not None else _bars(today - 3000, 3001)
+
+    store = BarStore(fetch, history=history)
+    frame = store.get("TCS.NS", "1y")
+    assert store.disk_loads == 1 and store.full_fetches == 0
+    assert calls == [("6mo", (today - 1).item())]   # only the bars since the last stored day
+    assert frame.date[-1] == today and frame.close[-2:].tolist() == [1000.0, 1001.0]
+    # the delta was persisted too
+    assert history.read("TCS.NS").close[-2:].tolist() == [1000.0, 1001.0]
+
+    # a period reaching before the stored history still needs a full fetch
+    cold = BarStore(fetch, history=history)
+    cold.get("TCS.NS", "10y")
+    assert cold.disk_loads == 0 and cold.full_fetches == 1
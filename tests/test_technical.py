@@ -0,0 +1,34 @@
+import pytest
+
+from core.technical import parse_specs
+
+
+@pytest.mark.parametrize("query", ["sma:2.5", "sma:inf", "sma:nan", "sma:0", "bb:20:nan", "bb:20:-inf", "rsi:x"])
+def test_bad_indicator_params_are_rejected(query):
+    with pytest.raises(ValueError):
+        parse_specs(query)
+
+
+def test_indicator_params_parse():
+    sma, bb = parse_specs("sma:10,bb:20:2.5")
+    assert sma.params == {"window": 10} and isinstance(sma.params["window"], int)
+    assert bb.params == {"window": 20, "k": 2.5} and bb.label == "bb:20:2.5"
+
+
+def test_bollinger_matches_pandas_on_a_long_low_volatility_series():
+    import numpy as np
+    import pandas as pd
+
+    from core.technical import Context, compute
+
+    rng = np.random.default_rng(7)
+    close = 2500.0 + np.cumsum(rng.normal(0, 0.01, 50_000))
+    ctx = Context(close, close, close, close, np.ones_like(close))
+    bands = compute(ctx, parse_specs("bb:20:2"), decimals=8)["bb"]["values"]
+
+    s = pd.Series(close).rolling(20)
+    mid, std = s.mean().to_numpy(), s.std(ddof=0).to_numpy()
+    width = np.array(bands["upper"][19:], dtype=float) - np.array(bands["lower"][19:], dtype=float)
+    assert bands["upper"][:19] == [None] * 19
+    np.testing.assert_allclose(np.array(bands["mid"][19:], dtype=float), mid[19:], atol=1e-8)
+    np.testing.assert_allclose(width, 4 * std[19:], atol=1e-7)
@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from web.upload import UploadAggregator, UploadTooLarge
+
+
+def _csv(n):
+    rows = "".join(f"2024-01-{i % 28 + 1:02d},1,2,0.5,{100 + (i % 17) * 0.37:.2f},{100 + i}\n" for i in range(n))
+    return ("date,open,high,low,close,volume\n" + rows).encode()
+
+
+def _feed(agg, data, chunk=1000):
+    for i in range(0, len(data), chunk):
+        agg.feed(data[i:i + chunk])
+    agg.close()
+    return agg.result("a.csv")
+
+
+def test_default_upload_returns_every_bar():
+    out = _feed(UploadAggregator(), _csv(5000))
+    closes = pd.Series([r["close"] for r in out["records"]])
+    assert out["rows"] == len(out["records"]) == 5000 and not out["downsampled"]
+    assert out["analytics"]["ma"][20] == np.round(closes.rolling(20, min_periods=1).mean(), 4).tolist()
+    assert out["analytics"]["ema"][5] == np.round(closes.ewm(span=5, adjust=False).mean(), 4).tolist()
+
+
+def test_max_points_opts_in_to_a_thinned_series():
+    out = _feed(UploadAggregator(max_points=500), _csv(5000))
+    assert out["rows"] == 5000 and out["downsampled"]
+    assert len(out["records"]) == len(out["analytics"]["ma"][5]) == 500
+
+
+def test_full_records_are_capped():
+    with pytest.raises(UploadTooLarge):
+        _feed(UploadAggregator(max_records=1000), _csv(1001))
+    out = _feed(UploadAggregator(max_records=1000, max_points=100), _csv(5000))
+    assert out["rows"] == 5000 and len(out["records"]) == 100
@@ -1,39 +1,92 @@
+import io
 import os
-from typing import List, Optional
-import matplotlib.pyplot as plt
-from matplotlib.patches import Rectangle
+from typing import List, Optional, Tuple, Union
+import numpy as np
 import matplotlib.dates as mdates
+from matplotlib.collections import LineCollection, PolyCollection
+from core.frame import OHLCVFrame
 from core.models import Record
 
-def plot_candles(records: List[Record], title: str = "", save_path: Optional[str] = None, show: bool = True):
-    """
-    Simple candlestick: wick = (low, high), body = (open, close).
-    Time: O(k)
-    """
-    if not records:
-        print("[plot_candles] No records to plot.")
-        return None
+UP_COLOR = "tab:green"
+DOWN_COLOR = "tab:red"
+BODY_WIDTH = 0.6          # fraction of the bar spacing
+MIN_BODY = 0.2            # flat bars still get a visible body
+PX_PER_CANDLE = 3         # decimation target: at least this many pixels per candle
+FIGSIZE = (10, 4)
+DPI = 150
+
+
+def _columns(records: Union[List[Record], OHLCVFrame]) -> Tuple[np.ndarray, ...]:
+    """x (matplotlib date numbers), open, high, low, close as arrays."""
+    if isinstance(records, OHLCVFrame):
+        return (mdates.date2num(records.date), records.open, records.high, records.low, records.close)
+    n = len(records)
+    x = mdates.date2num([r.date for r in records])
+    cols = [np.fromiter((getattr(r, f) for r in records), np.float64, n) for f in ("open", "high", "low", "close")]
+    return (np.asarray(x, dtype=np.float64), *cols)
+
+
+def _decimate(x, o, h, l, c, max_bars: int):
+    """Merge runs of consecutive bars into at most max_bars candles (OHLC semantics)."""
+    n = len(x)
+    if n <= max_bars:
+        return x, o, h, l, c
+    per = -(-n // max_bars)
+    starts = np.arange(0, n, per)
+    ends = np.minimum(starts + per, n) - 1
+    return x[starts], o[starts], np.maximum.reduceat(h, starts), np.minimum.reduceat(l, starts), c[ends]
+
+
+def candle_collections(x, o, h, l, c, width: float) -> Tuple[LineCollection, PolyCollection]:
+    """All wicks as one LineCollection, all bodies as one PolyCollection."""
+    up = c >= o
+    colors = np.where(up, UP_COLOR, DOWN_COLOR)
+
+    wicks = np.empty((len(x), 2, 2))
+    wicks[:, 0, 0] = wicks[:, 1, 0] = x
+    wicks[:, 0, 1], wicks[:, 1, 1] = l, h
+
+    lower = np.minimum(o, c)
+    height = np.abs(c - o)
+    height[height == 0] = MIN_BODY
+    left, right, top = x - width / 2, x + width / 2, lower + height
+    bodies = np.stack([
+        np.column_stack([left, lower]), np.column_stack([left, top]),
+        np.column_stack([right, top]), np.column_stack([right, lower]),
+    ], axis=1)
+
+    return (LineCollection(wicks, colors=colors, linewidths=1),
+            PolyCollection(bodies, facecolors=colors, edgecolors="none", alpha=0.85))
+
 
-    records = sorted(records, key=lambda r: r.date)
-    xs = [mdates.date2num(r.date) for r in records]
+def _new_figure(show: bool, figsize=FIGSIZE):
+    if show:
+        import matplotlib.pyplot as plt
+        return plt.figure(figsize=figsize)
+    # save-only: plain Figure on the Agg canvas, no pyplot / GUI backend involved
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    return fig
 
-    fig, ax = plt.subplots(figsize=(10, 4))
 
-    for x, r in zip(xs, records):
-        up = r.close >= r.open
-        color = "tab:green" if up else "tab:red"
+def _draw(fig, records, title: str, max_candles: Optional[int]):
+    x, o, h, l, c = _columns(records)
+    if len(x) > 1 and not np.all(x[1:] >= x[:-1]):
+        order = np.argsort(x, kind="stable")
+        x, o, h, l, c = x[order], o[order], h[order], l[order], c[order]
 
-        # wick
-        ax.plot([x, x], [r.low, r.high], linewidth=1)
+    if max_candles:
+        x, o, h, l, c = _decimate(x, o, h, l, c, max_candles)
+    spacing = float(np.median(np.diff(x))) if len(x) > 1 else 1.0   # 1 day, or the span of a merged candle
+    width = BODY_WIDTH * spacing
 
-        # body
-        width = 0.6  # day width
-        lower = min(r.open, r.close)
-        height = abs(r.close - r.open)
-        if height == 0:
-            height = 0.2  # tiny body so flat days are visible
-        rect = Rectangle((x - width / 2, lower), width, height, color=color, alpha=0.85, linewidth=0)
-        ax.add_patch(rect)
+    ax = fig.add_subplot(1, 1, 1)
+    wicks, bodies = candle_collections(x, o, h, l, c, width)
+    ax.add_collection(wicks)
+    ax.add_collection(bodies)
+    ax.autoscale_view()
 
     ax.set_title(title or "Candlestick")
     ax.set_xlabel("Date"); ax.set_ylabel("Price")
@@ -42,13 +95,53 @@ def plot_candles(records: List[Record], title: str = "", save_path: Optional[str
     ax.xaxis.set_major_formatter(mdates.DateFormatter("%Y-%m-%d"))
     fig.autofmt_xdate()
 
+
+def plot_candles(records: Union[List[Record], OHLCVFrame], title: str = "", save_path: Optional[str] = None,
+                 show: bool = True, decimate: bool = True):
+    """
+    Candlestick: wick = (low, high), body = (open, close).
+    Accepts List[Record] or an OHLCVFrame. Input already in date order is not
+    re-sorted; with `decimate` consecutive bars are merged so there are at most
+    figure-width / PX_PER_CANDLE candles when saved at DPI.
+    Time: O(k) NumPy work, two artists regardless of k.
+    """
+    if not len(records):
+        print("[plot_candles] No records to plot.")
+        return None
+
+    fig = _new_figure(show)
+    _draw(fig, records, title, int(FIGSIZE[0] * DPI // PX_PER_CANDLE) if decimate else None)
+
     if save_path:
-        os.makedirs(os.path.dirname(save_path), exist_ok=True)
+        os.makedirs(os.path.dirname(save_path) or ".", exist_ok=True)
         fig.tight_layout()
-        fig.savefig(save_path, dpi=150)
+        fig.savefig(save_path, dpi=DPI)
         print(f"[plot_candles] Saved: {save_path}")
 
     if show:
+        import matplotlib.pyplot as plt
         plt.show()
 
     return fig
+
+
+def render_png(records: Union[List[Record], OHLCVFrame], title: str = "",
+               width: int = 640, height: int = 320, dpi: int = 100) -> bytes:
+    """
+    Headless render to PNG bytes of width x height pixels (thumbnails, HTTP).
+    Fonts shrink with the image so small thumbnails keep room for the candles.
+    """
+    import warnings
+    from matplotlib import rc_context
+
+    font = max(5.0, min(10.0, width / 64, height / 32))
+    with rc_context({"font.size": font}):
+        fig = _new_figure(False, figsize=(width / dpi, height / dpi))
+        if len(records):
+            _draw(fig, records, title, max(1, width // PX_PER_CANDLE))
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", UserWarning)   # tiny sizes: tight_layout does what it can
+                fig.tight_layout()
+        buf = io.BytesIO()
+        fig.savefig(buf, format="png", dpi=dpi)
+    return buf.getvalue()
@@ -0,0 +1,192 @@
+import asyncio
+import hashlib
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Dict, Optional, Tuple
+import numpy as np
+from core.batch import SharedFrame, attach
+from core.frame import OHLCVFrame
+from core.metrics import REGISTRY, stage
+
+# Chart rendering service: candlestick PNGs rendered by viz.candlestick.render_png
+# in a process pool (matplotlib is not thread-safe) and kept in a
+# content-addressed disk cache. The cache key doubles as the HTTP ETag.
+
+CHART_CACHE_DIR = os.getenv("CHART_CACHE_DIR", os.path.join("out", "chart_cache"))
+CHART_CACHE_MAX_FILES = int(os.getenv("CHART_CACHE_MAX_FILES", "5000"))
+CHART_WORKERS = int(os.getenv("CHART_WORKERS", str(min(4, os.cpu_count() or 1))))   # 0 = render in-process
+DEFAULT_SIZE = (640, 320)
+MAX_SIDE = 2400
+_PRUNE_EVERY = 100
+
+_pool: Optional[ProcessPoolExecutor] = None
+_inline_lock = threading.Lock()
+
+
+def data_version(frame: OHLCVFrame) -> str:
+    """Fingerprint of the bars themselves: same bars -> same version, whatever the source."""
+    h = hashlib.blake2b(digest_size=8)
+    for col in (frame.date, frame.open, frame.high, frame.low, frame.close, frame.volume):
+        h.update(col.dtype.str.encode())
+        h.update(np.ascontiguousarray(col).view(np.uint8))
+    return h.hexdigest()
+
+
+def chart_key(ticker: str, start, end, version: str, size: Tuple[int, int]) -> str:
+    raw = "|".join([ticker.strip().upper(), str(start or ""), str(end or ""), version, f"{size[0]}x{size[1]}"])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]
+
+
+class ChartCache:
+    """PNG files under dir/<key[:2]>/<key>.png; oldest files pruned past max_files."""
+
+    def __init__(self, directory: str = CHART_CACHE_DIR, max_files: int = CHART_CACHE_MAX_FILES):
+        self.directory = directory
+        self.max_files = max_files
+        self._puts = 0
+        self.hits = self.misses = 0
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key + ".png")
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            with open(self.path(key), "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return data
+
+    def put(self, key: str, png: bytes) -> None:
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(png)
+        os.replace(tmp, path)   # atomic: readers never see a half-written file
+        self._puts += 1
+        if self._puts % _PRUNE_EVERY == 0:
+            self.prune()
+
+    def prune(self) -> int:
+        files = []
+        for root, _, names in os.walk(self.directory):
+            files += [os.path.join(root, n) for n in names if n.endswith(".png")]
+        extra = len(files) - self.max_files
+        if extra <= 0:
+            return 0
+        files.sort(key=lambda p: os.stat(p).st_mtime)
+        for p in files[:extra]:
+            try:
+                os.remove(p)
+            except FileNotFoundError:
+                pass
+        return extra
+
+    def stats(self) -> dict:
+        return {"dir": self.directory, "hits": self.hits, "misses": self.misses, "max_files": self.max_files}
+
+
+CHART_CACHE = ChartCache()
+REGISTRY.register_collector(lambda: [
+    ("chart_cache_lookups", "counter", "Chart PNG cache lookups by result",
+     [("_total", {"result": "hit"}, CHART_CACHE.hits), ("_total", {"result": "miss"}, CHART_CACHE.misses)]),
+])
+
+
+# ---------- rendering ----------
+
+def _render_shared(ref: tuple, title: str, size: Tuple[int, int]) -> bytes:
+    from viz.candlestick import render_png
+
+    frame, shm = attach(ref)
+    try:
+        return render_png(frame, title, size[0], size[1])
+    finally:
+        del frame
+        shm.close()
+
+
+def _render_inline(frame: OHLCVFrame, title: str, size: Tuple[int, int]) -> bytes:
+    from viz.candlestick import render_png
+
+    with _inline_lock:
+        return render_png(frame, title, size[0], size[1])
+
+
+def _executor() -> Optional[Executor]:
+    global _pool
+    if CHART_WORKERS <= 0:
+        return None
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=CHART_WORKERS, mp_context=get_context("spawn"))
+    return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+        _pool = None
+
+
+_inflight: Dict[str, asyncio.Task] = {}
+
+
+def _retrieve(task: asyncio.Task) -> None:
+    # mark a failed render's exception retrieved when every waiter has gone away
+    if not task.cancelled():
+        task.exception()
+
+
+async def render_chart(ticker: str, frame: OHLCVFrame, start=None, end=None,
+                       size: Tuple[int, int] = DEFAULT_SIZE, cache: ChartCache = CHART_CACHE,
+                       key: Optional[str] = None) -> Tuple[bytes, str]:
+    """
+    (png, key) for `frame` (already cut to [start, end]). Served from the cache
+    when the same bars were rendered at the same size before; concurrent
+    requests for one key share a single render.
+    """
+    key = key or chart_key(ticker, start, end, data_version(frame), size)
+    png = await asyncio.to_thread(cache.get, key)
+    if png is not None:
+        return png, key
+    task = _inflight.get(key)
+    if task is None:
+        # the module owns the render: a caller that goes away (client disconnect,
+        # timeout) cancels only its own wait, never the render others share, and
+        # the shared-memory segment outlives the pool worker reading it
+        task = _inflight[key] = asyncio.get_running_loop().create_task(_render(key, ticker, frame, size, cache))
+        task.add_done_callback(_retrieve)
+    return await asyncio.shield(task), key
+
+
+async def _render(key: str, ticker: str, frame: OHLCVFrame, size: Tuple[int, int], cache: ChartCache) -> bytes:
+    try:
+        title = f"{ticker} ({frame.first_date()} → {frame.last_date()})" if len(frame) else ticker
+        pool = _executor()
+        with stage("chart_render"):
+            if pool is None:
+                png = await asyncio.to_thread(_render_inline, frame, title, size)
+            else:
+                with SharedFrame(frame) as shared:
+                    png = await asyncio.wrap_future(pool.submit(_render_shared, shared.ref(), title, size))
+        await asyncio.to_thread(cache.put, key, png)
+        return png
+    finally:
+        _inflight.pop(key, None)
+
+
+def parse_size(text: str) -> Tuple[int, int]:
+    """'640x320' -> (640, 320); ValueError outside 16..MAX_SIDE."""
+    try:
+        w, h = (int(v) for v in text.lower().split("x"))
+    except ValueError:
+        raise ValueError(f"Invalid size '{text}', expected WIDTHxHEIGHT")
+    if not (16 <= w <= MAX_SIDE and 16 <= h <= MAX_SIDE):
+        raise ValueError(f"width/height must be between 16 and {MAX_SIDE}")
+    return w, h
@@ -0,0 +1,174 @@
+import threading
+from collections import OrderedDict
+from datetime import date, timedelta
+from typing import Callable, Optional, Tuple
+import numpy as np
+from core.frame import OHLCVFrame
+from core.rollups import SeriesRollup
+from core.store import HistoryStore
+
+# Per-(ticker, interval) bar history. A refresh asks the upstream only for the
+# window after the last stored bar, merges it (dedup on date, newest wins, so a
+# still-forming last bar gets replaced) and `period` is served as a slice.
+# The summary rollups per series are kept in step with every merge. With a
+# HistoryStore, fetched bars are also persisted, and a cold series is seeded
+# from disk so only the bars since the last run are fetched.
+
+PERIOD_DAYS = {
+    "1d": 1, "5d": 5, "1mo": 31, "3mo": 92, "6mo": 183,
+    "1y": 366, "2y": 731, "5y": 1827, "10y": 3653,
+}
+SESSION_PERIODS = {"1d": 1, "5d": 5}   # Yahoo counts these in trading sessions, not calendar days
+
+
+def period_start(period: str, today: Optional[date] = None) -> Optional[date]:
+    """First calendar day covered by a yfinance-style period; None means 'max'."""
+    today = today or date.today()
+    p = (period or "6mo").strip().lower()
+    if p == "max":
+        return None
+    if p == "ytd":
+        return date(today.year, 1, 1)
+    return today - timedelta(days=PERIOD_DAYS.get(p, 183))
+
+
+def period_index(frame: OHLCVFrame, period: str, today: Optional[date] = None) -> int:
+    """
+    Index of the first bar of `frame` inside `period`. 1d / 5d are the last one /
+    five sessions held (so a weekend or holiday still gets the last session's
+    bars, as from Yahoo); longer periods are calendar cutoffs from period_start.
+    """
+    if not len(frame):
+        return 0
+    sessions = SESSION_PERIODS.get((period or "").strip().lower())
+    if sessions:
+        days = frame.date.astype("datetime64[D]")
+        starts = np.flatnonzero(np.r_[True, days[1:] != days[:-1]])
+        return int(starts[-sessions]) if len(starts) >= sessions else 0
+    need_from = period_start(period, today)
+    if need_from is None:
+        return 0
+    return int(np.searchsorted(frame.date, np.datetime64(need_from, "D").astype(frame.date.dtype)))
+
+
+class _Series:
+    __slots__ = ("frame", "covered_from", "lock", "rollup")
+
+    def __init__(self):
+        self.frame = OHLCVFrame.empty()
+        self.rollup: Optional[SeriesRollup] = None
+        self.covered_from: Optional[date] = None   # None + empty frame = nothing fetched yet
+        self.lock = threading.Lock()
+
+
+class BarStore:
+    """
+    fetch(ticker, period, interval, start) -> OHLCVFrame is the upstream call
+    (web.data_live.fetch_yf_frame). get() is blocking; call it from a worker thread.
+    """
+
+    def __init__(self, fetch: Callable[..., OHLCVFrame], max_series: int = 512,
+                 history: Optional[HistoryStore] = None):
+        self._fetch = fetch
+        self.history = history
+        self.max_series = max_series
+        self._series: "OrderedDict[Tuple[str, str], _Series]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.full_fetches = self.delta_fetches = self.disk_loads = 0
+
+    def _slot(self, ticker: str, interval: str) -> _Series:
+        key = (ticker, interval)
+        with self._lock:
+            s = self._series.get(key)
+            if s is None:
+                s = self._series[key] = _Series()
+                while len(self._series) > self.max_series:
+                    self._series.popitem(last=False)
+            self._series.move_to_end(key)
+            return s
+
+    def get(self, ticker: str, period: str = "6mo", interval: str = "1d") -> OHLCVFrame:
+        need_from = period_start(period)
+        s = self._slot(ticker, interval)
+        with s.lock:
+            if not self._covers(s, need_from) and not self._load_history(s, ticker, interval, need_from):
+                frame = self._fetch(ticker, period=period, interval=interval)
+                self.full_fetches += 1
+                if len(frame):
+                    self._reset(s, frame, need_from)
+                    self._persist(ticker, interval, frame)
+            else:
+                self._refresh(s, ticker, interval)
+            return s.frame[period_index(s.frame, period):]
+
+    @staticmethod
+    def _reset(s: _Series, frame: OHLCVFrame, covered_from: Optional[date]) -> None:
+        s.frame, s.covered_from = frame, covered_from
+        s.rollup = SeriesRollup.from_frame(frame)
+
+    def _load_history(self, s: _Series, ticker: str, interval: str, need_from: Optional[date]) -> bool:
+        """Seed an empty series from disk when the stored bars reach back to need_from."""
+        if self.history is None or len(s.frame) or need_from is None:
+            return False
+        first = self.history.first_date(ticker, interval)
+        if first is None or first.astype("datetime64[D]") > np.datetime64(need_from, "D"):
+            return False
+        self._reset(s, self.history.read(ticker, interval), need_from)
+        self.disk_loads += 1
+        return True
+
+    def _persist(self, ticker: str, interval: str, frame: OHLCVFrame) -> None:
+        if self.history is None:
+            return
+        try:
+            self.history.append(ticker, interval, frame)
+        except OSError:   # a full / read-only disk must not fail the request
+            pass
+
+    @staticmethod
+    def _covers(s: _Series, need_from: Optional[date]) -> bool:
+        if not len(s.frame):
+            return False
+        if s.covered_from is None:      # holds 'max'
+            return True
+        return need_from is not None and s.covered_from <= need_from
+
+    def _refresh(self, s: _Series, ticker: str, interval: str) -> None:
+        last_day = s.frame.date[-1].astype("datetime64[D]").item()
+        delta = self._fetch(ticker, interval=interval, start=last_day)
+        self.delta_fetches += 1
+        if not len(delta):
+            return
+        self._persist(ticker, interval, delta)
+        merged = merge_bars(s.frame, delta)
+        try:
+            s.rollup.extend(delta, keep=len(merged) - len(delta))
+        except Exception:   # never leave the rollup out of step with the frame
+            s.rollup = SeriesRollup.from_frame(merged)
+        s.frame = merged
+
+    def summary(self, ticker: str, interval: str, frame: OHLCVFrame) -> Optional[dict]:
+        """
+        Rollup summary ({"count", "avg_volume", "summary"}) for `frame`, a slice
+        previously returned by get(). None when the stored series no longer holds
+        exactly those bars (evicted, or refreshed since), so callers fall back to
+        scanning the frame.
+        """
+        with self._lock:
+            s = self._series.get((ticker, interval))
+        if s is None or not len(frame):
+            return None
+        with s.lock:
+            if s.rollup is None:
+                return None
+            i = int(np.searchsorted(s.frame.date, frame.date[0]))
+            j = i + len(frame)
+            if j > len(s.frame) or s.frame.date[j - 1] != frame.date[-1] or s.rollup.close_at(j - 1) != frame.close[-1]:
+                return None
+            return s.rollup.summary(i, j)
+
+
+def merge_bars(old: OHLCVFrame, new: OHLCVFrame) -> OHLCVFrame:
+    """Keep old bars strictly before new's first bar, then all of `new` (dedup on date)."""
+    cut = int(np.searchsorted(old.date, new.date[0].astype(old.date.dtype), side="left"))
+    return OHLCVFrame.concat([old[:cut], new])
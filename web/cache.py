@@ -0,0 +1,156 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+from core.metrics import REGISTRY
+
+# In-process market-data cache: interval-aware TTL, LRU eviction bounded by an
+# approximate byte budget, and request coalescing for concurrent misses.
+
+INTRADAY_TTL = 60.0          # 1m..90m / 1h bars are still forming
+DAILY_TTL = 15 * 60.0        # 1d / 5d bars: last bar moves until the close
+LONG_TTL = 6 * 60 * 60.0     # 1wk / 1mo / 3mo
+BAR_BYTES = 400              # rough size of one {date, o, h, l, c, v} dict
+
+
+def ttl_for(interval: str) -> float:
+    iv = (interval or "1d").strip().lower()
+    if iv.endswith("m") and not iv.endswith("mo") or iv.endswith("h"):
+        return INTRADAY_TTL
+    if iv in ("1d", "5d"):
+        return DAILY_TTL
+    return LONG_TTL
+
+
+def _sizeof(value: Any) -> int:
+    nbytes = getattr(value, "nbytes", None)
+    if nbytes is not None:
+        return int(nbytes)
+    if isinstance(value, (list, tuple)):
+        return 64 + BAR_BYTES * len(value)
+    return 256
+
+
+def _retrieve(task: asyncio.Task) -> None:
+    # mark a failed fetch's exception retrieved when every waiter has gone away
+    if not task.cancelled():
+        task.exception()
+
+
+class MarketCache:
+    """
+    LRU + TTL cache. Keys are (source, ticker, period, interval) tuples.
+    get_or_fetch() makes concurrent misses for the same key share one upstream call.
+    Empty results are not cached (a timeout should not pin "no data").
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._data: "OrderedDict[Hashable, Tuple[Any, float, int]]" = OrderedDict()  # key -> (value, expires, size)
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.bytes = 0
+        self.hits = self.misses = self.evictions = self.expirations = self.coalesced = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        value, expires, size = item
+        if expires < time.monotonic():
+            self._drop(key)
+            self.expirations += 1
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def put(self, key: Hashable, value: Any, ttl: float) -> None:
+        if key in self._data:
+            self._drop(key)
+        size = _sizeof(value)
+        if size > self.max_bytes:
+            return
+        self._data[key] = (value, time.monotonic() + ttl, size)
+        self.bytes += size
+        while self.bytes > self.max_bytes:
+            oldest = next(iter(self._data))
+            self._drop(oldest)
+            self.evictions += 1
+
+    def _drop(self, key: Hashable) -> None:
+        _, _, size = self._data.pop(key)
+        self.bytes -= size
+
+    async def get_or_fetch(self, key: Hashable, fetch: Callable[[], Awaitable[Any]], ttl: float) -> Any:
+        value = self.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            # the cache owns the fetch: a caller that goes away (client disconnect)
+            # cancels only its own wait, never the fetch the others are sharing
+            task = self._inflight[key] = asyncio.get_running_loop().create_task(self._fill(key, fetch, ttl))
+            task.add_done_callback(_retrieve)
+        return await asyncio.shield(task)
+
+    async def _fill(self, key: Hashable, fetch: Callable[[], Awaitable[Any]], ttl: float) -> Any:
+        try:
+            value = await fetch()
+            if value:
+                self.put(key, value, ttl)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    async def refresh(self, key: Hashable, fetch: Callable[[], Awaitable[Any]], ttl: float) -> Any:
+        """
+        Fetch now and replace the entry (background prefetch). Readers keep getting
+        the old value meanwhile; an empty result keeps it too.
+        """
+        value = await fetch()
+        if value:
+            self.put(key, value, ttl)
+            return value
+        return self.get(key)
+
+    def clear(self) -> None:
+        self._data.clear()
+        self.bytes = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "entries": len(self._data),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_ratio": round((self.hits + self.coalesced) / lookups, 4) if lookups else None,
+        }
+
+
+CACHE = MarketCache(max_bytes=int(float(os.getenv("MARKET_CACHE_MB", "64")) * 1024 * 1024))
+
+
+def _collect(cache: MarketCache = CACHE):
+    s = cache.stats()
+    return [
+        ("market_cache_lookups", "counter", "Market cache lookups by result",
+         [("_total", {"result": "hit"}, s["hits"]), ("_total", {"result": "miss"}, s["misses"]),
+          ("_total", {"result": "coalesced"}, s["coalesced"])]),
+        ("market_cache_removals", "counter", "Entries dropped from the market cache",
+         [("_total", {"reason": "evicted"}, s["evictions"]), ("_total", {"reason": "expired"}, s["expirations"])]),
+        ("market_cache_entries", "gauge", "Entries in the market cache", [("", {}, s["entries"])]),
+        ("market_cache_bytes", "gauge", "Approximate size of the market cache", [("", {}, s["bytes"])]),
+        ("market_cache_hit_ratio", "gauge", "(hits + coalesced) / lookups", [("", {}, s["hit_ratio"] or 0)]),
+    ]
+
+
+REGISTRY.register_collector(_collect)
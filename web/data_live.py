@@ -1,43 +1,64 @@
-import yfinance as yf
-import pandas as pd
+import numpy as np
+from core.frame import OHLCVFrame
+from core.indicators import DEFAULT_WINDOWS, ma_ema
 
-def fetch_yf_ohlc(ticker: str, period: str = "6mo", interval: str = "1d"):
+INTRADAY_INTERVALS = {"1m", "2m", "5m", "15m", "30m", "60m", "90m", "1h"}
+
+def fetch_yf_frame(ticker: str, period: str = "6mo", interval: str = "1d", start=None) -> OHLCVFrame:
     """
-    Yahoo Finance se OHLCV fetch.
-    Returns: list[dict] -> {date, open, high, low, close, volume}
-    Note: Indian stocks ke liye usually ticker ke end me '.NS' lagta hai (e.g., TCS.NS, RELIANCE.NS).
+    Yahoo Finance se OHLCV fetch, straight into a single-company OHLCVFrame.
+    `start` (date / 'YYYY-MM-DD') asks only for bars from that day on and overrides `period`.
+    Intraday intervals keep the bar time (exchange local time), daily ones keep the date.
     """
+    import pandas as pd
+    import yfinance as yf   # heavy (pulls pandas, requests, bs4): only on the fetch path
+
     t = ticker.strip().upper()
-    df = yf.download(t, period=period, interval=interval, auto_adjust=False, progress=False)
+    window = {"start": str(start)} if start is not None else {"period": period}
+    df = yf.download(t, interval=interval, auto_adjust=False, progress=False, **window)
     if df is None or df.empty:
-        return []
+        return OHLCVFrame.empty()
+    if isinstance(df.columns, pd.MultiIndex):
+        df.columns = df.columns.get_level_values(0)
 
     df = df.reset_index()
     date_col = "Date" if "Date" in df.columns else "Datetime"
-    df[date_col] = pd.to_datetime(df[date_col]).dt.date
-
-    out = []
-    for _, row in df.iterrows():
-        out.append({
-            "date": str(row[date_col]),
-            "open": float(row.get("Open", 0.0)),
-            "high": float(row.get("High", 0.0)),
-            "low": float(row.get("Low", 0.0)),
-            "close": float(row.get("Close", 0.0)),
-            "volume": int(row.get("Volume", 0) or 0),
-        })
-    return out
-
-def add_ma_ema(records, windows=(5, 10, 20)):
+    ts = pd.to_datetime(df[date_col])
+    if ts.dt.tz is not None:
+        ts = ts.dt.tz_localize(None)
+    unit = "datetime64[s]" if interval in INTRADAY_INTERVALS else "datetime64[D]"
+
+    def col(name, dtype):
+        if name not in df.columns:
+            return np.zeros(len(df), dtype=dtype)
+        return df[name].fillna(0).to_numpy(dtype=dtype)
+
+    return OHLCVFrame(
+        date=ts.to_numpy().astype(unit),
+        code=np.zeros(len(df), dtype=np.int32),
+        open=col("Open", np.float64), high=col("High", np.float64),
+        low=col("Low", np.float64), close=col("Close", np.float64),
+        volume=col("Volume", np.float64).astype(np.int64),
+        companies=[t],
+    )
+
+def fetch_yf_ohlc(ticker: str, period: str = "6mo", interval: str = "1d"):
+    """
+    Yahoo Finance se OHLCV fetch.
+    Returns: list[dict] -> {date, open, high, low, close, volume}
+    Note: Indian stocks ke liye usually ticker ke end me '.NS' lagta hai (e.g., TCS.NS, RELIANCE.NS).
+    """
+    return fetch_yf_frame(ticker, period=period, interval=interval).to_dicts()
+
+def add_ma_ema(records, windows=DEFAULT_WINDOWS, take=None):
     """
     Simple Moving Average (SMA) + Exponential Moving Average (EMA).
+    `records` may be list[dict] or an OHLCVFrame (closes are used directly, no copy).
+    `take`: bar indices to keep (values still come from the full series).
     Output: {"ma": {5:[...],10:[...],...}, "ema": {...}}
     """
-    if not records:
-        return {"ma": {}, "ema": {}}
-    closes = pd.Series([r["close"] for r in records], dtype="float64")
-    ma, ema = {}, {}
-    for w in windows:
-        ma[w] = list(closes.rolling(window=w, min_periods=1).mean().round(4))
-        ema[w] = list(closes.ewm(span=w, adjust=False).mean().round(4))
-    return {"ma": ma, "ema": ema}
+    if isinstance(records, OHLCVFrame):
+        closes = records.close
+    else:
+        closes = np.fromiter((r["close"] for r in records), np.float64, len(records))
+    return ma_ema(closes, windows, take=take)
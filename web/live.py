@@ -0,0 +1,275 @@
+import asyncio
+import os
+from collections import deque
+from datetime import date
+from typing import Awaitable, Callable, Deque, Dict, Iterable, Optional, Set, Tuple
+import numpy as np
+from core.frame import OHLCVFrame
+from core.indicators import IndicatorState
+from web.bars import period_index, period_start
+from web.data_live import add_ma_ema
+from web.prefetch import cadence, market_open
+from web.serialize import dumps, frame_columns
+
+# Server-pushed live bars (/ws/live). One _Feed per (ticker, interval) polls the
+# upstream on its own schedule, however many sockets subscribe. It diffs each
+# result against the bars it already holds and fans out ONE encoded message:
+#   {"type": "snapshot", "columns": {...}, "ma": {...}, "ema": {...}, ...}
+#       the subscriber's whole window, sent on subscribe and on resync
+#   {"type": "delta", "from": <date>, "bars": {...}, "ma": {...}, "ema": {...}, ...}
+#       the client replaces its bars from `from` on with `bars`: new bars and the
+#       re-sent forming bar. MA/EMA values for those bars come from a rolling
+#       IndicatorState, O(new bars) per poll.
+# Every subscriber has a bounded send backlog. A consumer that falls LIVE_QUEUE
+# messages behind loses the backlog and gets a fresh snapshot instead
+# (latest wins), so a slow socket never holds the feed or other clients back.
+#   LIVE_POLL_SECONDS   poll period while NSE is open (closed: web.prefetch cadence)
+#   LIVE_QUEUE          per-subscriber backlog before a resync
+#   LIVE_MAX_TICKERS    subscriptions per socket
+
+LIVE_POLL_SECONDS = float(os.getenv("LIVE_POLL_SECONDS", "15"))
+LIVE_QUEUE = int(os.getenv("LIVE_QUEUE", "32"))
+LIVE_MAX_TICKERS = int(os.getenv("LIVE_MAX_TICKERS", "20"))
+
+FeedKey = Tuple[str, str]   # (ticker, interval)
+Poll = Callable[[str, str, str], Awaitable[Optional[OHLCVFrame]]]
+
+
+def _from(period: str) -> date:
+    return period_start(period) or date.min   # 'max' reaches furthest back
+
+
+def poll_seconds() -> float:
+    return LIVE_POLL_SECONDS if market_open() else cadence()
+
+
+def changed_from(old: OHLCVFrame, new: OHLCVFrame) -> int:
+    """
+    Index of the first bar of `new` that `old` does not hold unchanged; 0 when
+    the two do not start at the same bar (nothing to diff against).
+    """
+    if not len(old) or not len(new) or new.date[0] != old.date[0].astype(new.date.dtype):
+        return 0
+    n = min(len(old), len(new))
+    same = old.date[:n] == new.date[:n]
+    for f in ("open", "high", "low", "close", "volume"):
+        same &= getattr(old, f)[:n] == getattr(new, f)[:n]
+    diff = np.flatnonzero(~same)
+    return int(diff[0]) if len(diff) else n
+
+
+class Subscriber:
+    """One socket: its subscriptions and a bounded, latest-wins send backlog."""
+
+    def __init__(self, send: Callable[[str], Awaitable[None]], max_pending: int = LIVE_QUEUE):
+        self.send = send
+        self.max_pending = max_pending
+        self.feeds: Dict[FeedKey, str] = {}          # key -> period
+        self._pending: Deque[Tuple[Optional[FeedKey], Optional[str]]] = deque()
+        self._resync: Set[FeedKey] = set()
+        self._ready = asyncio.Event()
+        self.sent = self.dropped = 0
+
+    def push(self, key: Optional[FeedKey], text: str) -> None:
+        if key is not None and key in self._resync:
+            return   # a snapshot is queued for this feed; it will include this
+        if len(self._pending) >= self.max_pending:
+            self.dropped += len(self._pending)
+            self._pending.clear()
+            self._resync.clear()
+            for k in self.feeds:
+                self.resync(k)
+            return
+        self._pending.append((key, text))
+        self._ready.set()
+
+    def resync(self, key: FeedKey) -> None:
+        """Queue a snapshot of `key`, built when it is sent (so it is never stale)."""
+        if key not in self._resync:
+            self._resync.add(key)
+            self._pending.append((key, None))
+            self._ready.set()
+
+    async def next(self) -> Tuple[Optional[FeedKey], Optional[str]]:
+        while not self._pending:
+            self._ready.clear()
+            await self._ready.wait()
+        return self._pending.popleft()
+
+
+class _Feed:
+    __slots__ = ("ticker", "interval", "subscribers", "frame", "covered_from", "seq",
+                 "state", "lock", "task", "_snapshots")
+
+    def __init__(self, ticker: str, interval: str):
+        self.ticker, self.interval = ticker, interval
+        self.subscribers: Set[Subscriber] = set()
+        self.frame = OHLCVFrame.empty()
+        self.covered_from: Optional[date] = None
+        self.seq = 0
+        self.state: Optional[IndicatorState] = None
+        self.lock = asyncio.Lock()
+        self.task: Optional[asyncio.Task] = None
+        self._snapshots: Dict[str, Tuple[int, str]] = {}   # period -> (seq, encoded)
+
+    @property
+    def key(self) -> FeedKey:
+        return self.ticker, self.interval
+
+    def widest(self) -> str:
+        periods = [s.feeds[self.key] for s in self.subscribers if self.key in s.feeds]
+        return min(periods, key=_from) if periods else "6mo"
+
+    def covers(self, period: str) -> bool:
+        return len(self.frame) > 0 and self.covered_from is not None and self.covered_from <= _from(period)
+
+    def snapshot(self, period: str) -> str:
+        cached = self._snapshots.get(period)
+        if cached is not None and cached[0] == self.seq:
+            return cached[1]
+        frame = self.frame
+        i = period_index(frame, period)
+        me = add_ma_ema(frame, take=np.arange(i, len(frame)))   # same basis as the deltas
+        text = dumps({
+            "type": "snapshot", "ticker": self.ticker, "interval": self.interval, "period": period,
+            "seq": self.seq, "columns": frame_columns(frame[i:]), "ma": me["ma"], "ema": me["ema"],
+        }).decode()
+        self._snapshots[period] = (self.seq, text)
+        return text
+
+
+class LiveHub:
+    """
+    poll(ticker, period, interval) fetches a series (a BarStore delta behind the
+    market cache, see web.sources.refresh_yf); an empty result means no data.
+    """
+
+    def __init__(self, poll: Poll, every: Callable[[], float] = poll_seconds):
+        self._poll = poll
+        self._every = every
+        self._feeds: Dict[FeedKey, _Feed] = {}
+        self.subscribers: Set[Subscriber] = set()
+        self.polls = self.deltas = self.snapshots = self.resyncs = self.dropped = 0
+
+    # ---------- subscriptions ----------
+
+    def connect(self, send: Callable[[str], Awaitable[None]]) -> Subscriber:
+        sub = Subscriber(send)
+        self.subscribers.add(sub)
+        return sub
+
+    def disconnect(self, sub: Subscriber) -> None:
+        self.unsubscribe(sub, list(sub.feeds))
+        self.subscribers.discard(sub)
+        self.dropped += sub.dropped
+
+    async def subscribe(self, sub: Subscriber, tickers: Iterable[str], period: str = "6mo",
+                        interval: str = "1d") -> None:
+        for ticker in tickers:
+            key = (ticker, interval)
+            feed = self._feeds.get(key)
+            if feed is None:
+                feed = self._feeds[key] = _Feed(ticker, interval)
+            sub.feeds[key] = period
+            feed.subscribers.add(sub)
+            async with feed.lock:
+                if not feed.covers(period):
+                    await self._poll_once(feed)
+            if key not in sub.feeds:
+                continue   # unsubscribed while the first poll was running
+            if not len(feed.frame):
+                sub.push(None, dumps({"type": "error", "ticker": ticker, "interval": interval,
+                                      "error": "No live data found"}).decode())
+                self.unsubscribe(sub, [key])
+                continue
+            sub.resync(key)
+            if feed.task is None:
+                feed.task = asyncio.get_running_loop().create_task(self._run(feed))
+
+    def unsubscribe(self, sub: Subscriber, keys: Iterable[FeedKey]) -> None:
+        for key in keys:
+            sub.feeds.pop(key, None)
+            feed = self._feeds.get(key)
+            if feed is None:
+                continue
+            feed.subscribers.discard(sub)
+            if not feed.subscribers:   # last one out stops the poll
+                if feed.task is not None:
+                    feed.task.cancel()
+                del self._feeds[key]
+
+    async def pump(self, sub: Subscriber) -> None:
+        """Write `sub`'s backlog to its socket until cancelled or the send fails."""
+        while True:
+            key, text = await sub.next()
+            if text is None:   # resync: the feed's current window
+                sub._resync.discard(key)
+                feed, period = self._feeds.get(key), sub.feeds.get(key)
+                if feed is None or period is None:
+                    continue
+                text = feed.snapshot(period)
+                self.snapshots += 1
+            await sub.send(text)
+            sub.sent += 1
+
+    # ---------- polling ----------
+
+    async def _run(self, feed: _Feed) -> None:
+        while feed.subscribers:
+            await asyncio.sleep(self._every())
+            async with feed.lock:
+                await self._poll_once(feed)
+
+    async def _poll_once(self, feed: _Feed) -> None:
+        period = feed.widest()
+        frame = await self._poll(feed.ticker, period, feed.interval)
+        self.polls += 1
+        if frame is None or not len(frame):
+            return   # upstream had nothing / timed out: keep what we have
+        self._publish(feed, frame, period_start(period) or date.min)
+
+    def _publish(self, feed: _Feed, frame: OHLCVFrame, covered_from: date) -> None:
+        old = feed.frame
+        start = changed_from(old, frame)
+        feed.covered_from = covered_from
+        if start == len(frame) and len(frame) == len(old):
+            return   # nothing changed
+        feed.frame = frame
+        feed.seq += 1
+        if start == 0 or len(frame) < len(old) or start < len(old) - 1:
+            # new window (first poll, period widened or rolled forward) or an older
+            # bar was revised: reseed and let every subscriber resync
+            feed.state = IndicatorState.from_closes(frame.close)
+            for sub in feed.subscribers:
+                sub.resync(feed.key)
+            self.resyncs += 1
+            return
+        ma = {w: [] for w in feed.state.windows}
+        ema = {w: [] for w in feed.state.windows}
+        for i in range(start, len(frame)):
+            c = float(frame.close[i])
+            out = feed.state.replace_last(c) if i < len(old) else feed.state.update(c)
+            for w in feed.state.windows:
+                ma[w].append(out["ma"][w])
+                ema[w].append(out["ema"][w])
+        bars = frame[start:]
+        text = dumps({
+            "type": "delta", "ticker": feed.ticker, "interval": feed.interval, "seq": feed.seq,
+            "from": bars.date_strings()[0], "bars": frame_columns(bars), "ma": ma, "ema": ema,
+        }).decode()
+        for sub in feed.subscribers:
+            sub.push(feed.key, text)
+        self.deltas += 1
+
+    def close(self) -> None:
+        for feed in list(self._feeds.values()):
+            if feed.task is not None:
+                feed.task.cancel()
+        self._feeds.clear()
+
+    def stats(self) -> dict:
+        return {
+            "feeds": len(self._feeds), "subscribers": len(self.subscribers),
+            "polls": self.polls, "deltas": self.deltas, "snapshots": self.snapshots,
+            "resyncs": self.resyncs, "dropped": self.dropped + sum(s.dropped for s in self.subscribers),
+        }
@@ -0,0 +1,198 @@
+import asyncio
+import math
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+# Background prefetch: keeps curated and frequently requested series fresh in the
+# caches so requests do not wait on the upstream. Refreshes are paced by a token
+# bucket (upstream rate limit) and follow NSE hours: every PREFETCH_OPEN_SECONDS
+# while the market is open, every PREFETCH_CLOSED_SECONDS (and right at the next
+# open) while it is closed. Exchange holidays are not modelled.
+#   PREFETCH=0                 disable
+#   PREFETCH_RATE / _BURST     upstream calls per second / bucket size
+#   PREFETCH_TOP               how many of the most requested series to include
+
+PREFETCH = os.getenv("PREFETCH", "1") != "0"
+PREFETCH_RATE = float(os.getenv("PREFETCH_RATE", "2"))
+PREFETCH_BURST = int(os.getenv("PREFETCH_BURST", "5"))
+PREFETCH_TOP = int(os.getenv("PREFETCH_TOP", "10"))
+PREFETCH_OPEN_SECONDS = float(os.getenv("PREFETCH_OPEN_SECONDS", "60"))
+PREFETCH_CLOSED_SECONDS = float(os.getenv("PREFETCH_CLOSED_SECONDS", "1800"))
+TICK_SECONDS = 5.0
+
+IST = timezone(timedelta(hours=5, minutes=30))
+MARKET_OPEN = (9, 15)
+MARKET_CLOSE = (15, 30)
+
+Key = Tuple[str, str, str]   # (ticker, period, interval)
+
+
+def market_open(now: Optional[datetime] = None) -> bool:
+    now = (now or datetime.now(IST)).astimezone(IST)
+    if now.weekday() >= 5:
+        return False
+    return MARKET_OPEN <= (now.hour, now.minute) < MARKET_CLOSE
+
+
+def next_open(now: Optional[datetime] = None) -> datetime:
+    """Next NSE session start strictly after `now` (weekdays only)."""
+    now = (now or datetime.now(IST)).astimezone(IST)
+    day = now.replace(hour=MARKET_OPEN[0], minute=MARKET_OPEN[1], second=0, microsecond=0)
+    if day <= now:
+        day += timedelta(days=1)
+    while day.weekday() >= 5:
+        day += timedelta(days=1)
+    return day
+
+
+def cadence(now: Optional[datetime] = None) -> float:
+    """Seconds until a series should be refreshed again."""
+    now = (now or datetime.now(IST)).astimezone(IST)
+    if market_open(now):
+        return PREFETCH_OPEN_SECONDS
+    return min(PREFETCH_CLOSED_SECONDS, max(1.0, (next_open(now) - now).total_seconds()))
+
+
+class TokenBucket:
+    """`rate` tokens per second, at most `capacity` banked; acquire() waits for one."""
+
+    def __init__(self, rate: float = PREFETCH_RATE, capacity: int = PREFETCH_BURST):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def _fill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self) -> bool:
+        self._fill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    async def acquire(self) -> None:
+        while not self.try_acquire():
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class Popularity:
+    """Request counts with exponential decay (half-life in seconds)."""
+
+    def __init__(self, half_life: float = 3600.0, max_keys: int = 2000):
+        self.half_life = half_life
+        self.max_keys = max_keys
+        self._scores: Dict[Hashable, Tuple[float, float]] = {}   # key -> (score, as of)
+
+    def _decayed(self, key: Hashable, now: float) -> float:
+        score, at = self._scores.get(key, (0.0, now))
+        return score * math.pow(0.5, (now - at) / self.half_life)
+
+    def hit(self, key: Hashable) -> None:
+        now = time.monotonic()
+        self._scores[key] = (self._decayed(key, now) + 1.0, now)
+        if len(self._scores) > self.max_keys:
+            for k, _ in sorted(self.top(len(self._scores)), key=lambda kv: kv[1])[:len(self._scores) // 10]:
+                self._scores.pop(k, None)
+
+    def top(self, n: int, min_score: float = 0.0) -> List[Tuple[Hashable, float]]:
+        now = time.monotonic()
+        ranked = sorted(((k, self._decayed(k, now)) for k in self._scores), key=lambda kv: -kv[1])
+        return [(k, s) for k, s in ranked[:n] if s >= min_score]
+
+
+class Prefetcher:
+    """
+    refresh(ticker, period, interval) fetches one series into the caches.
+    After each round, on_round(refreshed keys) rebuilds derived snapshots.
+    """
+
+    def __init__(self, refresh: Callable[[str, str, str], Awaitable[object]],
+                 curated: Iterable[Key] = (), top: int = PREFETCH_TOP,
+                 bucket: Optional[TokenBucket] = None,
+                 on_round: Optional[Callable[[List[Key]], Awaitable[None]]] = None):
+        self._refresh = refresh
+        self.curated: List[Key] = list(dict.fromkeys(curated))
+        self.top = top
+        self.bucket = bucket or TokenBucket()
+        self.on_round = on_round
+        self.popularity = Popularity()
+        self.snapshots: Dict[str, dict] = {}
+        self._due: Dict[Key, float] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.rounds = self.refreshes = self.failures = self.round_errors = 0
+
+    def record(self, ticker: str, period: str, interval: str) -> None:
+        self.popularity.hit((ticker, period, interval))
+
+    def keys(self) -> List[Key]:
+        popular = [k for k, _ in self.popularity.top(self.top, min_score=2.0)]
+        return list(dict.fromkeys(self.curated + popular))
+
+    async def run_round(self) -> List[Key]:
+        """Refresh every tracked series that is due; returns the ones refreshed."""
+        now = time.monotonic()
+        due = [k for k in self.keys() if self._due.get(k, 0.0) <= now]
+        if not due:
+            return []
+        jobs = []
+        for key in due:
+            await self.bucket.acquire()
+            jobs.append(asyncio.create_task(self._one(key)))
+        done = [k for k, ok in zip(due, await asyncio.gather(*jobs)) if ok]
+        self.rounds += 1
+        if self.on_round is not None:
+            await self.on_round(done)
+        return done
+
+    async def _one(self, key: Key) -> bool:
+        try:
+            ok = bool(await self._refresh(*key))   # empty result = upstream had nothing / timed out
+        except Exception:
+            ok = False
+        if ok:
+            self.refreshes += 1
+        else:
+            self.failures += 1
+        self._due[key] = time.monotonic() + (cadence() if ok else min(cadence(), 60.0))
+        return ok
+
+    async def run(self, tick: float = TICK_SECONDS) -> None:
+        while True:
+            try:
+                await self.run_round()
+            except Exception:   # e.g. a snapshot rebuild in on_round: count it, keep scheduling
+                self.round_errors += 1
+            await asyncio.sleep(tick)
+
+    def start(self) -> Optional[asyncio.Task]:
+        if not PREFETCH:
+            return None
+        self._task = asyncio.get_running_loop().create_task(self.run())
+        return self._task
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def snapshot(self, name: str) -> Optional[dict]:
+        """A derived snapshot, only while the scheduler keeps it fresh."""
+        return self.snapshots.get(name) if self.running else None
+
+    def stats(self) -> dict:
+        return {
+            "enabled": PREFETCH, "running": self.running,
+            "market_open": market_open(), "cadence_s": round(cadence(), 1),
+            "tracked": len(self.keys()), "rounds": self.rounds, "refreshes": self.refreshes,
+            "failures": self.failures, "round_errors": self.round_errors, "snapshots": sorted(self.snapshots),
+        }
+
+
+def ttl_floor(interval_ttl: float) -> float:
+    """Cache TTL for prefetched entries: they must outlive the gap until the next refresh."""
+    return max(interval_ttl, 2 * cadence() + TICK_SECONDS)
@@ -0,0 +1,193 @@
+import gzip
+import json
+import os
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from fastapi import Request
+from fastapi.responses import Response
+from core.export import FormatUnavailable
+from core.frame import OHLCVFrame
+from core.metrics import stage
+
+# Response encoding for the chart endpoints.
+# Handlers build payloads whose "records" are OHLCVFrames (or, for uploads, lists
+# of bar dicts); render() shapes them for the requested format:
+#   rows    -> "records": [{date, open, high, low, close, volume}, ...]   (default, old shape)
+#   columns -> "columns": {date: [...], open: [...], ...}                 (parallel arrays)
+#   arrow   -> Arrow IPC stream, one row per bar, MA/EMA/indicators as extra columns
+# JSON goes through orjson when installed (numpy arrays are written directly);
+# bodies above COMPRESS_MIN_BYTES are br/gzip-compressed per Accept-Encoding.
+
+try:
+    import orjson
+except ImportError:   # optional: stdlib json is the fallback
+    orjson = None
+
+try:
+    import brotli
+except ImportError:   # optional: gzip only
+    brotli = None
+
+FORMATS = ("rows", "columns", "arrow")
+BAR_FIELDS = ("date", "open", "high", "low", "close", "volume")
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1400"))   # ~ one packet; smaller is not worth it
+GZIP_LEVEL = 5
+BROTLI_QUALITY = 4
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+
+# ---------- shaping ----------
+
+def frame_columns(frame: OHLCVFrame) -> Dict[str, Any]:
+    """Parallel arrays straight from the frame columns (numpy arrays stay numpy)."""
+    return {
+        "date": frame.date_strings(),
+        "open": frame.open, "high": frame.high, "low": frame.low,
+        "close": frame.close, "volume": frame.volume,
+    }
+
+
+def _records_columns(records) -> Dict[str, Any]:
+    if isinstance(records, OHLCVFrame):
+        return frame_columns(records)
+    return {k: [r.get(k) for r in records] for k in BAR_FIELDS}
+
+
+def shape(payload: Any, fmt: str) -> Any:
+    """Replace every "records" value by the rows / columns form (recursively)."""
+    if isinstance(payload, dict):
+        out = {}
+        for k, v in payload.items():
+            if k == "records":
+                if fmt == "columns":
+                    out["columns"] = _records_columns(v)
+                else:
+                    out[k] = v.to_dicts() if isinstance(v, OHLCVFrame) else v
+            else:
+                out[k] = shape(v, fmt)
+        return out
+    if isinstance(payload, list):
+        return [shape(v, fmt) for v in payload]
+    return payload
+
+
+# ---------- encoders ----------
+
+def _json_default(obj):
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj, default=_json_default,
+                            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, default=_json_default, separators=(",", ":")).encode("utf-8")
+
+
+def _series_columns(node: dict) -> Dict[str, Any]:
+    """Bar columns + per-bar analytics (ma_5, ema_20, rsi.rsi, ...) of one series node."""
+    cols = dict(_records_columns(node["records"]))
+    analytics = node.get("analytics") or {}
+    for kind in ("ma", "ema"):
+        for w, values in (analytics.get(kind) or {}).items():
+            cols[f"{kind}_{w}"] = values
+    for label, ind in (analytics.get("indicators") or {}).items():
+        for out_name, values in ind["values"].items():
+            cols[f"{label}.{out_name}"] = values
+    return cols
+
+
+def _split_series(payload: Any, path: str = "") -> Tuple[Any, List[Tuple[str, dict]]]:
+    """(payload without per-bar data, [(path, series node), ...])."""
+    if not isinstance(payload, dict):
+        return payload, []
+    if "records" in payload:
+        meta = {k: v for k, v in payload.items() if k != "records"}
+        if isinstance(meta.get("analytics"), dict):
+            meta["analytics"] = {k: v for k, v in meta["analytics"].items() if k not in ("ma", "ema", "indicators")}
+        return meta, [(path, payload)]
+    meta, found = {}, []
+    for k, v in payload.items():
+        m, f = _split_series(v, f"{path}.{k}" if path else k)
+        meta[k] = m
+        found.extend(f)
+    return meta, found
+
+
+def arrow_bytes(payload: dict) -> bytes:
+    """
+    One Arrow IPC stream for the whole payload. Every series becomes a record
+    batch tagged with a `series` column ("" for a single series, "left"/"right"
+    for /api/compare); everything that is not per-bar goes into the schema
+    metadata as JSON under b"meta".
+    """
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise FormatUnavailable("format=arrow needs pyarrow installed on the server")
+    meta, nodes = _split_series(payload)
+    tables = []
+    for path, node in nodes:
+        cols = _series_columns(node)
+        n = len(cols["date"])
+        tables.append(pa.table({"series": pa.array([path] * n, pa.string()), **{
+            k: pa.array(np.asarray(v) if isinstance(v, np.ndarray) else v) for k, v in cols.items()
+        }}))
+    table = pa.concat_tables(tables, promote_options="default") if tables else pa.table({})
+    table = table.replace_schema_metadata({b"meta": dumps(meta)})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+# ---------- response ----------
+
+def _accepts(request: Optional[Request], coding: str) -> bool:
+    """Whether Accept-Encoding allows `coding`: listed (or covered by *) with q > 0."""
+    if request is None:
+        return False
+    weights = {}
+    for part in request.headers.get("accept-encoding", "").split(","):
+        name, *params = [p.strip() for p in part.split(";")]
+        q = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if name:
+            weights[name.lower()] = q
+    q = weights.get(coding, weights.get("*", 0.0))
+    return q > 0
+
+
+def compressed_response(body: bytes, media_type: str, request: Optional[Request] = None,
+                        status_code: int = 200, headers: Optional[dict] = None) -> Response:
+    """br (if the brotli module is available) or gzip above COMPRESS_MIN_BYTES, else identity."""
+    headers = dict(headers or {})
+    if len(body) >= COMPRESS_MIN_BYTES:
+        if brotli is not None and _accepts(request, "br"):
+            body, headers["Content-Encoding"] = brotli.compress(body, quality=BROTLI_QUALITY), "br"
+        elif _accepts(request, "gzip"):
+            body, headers["Content-Encoding"] = gzip.compress(body, compresslevel=GZIP_LEVEL), "gzip"
+        headers["Vary"] = "Accept-Encoding"
+    return Response(body, status_code=status_code, media_type=media_type, headers=headers)
+
+
+def render(payload: dict, fmt: str = "rows", request: Optional[Request] = None) -> Response:
+    """Encode a handler payload in `fmt` (rows | columns | arrow)."""
+    with stage("serialize", format=fmt):
+        if fmt == "arrow":
+            try:
+                body = arrow_bytes(payload)
+            except FormatUnavailable as e:
+                return compressed_response(dumps({"error": str(e)}), "application/json", request, status_code=406)
+            return compressed_response(body, ARROW_MEDIA_TYPE, request)
+        return compressed_response(dumps(shape(payload, fmt)), "application/json", request)
@@ -1,22 +1,67 @@
+import asyncio
 import os
-import csv
-import io
-import requests
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime
 from typing import List, Dict
-from fastapi import FastAPI, Query, UploadFile, File
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi import FastAPI, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 
-from core.loader import load_csv
-from core.sort_algos import merge_sort_by_company
-from core.search import find_company_block
+from core.loader import load_frame
+from core.frame import OHLCVFrame
+from core.store import check_key
+from core.export import BAR_COLUMNS, COLUMNS as EXPORT_COLUMNS, MEDIA_TYPES as EXPORT_MEDIA_TYPES, FormatUnavailable, encode
+from core.index import CompanyIndex, date_range
 from core.analytics import average_volume, price_summary
-from web.data_live import fetch_yf_ohlc, add_ma_ema
+from core.technical import parse_specs, compute_frame
+from core.resample import downsample, parse_rule, resample as resample_frame
+from core.batch import analyze_stream, iter_frames, shutdown_pool as shutdown_batch_pool
+from core.metrics import REGISTRY, REQUEST_SECONDS, SamplingProfiler, trace_stages
+from web.data_live import add_ma_ema
+from web.sources import BAR_STORE, HISTORY, fetch_ohlc, fetch_many, refresh_yf
+from web.cache import CACHE, ttl_for
+from viz.charts import CHART_CACHE, MAX_SIDE, chart_key, data_version, render_chart, shutdown_pool as shutdown_chart_pool
+from web.upload import DEFAULT_MAX_POINTS, UploadAggregator, UploadTooLarge, stream_upload
+from web.serialize import dumps, render
+from web import warmup
+from web.prefetch import Prefetcher, ttl_floor
+from web.live import LIVE_MAX_TICKERS, LiveHub
 
-ALPHA_KEY = os.getenv("ALPHA_VANTAGE_KEY")  # optional, for fallback
+FORMAT_QUERY = Query("rows", pattern="^(rows|columns|arrow)$", description="rows | columns | arrow (IPC stream)")
+EXPORT_QUERY = Query("csv", pattern=r"^(csv|csv\.gz|parquet)$", description="csv | csv.gz | parquet")
 
-app = FastAPI()
+SAMPLE_CSV = "sample_data.csv"
+CURATED_LIVE = [
+    "RELIANCE.NS", "TCS.NS", "INFY.NS", "HDFCBANK.NS", "ICICIBANK.NS",
+    "SBIN.NS", "LT.NS", "HINDUNILVR.NS", "BAJFINANCE.NS"
+]
+FEATURED = ["RELIANCE.NS", "TCS.NS", "INFY.NS", "HDFCBANK.NS", "ICICIBANK.NS"]
+BATCH_MAX_TICKERS = int(os.getenv("BATCH_MAX_TICKERS", "500"))
+ALLOW_PROFILE = os.getenv("ALLOW_PROFILE", "0") == "1"     # opt in to ?profile=1 on any endpoint
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+METRICS_MEDIA_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+@asynccontextmanager
+async def lifespan(app):
+    # warm-up runs in the background: the server is already accepting requests
+    steps = [
+        ("imports", warmup.import_modules()),
+        ("sample_csv", lambda: asyncio.to_thread(_csv_index)),
+    ]
+    if warmup.WARMUP_TICKERS:
+        steps.append(("live", lambda: fetch_many(warmup.WARMUP_TICKERS, fallback=False)))
+    tasks = [warmup.start(steps), PREFETCHER.start()]
+    yield
+    for task in tasks:
+        if task is not None:
+            task.cancel()
+    LIVE.close()
+    shutdown_batch_pool()
+    shutdown_chart_pool()
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -27,78 +72,146 @@ app.add_middleware(
 
 app.mount("/static", StaticFiles(directory="web/static"), name="static")
 
+
+@app.middleware("http")
+async def instrument(request: Request, call_next):
+    """
+    Per-route latency histogram (time to response headers; streamed bodies keep
+    going after that). With ALLOW_PROFILE=1 set on the server, ?profile=1 replaces
+    the response by a profile.
+    """
+    if ALLOW_PROFILE and request.query_params.get("profile") == "1":
+        return await _profiled(request, call_next)
+    t0 = time.perf_counter()
+    response = await call_next(request)
+    REQUEST_SECONDS.observe(time.perf_counter() - t0, method=request.method,
+                            route=_route_path(request), status=str(response.status_code))
+    return response
+
+
+def _route_path(request: Request) -> str:
+    # the route template ("/api/live/{ticker}"), not the raw path: keeps label cardinality bounded
+    route = request.scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+async def _profiled(request: Request, call_next) -> JSONResponse:
+    """
+    Run the request under the sampling profiler and return where its time went.
+    The profiler samples every thread in the process, so the breakdown is only
+    that request's on an otherwise idle instance: concurrent requests show up too.
+    """
+    with trace_stages() as stages, SamplingProfiler([PROJECT_ROOT]) as prof:
+        t0 = time.perf_counter()
+        response = await call_next(request)
+        size = 0
+        async for chunk in response.body_iterator:   # streamed bodies do their work here
+            size += len(chunk)
+        elapsed = time.perf_counter() - t0
+    totals: Dict[str, list] = {}
+    for name, seconds in stages:
+        t = totals.setdefault(name, [0, 0.0])
+        t[0] += 1
+        t[1] += seconds
+    return JSONResponse({
+        "path": request.url.path,
+        "status": response.status_code,
+        "elapsed_ms": round(elapsed * 1000, 2),
+        "response_bytes": size,
+        "stages": [{"stage": k, "calls": n, "ms": round(s * 1000, 2)}
+                   for k, (n, s) in sorted(totals.items(), key=lambda kv: -kv[1][1])],
+        "profile": prof.report(),
+    })
+
+
+@app.get("/metrics")
+def metrics():
+    """Prometheus text exposition: request latencies, stage timers, cache and upstream counters."""
+    return Response(REGISTRY.render(), media_type=METRICS_MEDIA_TYPE)
+
 @app.get("/")
 def home():
     return FileResponse("web/templates/index.html")
 
 
+_csv_cache = {"mtime": None, "index": None}
+
+def _csv_index() -> CompanyIndex:
+    """
+    Company index over the sample CSV. Built once and reused across requests;
+    rebuilt only when the file's mtime changes.
+    """
+    mtime = os.path.getmtime(SAMPLE_CSV)
+    if _csv_cache["mtime"] != mtime:
+        frame, _ = load_frame(SAMPLE_CSV)
+        _csv_cache.update(mtime=mtime, index=CompanyIndex.build(frame))
+    return _csv_cache["index"]
+
+
 @app.get("/api/companies")
 def get_companies():
     try:
-        data = load_csv("sample_data.csv")
-        sample_companies = sorted({r.company for r in data})
+        sample_companies = _csv_index().companies()
     except Exception:
         sample_companies = []
 
-    curated_live = [
-        "RELIANCE.NS", "TCS.NS", "INFY.NS", "HDFCBANK.NS", "ICICIBANK.NS",
-        "SBIN.NS", "LT.NS", "HINDUNILVR.NS", "BAJFINANCE.NS"
-    ]
-    return {"sample": sample_companies, "live": curated_live}
+    return {"sample": sample_companies, "live": CURATED_LIVE}
 
 
 @app.get("/api/featured")
-def featured_snapshot():
+async def featured_snapshot():
     """
     Return a small snapshot for curated tickers: last close, previous close, pct change.
+    Served from the snapshot the prefetcher rebuilds after each refresh; only a
+    cold start (or PREFETCH=0) fetches here, concurrently.
     """
-    curated = ["RELIANCE.NS", "TCS.NS", "INFY.NS", "HDFCBANK.NS", "ICICIBANK.NS"]
+    snap = PREFETCHER.snapshot("featured")
+    if snap is None:
+        snap = await _build_featured()
+    return snap
+
+
+async def _build_featured() -> dict:
+    fetched = await fetch_many(FEATURED, period="5d", interval="1d", fallback=False)
+    snap = {"featured": _featured_rows(fetched), "as_of": time.strftime("%Y-%m-%dT%H:%M:%S%z")}
+    if any(row["last"] is not None for row in snap["featured"]):
+        PREFETCHER.snapshots["featured"] = snap
+    return snap
+
+
+def _featured_rows(fetched) -> list:
     out = []
-    for t in curated:
-        recs = fetch_yf_ohlc(t, period="5d", interval="1d")
-        if not recs:
+    for t, frame in zip(FEATURED, fetched):
+        if not len(frame):
             out.append({"ticker": t, "last": None, "prev": None, "pct": None})
             continue
-        last = recs[-1]["close"]
-        prev = recs[-2]["close"] if len(recs) >= 2 else recs[-1]["open"]
+        last = float(frame.close[-1])
+        prev = float(frame.close[-2]) if len(frame) >= 2 else float(frame.open[-1])
         pct = ((last - prev) / prev * 100) if prev else None
         out.append({"ticker": t, "last": last, "prev": prev, "pct": round(pct, 2) if pct is not None else None})
-    return {"featured": out}
+    return out
 
 
-def _try_alpha(ticker: str, period: str = "1mo"):
-    """
-    Very small Alpha Vantage fallback attempt. Returns records in same shape or [].
-    Note: requires ALPHA_VANTAGE_KEY env on server.
-    """
-    if not ALPHA_KEY:
-        return []
-    base = "https://www.alphavantage.co/query"
-    params = {"function": "TIME_SERIES_DAILY", "symbol": ticker, "apikey": ALPHA_KEY, "outputsize": "compact"}
-    try:
-        r = requests.get(base, params=params, timeout=12)
-        if r.status_code != 200:
-            return []
-        j = r.json()
-        # parse Time Series (Daily)
-        key = next((k for k in j.keys() if k.startswith("Time Series")), None)
-        if not key:
-            return []
-        ts = j[key]
-        items = sorted(ts.items())  # chronological
-        out = []
-        for date_str, vals in items:
-            out.append({
-                "date": date_str,
-                "open": float(vals.get("1. open", 0)),
-                "high": float(vals.get("2. high", 0)),
-                "low": float(vals.get("3. low", 0)),
-                "close": float(vals.get("4. close", 0)),
-                "volume": int(float(vals.get("5. volume", 0)))
-            })
-        return out
-    except Exception:
-        return []
+async def _prefetch(ticker: str, period: str, interval: str):
+    return await refresh_yf(ticker, period, interval, ttl=ttl_floor(ttl_for(interval)))
+
+
+async def _after_prefetch(refreshed) -> None:
+    if "featured" not in PREFETCHER.snapshots or any(t in FEATURED and p == "5d" for t, p, _ in refreshed):
+        await _build_featured()   # cache hits: the prefetch round just refreshed these
+
+
+PREFETCHER = Prefetcher(
+    _prefetch,
+    curated=[(t, "5d", "1d") for t in FEATURED] + [(t, "6mo", "1d") for t in CURATED_LIVE],
+    on_round=_after_prefetch,
+)
+REGISTRY.register_collector(lambda: [
+    ("prefetch_refreshes", "counter", "Background prefetch refreshes by result",
+     [("_total", {"result": "ok"}, PREFETCHER.refreshes), ("_total", {"result": "failed"}, PREFETCHER.failures)]),
+    ("prefetch_round_errors", "counter", "Prefetch rounds that raised (the scheduler keeps running)",
+     [("_total", {}, PREFETCHER.round_errors)]),
+])
 
 
 def _normalize_india(ticker: str) -> str:
@@ -110,104 +223,369 @@ def _normalize_india(ticker: str) -> str:
 
 
 @app.get("/api/live/{ticker}")
-def live_company_data(
+async def live_company_data(
+    request: Request,
     ticker: str,
     period: str = Query("6mo"),
-    interval: str = Query("1d")
+    interval: str = Query("1d"),
+    indicators: str = Query("", description="e.g. rsi,macd:12:26:9,bb:20:2,atr,vwap"),
+    resample: str = Query("", description="aggregate bars into buckets, e.g. 1w, 1mo, 1h"),
+    max_points: int = Query(0, ge=0, description="LTTB-thin the series to at most this many bars (0 = all)"),
+    format: str = FORMAT_QUERY
 ):
     t = _normalize_india(ticker)
-    records = fetch_yf_ohlc(t, period=period, interval=interval)
-    if not records:
-        # try alpha fallback
-        records = _try_alpha(t)
-        if not records:
-            return JSONResponse({"error": "No live data found"}, status_code=404)
-
-    highs = max(r["high"] for r in records) if records else None
-    lows = min(r["low"] for r in records) if records else None
-    summary = {
-        "highest": highs,
-        "lowest": lows,
-        "first_open": records[0]["open"] if records else None,
-        "last_close": records[-1]["close"] if records else None
-    }
-    avg_vol = sum(r["volume"] for r in records) / max(1, len(records)) if records else 0
-    me = add_ma_ema(records)
-    return {"company": t, "records": records, "analytics": {"avg_volume": avg_vol, "summary": summary, "ma": me["ma"], "ema": me["ema"]}}
+    try:
+        check_key(t, interval)
+        specs = parse_specs(indicators)
+        rule = parse_rule(resample) if resample else None
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    PREFETCHER.record(t, period, interval)
+    frame = await fetch_ohlc(t, period=period, interval=interval)  # alpha fallback inside
+    if not len(frame):
+        return JSONResponse({"error": "No live data found"}, status_code=404)
+
+    def build():
+        stats = BAR_STORE.summary(t, interval, frame)
+        return render({"company": t, **_live_payload(frame, specs, rule, max_points, stats)}, format, request)
+    return await asyncio.to_thread(build)   # resample / indicators / encoding: off the event loop
+
+
+def _series(frame, specs=(), rule=None, max_points=0):
+    """
+    Reduce a frame before serialization: resample into `rule` buckets, then LTTB to
+    max_points. MA/EMA and indicators are computed on the (resampled) full series
+    and picked at the same bars, so thinning never changes their values.
+    Returns (shown frame, {"ma", "ema"[, "indicators"]}, downsampled); the frame
+    is turned into rows / columns / Arrow by web.serialize.render.
+    """
+    if rule is not None:
+        frame = resample_frame(frame, rule)
+    shown, idx = downsample(frame, max_points)
+    me = add_ma_ema(frame, take=idx)
+    series = {"ma": me["ma"], "ema": me["ema"]}
+    if specs:
+        series["indicators"] = compute_frame(frame, specs, take=idx)
+    return shown, series, rule is not None or idx is not None
+
+
+def _live_payload(frame, specs=(), rule=None, max_points=0, stats=None):
+    """
+    records + analytics for a single-ticker frame (live endpoints). `stats` is a
+    precomputed rollup summary for the same bars (BarStore.summary); without it
+    the frame is scanned.
+    """
+    records, series, reduced = _series(frame, specs, rule, max_points)
+    if stats is None:
+        stats = {"avg_volume": average_volume(frame), "summary": price_summary(frame)}
+    summary = stats["summary"] or {"highest": None, "lowest": None, "first_open": None, "last_close": None}
+    analytics = {"avg_volume": stats["avg_volume"], "summary": summary, **series}
+    return {"records": records, "downsampled": reduced, "analytics": analytics}
 
 
 @app.get("/api/compare")
-def compare_endpoint(
+async def compare_endpoint(
+    request: Request,
     t1: str = Query(...),
     t2: str = Query(...),
     source: str = Query("live"),
     period: str = Query("6mo"),
     interval: str = Query("1d"),
-    mode: str = Query("overlay")
+    mode: str = Query("overlay"),
+    indicators: str = Query("", description="e.g. rsi,macd:12:26:9,bb:20:2,atr,vwap"),
+    resample: str = Query("", description="aggregate bars into buckets, e.g. 1w, 1mo, 1h"),
+    max_points: int = Query(0, ge=0, description="LTTB-thin each series to at most this many bars (0 = all)"),
+    format: str = FORMAT_QUERY
 ):
-    def load_for(ticker, src):
+    try:
+        if source == "live":
+            for t in (t1, t2):
+                check_key(_normalize_india(t), interval)
+        specs = parse_specs(indicators)
+        rule = parse_rule(resample) if resample else None
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+
+    def csv_side(ticker):
+        index = _csv_index()
+        recs, series, reduced = _series(index.block(ticker), specs, rule, max_points)
+        stats = index.summary(ticker)
+        analytics = {"avg_volume": stats["avg_volume"] if stats["count"] else 0, "summary": stats["summary"], **series}
+        return {"records": recs, "downsampled": reduced, "analytics": analytics}
+
+    async def load_for(ticker, src):
+        # the analytics are CPU work: worker threads, so both sides run in parallel off the loop
         if src == "live":
             tt = _normalize_india(ticker)
-            recs = fetch_yf_ohlc(tt, period=period, interval=interval)
-            if not recs:
-                recs = _try_alpha(tt)
-            me = add_ma_ema(recs)
-            highs = max(r["high"] for r in recs) if recs else None
-            lows = min(r["low"] for r in recs) if recs else None
-            avg_vol = (sum(r["volume"] for r in recs)/len(recs)) if recs else 0
-            summary = {"highest": highs, "lowest": lows, "first_open": recs[0]["open"] if recs else None, "last_close": recs[-1]["close"] if recs else None}
-            return {"records": recs, "analytics": {"avg_volume": avg_vol, "summary": summary, "ma": me["ma"], "ema": me["ema"]}}
-        else:
-            data = load_csv("sample_data.csv")
-            sorted_data = merge_sort_by_company(data)
-            res = find_company_block(sorted_data, ticker)
-            recs = [{"date": str(r.date), "open": r.open, "high": r.high, "low": r.low, "close": r.close, "volume": r.volume} for r in res]
-            me = add_ma_ema(recs)
-            return {"records": recs, "analytics": {"avg_volume": average_volume(res) if res else 0, "summary": price_summary(res) if res else {}, "ma": me["ma"], "ema": me["ema"]}}
-
-    left = load_for(t1, source)
-    right = load_for(t2, source)
-    if not left["records"] and not right["records"]:
+            PREFETCHER.record(tt, period, interval)
+            frame = await fetch_ohlc(tt, period=period, interval=interval)
+            return await asyncio.to_thread(
+                lambda: _live_payload(frame, specs, rule, max_points, BAR_STORE.summary(tt, interval, frame)))
+        return await asyncio.to_thread(csv_side, ticker)
+
+    left, right = await asyncio.gather(load_for(t1, source), load_for(t2, source))
+    if not len(left["records"]) and not len(right["records"]):
         return JSONResponse({"error": "No data for both tickers"}, status_code=404)
-    return {"t1": t1.strip().upper(), "t2": t2.strip().upper(), "mode": mode, "left": left, "right": right}
+    payload = {"t1": t1.strip().upper(), "t2": t2.strip().upper(), "mode": mode, "left": left, "right": right}
+    return await asyncio.to_thread(render, payload, format, request)
 
 
-@app.post("/api/upload")
-async def upload_csv(file: UploadFile = File(...)):
-    content = await file.read()
-    s = content.decode("utf-8", errors="ignore")
-    reader = csv.DictReader(io.StringIO(s))
-    out = []
-    for row in reader:
+LIVE = LiveHub(_prefetch)   # same refresh as the prefetcher: REST readers of the series see the new bars too
+
+
+def _live_metrics():
+    s = LIVE.stats()
+    return [
+        ("live_connections", "gauge", "Open /ws/live sockets", [("", {}, s["subscribers"])]),
+        ("live_feeds", "gauge", "Series polled for /ws/live subscribers", [("", {}, s["feeds"])]),
+        ("live_messages", "counter", "Messages fanned out by the live hub",
+         [("_total", {"type": "delta"}, s["deltas"]), ("_total", {"type": "snapshot"}, s["snapshots"])]),
+        ("live_dropped", "counter", "Queued live messages dropped for slow consumers (replaced by a snapshot)",
+         [("_total", {}, s["dropped"])]),
+    ]
+
+
+REGISTRY.register_collector(_live_metrics)
+
+
+@app.websocket("/ws/live")
+async def live_socket(websocket: WebSocket, tickers: str = "", period: str = "6mo", interval: str = "1d"):
+    """
+    Pushed live bars. Subscribe with ?tickers=TCS,INFY or by sending
+    {"action": "subscribe"|"unsubscribe", "tickers": [...], "period", "interval"}.
+    Each subscription gets a snapshot, then deltas (see web.live).
+    """
+    await websocket.accept()
+    sub = LIVE.connect(websocket.send_text)
+    pump = asyncio.create_task(LIVE.pump(sub))
+
+    async def handle(msg: dict):
+        names = msg.get("tickers") or []
+        if isinstance(names, str):
+            names = names.split(",")
+        names = list(dict.fromkeys(_normalize_india(str(t)) for t in names if str(t).strip()))
+        iv = msg.get("interval") or interval
+        if msg.get("action", "subscribe") == "unsubscribe":
+            LIVE.unsubscribe(sub, [(t, iv) for t in names])
+            return
         try:
-            d = row.get("date") or row.get("Date")
-            o = float(row.get("open") or row.get("Open") or 0)
-            h = float(row.get("high") or row.get("High") or 0)
-            l = float(row.get("low") or row.get("Low") or 0)
-            c = float(row.get("close") or row.get("Close") or 0)
-            v = int(float(row.get("volume") or row.get("Volume") or 0))
-            out.append({"date": str(d).strip(), "open": o, "high": h, "low": l, "close": c, "volume": v})
-        except Exception:
-            continue
-    if not out:
+            for t in names:
+                check_key(t, iv)
+        except ValueError as e:
+            sub.push(None, dumps({"type": "error", "error": str(e)}).decode())
+            return
+        if len(set(sub.feeds) | {(t, iv) for t in names}) > LIVE_MAX_TICKERS:
+            sub.push(None, dumps({"type": "error", "error": f"At most {LIVE_MAX_TICKERS} subscriptions per socket"}).decode())
+        else:
+            await LIVE.subscribe(sub, names, msg.get("period") or period, iv)
+
+    try:
+        if tickers:
+            await handle({"tickers": tickers})
+        while True:
+            try:
+                msg = await websocket.receive_json()
+            except ValueError:
+                sub.push(None, dumps({"type": "error", "error": "Expected a JSON object"}).decode())
+                continue
+            if isinstance(msg, dict):
+                await handle(msg)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        pump.cancel()
+        LIVE.disconnect(sub)
+
+
+@app.get("/api/cache/stats")
+def cache_stats():
+    return {**CACHE.stats(), "charts": CHART_CACHE.stats(), "warmup": warmup.STATUS,
+            "prefetch": PREFETCHER.stats(), "live": LIVE.stats()}
+
+
+@app.get("/api/chart/{ticker}.png")
+async def chart_png(
+    request: Request,
+    ticker: str,
+    source: str = Query("live"),
+    period: str = Query("6mo"),
+    interval: str = Query("1d"),
+    start: str = Query("", description="YYYY-MM-DD"),
+    end: str = Query("", description="YYYY-MM-DD"),
+    width: int = Query(640, ge=16, le=MAX_SIDE),
+    height: int = Query(320, ge=16, le=MAX_SIDE),
+):
+    """
+    Candlestick PNG, rendered in the chart worker pool and cached by
+    (ticker, range, data version, size). The cache key is the ETag, so an
+    unchanged chart answers If-None-Match with 304 before anything is rendered.
+    """
+    if source == "live":
+        try:
+            check_key(_normalize_india(ticker), interval)
+        except ValueError as e:
+            return JSONResponse({"error": str(e)}, status_code=400)
+    try:
+        if source == "live":
+            t = _normalize_india(ticker)
+            frame = date_range(await fetch_ohlc(t, period=period, interval=interval), start, end)
+        else:
+            t = ticker.strip().upper()
+            frame = (await asyncio.to_thread(_csv_index)).range(t, start, end)
+    except ValueError:
+        return JSONResponse({"error": "Invalid date format, use YYYY-MM-DD"}, status_code=400)
+    if not len(frame):
+        return JSONResponse({"error": "No data for this ticker / range"}, status_code=404)
+
+    key = chart_key(t, start, end, data_version(frame), (width, height))
+    headers = {"ETag": f'"{key}"', "Cache-Control": f"public, max-age={int(ttl_for(interval))}"}
+    if _etag_matches(request.headers.get("if-none-match"), key):
+        return Response(status_code=304, headers=headers)
+    png, _ = await render_chart(t, frame, start, end, (width, height), key=key)
+    return Response(png, media_type="image/png", headers=headers)
+
+
+def _etag_matches(header, key: str) -> bool:
+    if not header:
+        return False
+    tags = [tag.strip() for tag in header.split(",")]
+    return "*" in tags or any(tag.removeprefix("W/").strip('"') == key for tag in tags)
+
+
+@app.post("/api/upload")
+async def upload_csv(
+    request: Request,
+    max_points: int = Query(DEFAULT_MAX_POINTS, ge=0, description="thin the series to at most this many bars (0 = all)"),
+    resample: str = Query("", description="aggregate bars into buckets, e.g. 1w, 1mo"),
+    format: str = FORMAT_QUERY
+):
+    """
+    Streams the multipart body: rows are parsed and aggregated as chunks arrive.
+    `records` (and ma/ema) hold every bar by default, up to UPLOAD_MAX_RECORDS
+    (413 past it); max_points > 0 thins them to at most that many bars, and then
+    peak memory does not grow with the file.
+    """
+    try:
+        rule = parse_rule(resample) if resample else None
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    agg = UploadAggregator(max_points=max_points, rule=rule)
+    try:
+        name = await stream_upload(request, agg)
+    except UploadTooLarge as e:
+        return JSONResponse({"error": str(e)}, status_code=413)
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    if not agg.summary.count:
         return JSONResponse({"error": "No valid rows found"}, status_code=400)
-    highs = max(r["high"] for r in out)
-    lows = min(r["low"] for r in out)
-    summary = {"highest": highs, "lowest": lows, "first_open": out[0]["open"], "last_close": out[-1]["close"]}
-    avg_vol = sum(r["volume"] for r in out) / max(1, len(out))
-    me = add_ma_ema(out)
-    return {"company": file.filename, "records": out, "analytics": {"avg_volume": avg_vol, "summary": summary, "ma": me["ma"], "ema": me["ema"]}}
+    return await asyncio.to_thread(lambda: render(agg.result(name), format, request))
+
+
+@app.post("/api/batch")
+async def batch_endpoint(payload: Dict = None):
+    """
+    {"tickers": [...], "source": "live"|"csv", "period", "interval", "indicators", "full"}
+    -> NDJSON, one line per ticker as soon as it is done (completion order).
+    Live fetches run concurrently; analytics run in a process pool (core.batch).
+    """
+    payload = payload or {}
+    tickers = payload.get("tickers") or []
+    if isinstance(tickers, str):
+        tickers = tickers.split(",")
+    tickers = list(dict.fromkeys(t.strip().upper() for t in tickers if str(t).strip()))
+    if not tickers:
+        return JSONResponse({"error": "tickers is required"}, status_code=400)
+    if len(tickers) > BATCH_MAX_TICKERS:
+        return JSONResponse({"error": f"At most {BATCH_MAX_TICKERS} tickers per batch"}, status_code=400)
+    source = payload.get("source", "live")
+    period, interval = payload.get("period", "6mo"), payload.get("interval", "1d")
+    try:
+        if source == "live":
+            for t in tickers:
+                check_key(_normalize_india(t), interval)
+        specs = parse_specs(payload.get("indicators", ""))
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+
+    if source == "live":
+        items = iter_frames([_normalize_india(t) for t in tickers],
+                            lambda t: fetch_ohlc(t, period=period, interval=interval))
+    else:
+        index = await asyncio.to_thread(_csv_index)
+
+        async def csv_blocks():
+            for t in tickers:
+                yield t, index.block(t)
+        items = csv_blocks()
+
+    async def lines():
+        async for res in analyze_stream(items, specs, bool(payload.get("full"))):
+            yield dumps(res) + b"\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+def _export_response(frames, fmt: str, name: str, columns=EXPORT_COLUMNS):
+    """Chunks encoded as they are sent (core.export); blocking encoding runs in the threadpool."""
+    try:
+        body = encode(frames, fmt, columns)
+    except FormatUnavailable as e:
+        return JSONResponse({"error": str(e)}, status_code=406)
+    headers = {"Content-Disposition": f'attachment; filename="{name}.{fmt}"'}
+    return StreamingResponse(body, media_type=EXPORT_MEDIA_TYPES[fmt], headers=headers)
 
 
 @app.post("/api/export")
-async def export_csv(payload: Dict = None):
+async def export_records(payload: Dict = None, format: str = EXPORT_QUERY):
+    """{"records": [{date, open, high, low, close, volume}, ...]} -> download (no company column)."""
     if not payload or "records" not in payload:
         return JSONResponse({"error": "Invalid payload"}, status_code=400)
-    records = payload["records"]
-    buf = io.StringIO()
-    writer = csv.writer(buf)
-    writer.writerow(["date", "open", "high", "low", "close", "volume"])
-    for r in records:
-        writer.writerow([r.get("date"), r.get("open"), r.get("high"), r.get("low"), r.get("close"), r.get("volume")])
-    buf.seek(0)
-    return FileResponse(io.BytesIO(buf.getvalue().encode("utf-8")), media_type="text/csv", filename="export.csv")
+    try:
+        frame = await asyncio.to_thread(OHLCVFrame.from_dicts, payload["records"], str(payload.get("ticker") or ""))
+    except (KeyError, TypeError, ValueError):
+        return JSONResponse({"error": "Invalid records"}, status_code=400)
+    return _export_response([frame], format, "export", BAR_COLUMNS)
+
+
+@app.get("/api/export")
+async def export_range(
+    tickers: str = Query(..., description="comma-separated"),
+    source: str = Query("store", pattern="^(store|csv|live)$"),
+    start: str = Query("", description="YYYY-MM-DD"),
+    end: str = Query("", description="YYYY-MM-DD"),
+    interval: str = Query("1d"),
+    period: str = Query("max", description="live source only"),
+    format: str = EXPORT_QUERY,
+):
+    """
+    Bars of `tickers` in [start, end] from the history store (memory-mapped
+    reads, one ticker at a time), the sample CSV or the live source, streamed
+    in `format` without building per-row records.
+    """
+    names = list(dict.fromkeys(t.strip().upper() for t in tickers.split(",") if t.strip()))
+    if not names:
+        return JSONResponse({"error": "tickers is required"}, status_code=400)
+    try:
+        for d in (start, end):
+            if d:
+                datetime.strptime(d, "%Y-%m-%d")
+    except ValueError:
+        return JSONResponse({"error": "Invalid date format, use YYYY-MM-DD"}, status_code=400)
+    try:
+        for t in names:
+            check_key(_normalize_india(t) if source == "live" else t, interval)
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+
+    if source == "store":
+        if HISTORY is None:
+            return JSONResponse({"error": "History store is disabled (HISTORY_STORE_DIR)"}, status_code=404)
+        frames = (HISTORY.read(t, interval, start, end) for t in names)   # read lazily, in the threadpool
+    elif source == "csv":
+        index = await asyncio.to_thread(_csv_index)
+        frames = [index.range(t, start, end) for t in names if t in index]   # views, no copies
+    else:
+        names = [_normalize_india(t) for t in names]
+        fetched = await fetch_many(names, period=period, interval=interval)
+        frames = [date_range(f, start, end) for f in fetched]
+    return _export_response(frames, format, f"{'_'.join(names)[:80]}_{start or 'first'}_{end or 'last'}")
@@ -0,0 +1,154 @@
+import asyncio
+import os
+import weakref
+from typing import List, Optional, Sequence
+from core.frame import OHLCVFrame
+from core.metrics import REGISTRY, UPSTREAM_CALLS, stage
+from core.store import STORE_DIR, HistoryStore
+from web.data_live import fetch_yf_frame
+from web.cache import CACHE, ttl_for
+from web.bars import BarStore
+
+# Async data-source layer: every upstream call runs in a worker thread, bounded by
+# a semaphore and a per-source timeout, so one slow ticker never serializes the rest.
+# Results go through web.cache.CACHE keyed by (source, ticker, period, interval);
+# Yahoo misses are served from BAR_STORE, which only fetches the bars it lacks
+# and persists what it fetched in the HISTORY store (core.store).
+
+ALPHA_KEY = os.getenv("ALPHA_VANTAGE_KEY")  # optional, for fallback
+ALPHA_URL = os.getenv("ALPHA_VANTAGE_URL", "https://www.alphavantage.co/query")
+MAX_CONCURRENCY = int(os.getenv("UPSTREAM_CONCURRENCY", "8"))
+YF_TIMEOUT = float(os.getenv("YF_TIMEOUT", "15"))
+ALPHA_TIMEOUT = float(os.getenv("ALPHA_TIMEOUT", "12"))
+
+HISTORY = HistoryStore(STORE_DIR) if STORE_DIR else None   # HISTORY_STORE_DIR="" keeps live bars in memory only
+BAR_STORE = BarStore(fetch_yf_frame, history=HISTORY)
+REGISTRY.register_collector(lambda: [
+    ("bar_store_fetches", "counter", "Yahoo requests made by the bar store (full history vs. delta)",
+     [("_total", {"kind": "full"}, BAR_STORE.full_fetches), ("_total", {"kind": "delta"}, BAR_STORE.delta_fetches)]),
+    ("bar_store_disk_loads", "counter", "Series seeded from the on-disk history store",
+     [("_total", {}, BAR_STORE.disk_loads)]),
+    ("history_store_writes", "counter", "History store appends and compactions",
+     [("_total", {"kind": "append"}, HISTORY.appends), ("_total", {"kind": "compaction"}, HISTORY.compactions)]
+     if HISTORY is not None else []),
+])
+
+_session = None
+_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+
+def _http():
+    """Shared requests.Session with a connection pool sized to MAX_CONCURRENCY."""
+    global _session
+    if _session is None:
+        import requests
+        from requests.adapters import HTTPAdapter
+        s = requests.Session()
+        s.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=MAX_CONCURRENCY))
+        s.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=MAX_CONCURRENCY))
+        _session = s
+    return _session
+
+
+def fetch_alpha(ticker: str, period: str = "1mo") -> List[dict]:
+    """
+    Very small Alpha Vantage fallback attempt. Returns records in same shape or [].
+    Note: requires ALPHA_VANTAGE_KEY env on server.
+    """
+    if not ALPHA_KEY:
+        return []
+    params = {"function": "TIME_SERIES_DAILY", "symbol": ticker, "apikey": ALPHA_KEY, "outputsize": "compact"}
+    try:
+        r = _http().get(ALPHA_URL, params=params, timeout=ALPHA_TIMEOUT)
+        if r.status_code != 200:
+            return []
+        j = r.json()
+        # parse Time Series (Daily)
+        key = next((k for k in j.keys() if k.startswith("Time Series")), None)
+        if not key:
+            return []
+        ts = j[key]
+        items = sorted(ts.items())  # chronological
+        out = []
+        for date_str, vals in items:
+            out.append({
+                "date": date_str,
+                "open": float(vals.get("1. open", 0)),
+                "high": float(vals.get("2. high", 0)),
+                "low": float(vals.get("3. low", 0)),
+                "close": float(vals.get("4. close", 0)),
+                "volume": int(float(vals.get("5. volume", 0)))
+            })
+        return out
+    except Exception:
+        return []
+
+
+def _semaphore() -> asyncio.Semaphore:
+    # one semaphore per event loop (test clients and workers may run several loops)
+    loop = asyncio.get_running_loop()
+    sem = _semaphores.get(loop)
+    if sem is None:
+        sem = _semaphores[loop] = asyncio.Semaphore(MAX_CONCURRENCY)
+    return sem
+
+
+async def _bounded(fn, *args, timeout: float, source: str) -> OHLCVFrame:
+    async with _semaphore():
+        with stage("upstream_fetch", source=source):
+            try:
+                frame = await asyncio.wait_for(asyncio.to_thread(fn, *args), timeout)
+            except asyncio.TimeoutError:
+                UPSTREAM_CALLS.inc(source=source, outcome="timeout")
+                return OHLCVFrame.empty()
+            except Exception:  # upstream error -> treat as "no data"
+                UPSTREAM_CALLS.inc(source=source, outcome="error")
+                return OHLCVFrame.empty()
+        UPSTREAM_CALLS.inc(source=source, outcome="ok" if len(frame) else "empty")
+        return frame
+
+
+def _alpha_frame(ticker: str) -> OHLCVFrame:
+    return OHLCVFrame.from_dicts(fetch_alpha(ticker), ticker)
+
+
+async def fetch_yf(ticker: str, period: str = "6mo", interval: str = "1d") -> OHLCVFrame:
+    return await CACHE.get_or_fetch(
+        ("yf", ticker, period, interval),
+        lambda: _bounded(BAR_STORE.get, ticker, period, interval, timeout=YF_TIMEOUT, source="yf"),
+        ttl_for(interval),
+    )
+
+
+async def refresh_yf(ticker: str, period: str = "6mo", interval: str = "1d",
+                     ttl: Optional[float] = None) -> OHLCVFrame:
+    """Re-fetch (a delta via BAR_STORE) and replace the cached entry; used by web.prefetch."""
+    return await CACHE.refresh(
+        ("yf", ticker, period, interval),
+        lambda: _bounded(BAR_STORE.get, ticker, period, interval, timeout=YF_TIMEOUT, source="yf"),
+        ttl if ttl is not None else ttl_for(interval),
+    )
+
+
+async def fetch_alpha_async(ticker: str) -> OHLCVFrame:
+    if not ALPHA_KEY:
+        return OHLCVFrame.empty()
+    return await CACHE.get_or_fetch(
+        ("alpha", ticker, "compact", "1d"),
+        lambda: _bounded(_alpha_frame, ticker, timeout=ALPHA_TIMEOUT, source="alpha"),
+        ttl_for("1d"),
+    )
+
+
+async def fetch_ohlc(ticker: str, period: str = "6mo", interval: str = "1d", fallback: bool = True) -> OHLCVFrame:
+    """Yahoo first, Alpha Vantage fallback (if configured) when Yahoo returns nothing."""
+    frame = await fetch_yf(ticker, period, interval)
+    if not len(frame) and fallback:
+        frame = await fetch_alpha_async(ticker)
+    return frame
+
+
+async def fetch_many(tickers: Sequence[str], period: str = "6mo", interval: str = "1d",
+                     fallback: bool = True) -> List[OHLCVFrame]:
+    """Fan out fetch_ohlc over `tickers` concurrently; results keep input order."""
+    return list(await asyncio.gather(*(fetch_ohlc(t, period, interval, fallback) for t in tickers)))
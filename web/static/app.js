@@ -88,11 +88,43 @@ $("doCompare").addEventListener("click", async ()=>{
     if(!res.ok){ toast("Compare failed"); return; }
     const j = await res.json();
     renderCompare(j);
+    if(s === "live") startLive(j, period, interval); else stopLive();
   }catch(e){
     setLoading(false); toast("Compare error"); console.error(e);
   }
 });
 
+/* Live updates: /ws/live sends a snapshot per ticker, then only new / changed bars */
+let liveSocket = null;
+const liveName = t => { t = t.trim().toUpperCase(); return t.includes(".") ? t : t + ".NS"; };  // mirrors _normalize_india
+const columnsToRecords = c => c.date.map((d, i) => ({date:d, open:c.open[i], high:c.high[i], low:c.low[i], close:c.close[i], volume:c.volume[i]}));
+
+function stopLive(){
+  if(liveSocket){ liveSocket.onclose = null; liveSocket.close(); liveSocket = null; }
+}
+
+function startLive(data, period, interval){
+  stopLive();
+  const series = {[liveName(data.t1)]: data.left, [liveName(data.t2)]: data.right};
+  const proto = location.protocol === "https:" ? "wss" : "ws";
+  const q = `tickers=${encodeURIComponent(Object.keys(series).join(","))}&period=${encodeURIComponent(period)}&interval=${encodeURIComponent(interval)}`;
+  const ws = liveSocket = new WebSocket(`${proto}://${location.host}/ws/live?${q}`);
+  ws.onmessage = ev => {
+    const m = JSON.parse(ev.data), node = series[m.ticker];
+    if(m.type === "error"){ console.warn(m.error); return; }
+    if(!node) return;
+    if(m.type === "snapshot"){
+      node.records = columnsToRecords(m.columns);
+    } else if(m.type === "delta"){
+      let cut = node.records.findIndex(r => r.date >= m.from);
+      if(cut < 0) cut = node.records.length;
+      node.records = node.records.slice(0, cut).concat(columnsToRecords(m.bars));
+    }
+    renderCompare(data);
+  };
+  ws.onclose = () => { if(liveSocket === ws) liveSocket = null; };
+}
+
 /* loading helper */
 function setLoading(on){ document.body.classList.toggle("loading", !!on); }
 
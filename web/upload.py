@@ -0,0 +1,215 @@
+import asyncio
+import os
+from typing import Dict, List, Optional
+import numpy as np
+from core.indicators import DEFAULT_WINDOWS, IndicatorState, ma_ema
+from core.resample import BucketAggregator, lttb_indices
+from core.streaming import IncrementalCSV, RunningSummary, StrideSampler
+
+# Streaming /api/upload: the multipart body is parsed as it arrives and the CSV
+# part is fed chunk by chunk into running aggregates. Nothing holds the whole file.
+
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(512 * 1024 * 1024)))
+UPLOAD_MAX_ROWS = int(os.getenv("UPLOAD_MAX_ROWS", "10000000"))
+UPLOAD_MAX_RECORDS = int(os.getenv("UPLOAD_MAX_RECORDS", "200000"))   # bars kept when max_points=0
+DEFAULT_MAX_POINTS = 0   # every bar, as before; > 0 opts in to a thinned series
+LTTB_CANDIDATES = 4   # the stride sampler keeps up to 4x max_points bars for the final LTTB pick
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+class UploadAggregator:
+    """
+    Row-at-a-time version of the old upload handler: same lenient column lookup
+    (date/Date, open/Open, ...), missing numbers read as 0, unparsable rows skipped.
+    Keeps a running summary and, with max_points=0, every bar (MA/EMA computed
+    in one batch at the end) up to `max_records` bars; past that the upload is
+    rejected as too large, since memory grows with every bar kept. With
+    max_points > 0 only a series of at most `max_points` bars is kept, with
+    running MA/EMA state: a stride sampler bounds the candidates while streaming,
+    LTTB picks the final bars. With `rule` bars are first aggregated into buckets
+    (rows must then be in date order and rows with an unparsable date are
+    skipped); MA/EMA follow the aggregated bars.
+    """
+
+    KEYS = ("date", "open", "high", "low", "close", "volume")
+
+    def __init__(self, max_points: int = DEFAULT_MAX_POINTS, max_rows: int = UPLOAD_MAX_ROWS,
+                 windows=DEFAULT_WINDOWS, rule=None, max_records: int = UPLOAD_MAX_RECORDS):
+        self.max_rows = max_rows
+        self.max_records = max_records
+        self.max_points = max_points
+        self.windows = tuple(windows)
+        self._csv = IncrementalCSV()
+        self._cols: Optional[Dict[str, List[int]]] = None
+        self.summary = RunningSummary()
+        self.indicators = IndicatorState(self.windows)
+        self.sampler = StrideSampler(max_points * LTTB_CANDIDATES) if max_points > 0 else None
+        self.buckets = BucketAggregator(rule) if rule is not None else None
+        self._records: List[dict] = []   # max_points=0: all bars
+        self._closes: List[float] = []
+        self.rows_seen = 0
+        self._last = None
+
+    def feed(self, chunk: bytes) -> None:
+        for row in self._csv.feed(chunk):
+            self._row(row)
+
+    def close(self) -> None:
+        for row in self._csv.close():
+            self._row(row)
+        if self.buckets is not None:
+            bar = self.buckets.flush()
+            if bar is not None:
+                self._bar(bar)
+
+    def _row(self, row: List[str]) -> None:
+        if self._cols is None:
+            # column positions for the lowercase and Capitalized header spellings
+            pos = {h: i for i, h in reversed(list(enumerate(row)))}
+            self._cols = {k: [pos[n] for n in (k, k.capitalize()) if n in pos] for k in self.KEYS}
+            return
+        self.rows_seen += 1
+        if self.rows_seen > self.max_rows:
+            raise UploadTooLarge(f"More than {self.max_rows} rows")
+
+        def get(key):
+            for i in self._cols[key]:
+                if i < len(row) and row[i]:
+                    return row[i]
+            return None
+
+        try:
+            d = get("date")
+            o = float(get("open") or 0)
+            h = float(get("high") or 0)
+            l = float(get("low") or 0)
+            c = float(get("close") or 0)
+            v = int(float(get("volume") or 0))
+        except (TypeError, ValueError):
+            return
+        if self.buckets is None:
+            self.summary.update(o, h, l, c, v)
+            self._bar((d, o, h, l, c, v))
+            return
+        try:
+            when = np.datetime64(str(d).strip())
+        except ValueError:
+            return
+        self.summary.update(o, h, l, c, v)
+        bar = self.buckets.push(when, o, h, l, c, v)
+        if bar is not None:
+            self._bar(bar)
+
+    def _bar(self, bar: tuple) -> None:
+        if self.sampler is None:
+            if len(self._records) >= self.max_records:
+                raise UploadTooLarge(f"More than {self.max_records} bars; pass max_points or resample to thin them")
+            self._records.append(self._record(bar))
+            self._closes.append(bar[4])
+            return
+        self.indicators.advance(bar[4])
+        self._last = bar
+        if self.sampler.wants_next():
+            self.sampler.add((self._record(self._last), self.indicators.latest()))
+        else:
+            self.sampler.add(None)   # placeholder: only survives if it is the last bar
+
+    @staticmethod
+    def _record(vals) -> dict:
+        d, o, h, l, c, v = vals
+        return {"date": str(d).strip(), "open": o, "high": h, "low": l, "close": c, "volume": v}
+
+    def result(self, name: Optional[str]) -> dict:
+        if self.sampler is None:
+            return self._result(name, self._records, ma_ema(np.array(self._closes), self.windows), False)
+        picked = self.sampler.result()
+        if picked and picked[-1] is None:
+            # the last bar was not on the stride; the live state is exactly its state
+            picked[-1] = (self._record(self._last), self.indicators.latest())
+        thinned = self.sampler.thinned
+        if len(picked) > self.max_points:
+            idx = lttb_indices(np.array([rec["close"] for rec, _ in picked]), self.max_points)
+            picked = [picked[i] for i in idx]
+            thinned = True
+        records = [rec for rec, _ in picked]
+        ma = {w: [ind["ma"][w] for _, ind in picked] for w in self.windows} if picked else {}
+        ema = {w: [ind["ema"][w] for _, ind in picked] for w in self.windows} if picked else {}
+        return self._result(name, records, {"ma": ma, "ema": ema}, thinned)
+
+    def _result(self, name: Optional[str], records: List[dict], me: dict, thinned: bool) -> dict:
+        return {
+            "company": name,
+            "rows": self.summary.count,
+            "downsampled": thinned or self.buckets is not None,
+            "records": records,
+            "analytics": {"avg_volume": self.summary.average_volume, "summary": self.summary.summary(),
+                          "ma": me["ma"], "ema": me["ema"]},
+        }
+
+
+async def stream_upload(request, agg: UploadAggregator, field: str = "file",
+                        max_bytes: int = UPLOAD_MAX_BYTES) -> Optional[str]:
+    """
+    Parse a multipart/form-data request body incrementally and feed the `field`
+    part into `agg`. Returns the uploaded filename. Raises UploadTooLarge / ValueError.
+    """
+    from python_multipart.multipart import MultipartParser, parse_options_header
+
+    ctype, params = parse_options_header(request.headers.get("content-type"))
+    if ctype != b"multipart/form-data" or b"boundary" not in params:
+        raise ValueError("Expected multipart/form-data upload")
+    declared = request.headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > max_bytes:
+        raise UploadTooLarge(f"Upload exceeds {max_bytes} bytes")
+
+    st = {"headers": {}, "hname": b"", "hvalue": b"", "in_file": False, "filename": None, "found": False}
+    wanted = field.encode()
+
+    def on_part_begin():
+        st["headers"] = {}
+
+    def on_header_field(data, start, end):
+        st["hname"] += data[start:end]
+
+    def on_header_value(data, start, end):
+        st["hvalue"] += data[start:end]
+
+    def on_header_end():
+        st["headers"][st["hname"].lower()] = st["hvalue"]
+        st["hname"] = st["hvalue"] = b""
+
+    def on_headers_finished():
+        _, opts = parse_options_header(st["headers"].get(b"content-disposition", b""))
+        st["in_file"] = opts.get(b"name") == wanted and not st["found"]
+        if st["in_file"]:
+            st["found"] = True
+            st["filename"] = opts.get(b"filename", b"").decode("utf-8", errors="ignore") or None
+
+    def on_part_data(data, start, end):
+        if st["in_file"]:
+            agg.feed(data[start:end])
+
+    def on_part_end():
+        if st["in_file"]:
+            agg.close()
+            st["in_file"] = False
+
+    parser = MultipartParser(params[b"boundary"], {
+        "on_part_begin": on_part_begin, "on_header_field": on_header_field,
+        "on_header_value": on_header_value, "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished, "on_part_data": on_part_data,
+        "on_part_end": on_part_end,
+    })
+    total = 0
+    async for chunk in request.stream():
+        total += len(chunk)
+        if total > max_bytes:
+            raise UploadTooLarge(f"Upload exceeds {max_bytes} bytes")
+        await asyncio.to_thread(parser.write, chunk)   # CSV parsing + aggregation: off the event loop
+    await asyncio.to_thread(parser.finalize)
+    if not st["found"]:
+        raise ValueError(f"Missing form field '{field}'")
+    return st["filename"]
@@ -0,0 +1,59 @@
+import asyncio
+import importlib
+import os
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+# Background warm-up after startup. Heavy modules are imported lazily on the
+# paths that need them; this preloads them (and datasets / caches) once the
+# server already accepts requests, so the first real request does not pay for it.
+#   WARMUP=0           disable
+#   WARMUP_DELAY=s     wait before starting (default 0.5s)
+#   WARMUP_TICKERS=a,b also prefetch these live series into the caches
+
+WARMUP = os.getenv("WARMUP", "1") != "0"
+WARMUP_DELAY = float(os.getenv("WARMUP_DELAY", "0.5"))
+WARMUP_TICKERS = [t.strip().upper() for t in os.getenv("WARMUP_TICKERS", "").split(",") if t.strip()]
+WARMUP_MODULES = ("pandas", "yfinance", "requests", "orjson")
+
+Step = Tuple[str, Callable[[], Awaitable[object]]]
+
+STATUS: Dict[str, object] = {"state": "disabled" if not WARMUP else "pending", "steps": {}}
+
+
+def import_modules(names: Sequence[str] = WARMUP_MODULES) -> Callable[[], Awaitable[List[str]]]:
+    """Step that imports `names` in a worker thread; missing optional modules are skipped."""
+    async def run() -> List[str]:
+        def load():
+            done = []
+            for name in names:
+                try:
+                    importlib.import_module(name)
+                    done.append(name)
+                except ImportError:
+                    pass
+            return done
+        return await asyncio.to_thread(load)
+    return run
+
+
+async def warm_up(steps: Sequence[Step], delay: float = WARMUP_DELAY) -> Dict[str, object]:
+    """Run steps one after another; a failing step is recorded and skipped."""
+    STATUS["state"] = "running"
+    await asyncio.sleep(delay)   # let the server finish starting and take its first requests
+    for name, step in steps:
+        t0 = time.perf_counter()
+        try:
+            await step()
+            STATUS["steps"][name] = {"ok": True, "seconds": round(time.perf_counter() - t0, 3)}
+        except Exception as e:
+            STATUS["steps"][name] = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+    STATUS["state"] = "done"
+    return STATUS
+
+
+def start(steps: Sequence[Step]) -> Optional[asyncio.Task]:
+    """Schedule warm_up() on the running loop (no-op with WARMUP=0)."""
+    if not WARMUP:
+        return None
+    return asyncio.get_running_loop().create_task(warm_up(steps))